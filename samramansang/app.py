@@ -1,3 +1,4 @@
+import os
 import json
 import cv2
 import asyncio
@@ -21,15 +22,47 @@ from playback_router import setup_playback_routes
 from segments_router import setup_segments_routes
 from embeddings_router import setup_embeddings_routes
 from record_router import setup_record_routes
+from replay_source import ReplayControl, PoseReplayRunner, start_video_replay_thread, parse_capture_source
+from replay_router import setup_replay_routes
+from training_governor import training_governor
+from cpu_tuning import CPU_AFFINITY_ENCODE, applied_affinity, pin_current_thread
+from dataset_catalog import dataset_catalog
+from segment_bank import segment_bank
+from job_manager import job_manager
+from jobs_router import setup_jobs_routes
+from live_matcher import live_matcher
+from embedding_search import embedding_search
+from embedding_map import embedding_map
+from artifact_cache import artifact_cache
 
-# 전역 스레드 풀 (프레임 처리용)
-frame_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="FrameProcessor")
+# 캡처 소스: 'camera' | 'video:<path>' | 'jsonl:<path>' (리플레이는 카메라 없는 벤치마크/회귀 테스트용)
+CAPTURE_SOURCE = os.getenv("CAPTURE_SOURCE", "camera")
+REPLAY_RATE = float(os.getenv("REPLAY_RATE", "1.0"))   # 0 = 가능한 한 빠르게
+REPLAY_LOOP = os.getenv("REPLAY_LOOP", "1").strip().lower() not in ("0", "false", "no")
+REPLAY_START = int(os.getenv("REPLAY_START", "0"))
+PORT = int(os.getenv("PORT", "3000"))
+
+# 전역 스레드 풀 (프레임 JPEG 인코딩용, CPU_AFFINITY_ENCODE 지정 시 해당 코어에 고정)
+frame_executor = ThreadPoolExecutor(
+    max_workers=3,
+    thread_name_prefix="FrameProcessor",
+    initializer=pin_current_thread,
+    initargs=(CPU_AFFINITY_ENCODE, 'encode'),
+)
 state = SharedState()
-infer = InferRunner(state,model_path="yolo11m-pose.pt")
+capture_kind, capture_path = parse_capture_source(CAPTURE_SOURCE)
+replay_control = ReplayControl(rate=REPLAY_RATE, loop=REPLAY_LOOP, start=REPLAY_START) if capture_kind != 'camera' else None
+if capture_kind == 'jsonl':
+    # 녹화된 포즈를 추론 결과처럼 공급 (YOLO 추론 생략)
+    infer = PoseReplayRunner(state, capture_path, replay_control)
+else:
+    infer = InferRunner(state,model_path="yolo11m-pose.pt")
 infer_hand = None  # 손 인식은 현재 사용하지 않음
+training_governor.attach_infer(infer)  # 학습 작업은 라이브 추론 지연을 보고 스로틀링
 recorder = PoseRecorder(root_dir="training/dataset/raw")
 
-pose_ws_sender = PoseWebSocketSender(state, infer, infer_hand=None, fps=30, send_video=True, video_quality=85, recorder=recorder)
+pose_ws_sender = PoseWebSocketSender(state, infer, infer_hand=None, fps=30, send_video=True, video_quality=85, recorder=recorder, encode_executor=frame_executor)
+pose_ws_sender.add_result_listener(live_matcher.on_result)  # 라이브 윈도우 -> 세그먼트 매칭 (/ws로 segment_match 푸시)
 
 # 서버 종료 시 정리
 async def cleanup(app):
@@ -46,6 +79,12 @@ async def cleanup(app):
         except Exception:
             pass
 
+        # 데이터셋 카탈로그 폴링 정지
+        dataset_catalog.stop()
+        
+        # 진행 중인 비동기 작업 취소
+        job_manager.shutdown()
+        
         # 포즈 데이터 WebSocket 전송 태스크 정지
         try:
             pose_ws_sender.stop()
@@ -94,6 +133,26 @@ async def main():
     app.router.add_get('/', index_handler)
     app.router.add_get('/index.html', index_handler)
     
+    # 실시간 경로 지표 (부하 테스트/모니터링용)
+    async def metrics_handler(request):
+        return web.json_response({
+            'status': 'ok',
+            'inference': infer.get_stats(),
+            'websocket': websocket_manager.get_stats(),
+            'sender': pose_ws_sender.get_stats(),
+            'replay': replay_control.status() if replay_control else None,
+            'cpu_affinity': applied_affinity(),
+            'catalog': dataset_catalog.get_stats(),
+            'segment_bank': segment_bank.get_stats(),
+            'jobs': job_manager.get_stats(),
+            'live_match': live_matcher.get_stats(),
+            'knn': embedding_search.get_stats(),
+            'embedding_map': embedding_map.get_stats(),
+            'artifacts': artifact_cache.get_stats(),
+        })
+    
+    app.router.add_get('/metrics', metrics_handler)
+    
     # WebSocket 라우트
     app.router.add_get('/ws', websocket_handler)
     
@@ -111,6 +170,12 @@ async def main():
     
     # Record 라우트 등록
     setup_record_routes(app, recorder)
+    
+    # Replay 라우트 등록
+    setup_replay_routes(app, replay_control)
+    
+    # Jobs 라우트 등록 (비동기 작업 조회/취소)
+    setup_jobs_routes(app)
   
     # CORS 적용 - 모든 라우트에 적용 (더 안전한 방법)
     for route in list(app.router.routes()):
@@ -119,9 +184,17 @@ async def main():
     # 종료 시 정리
     app.on_shutdown.append(cleanup)
 
-    # 카메라 캡처 스레드 시작
-    print("🎥 카메라 캡처 스레드 시작...")
-    start_capture_thread(state)
+    # 카메라 캡처 스레드 시작 (리플레이 모드에서는 파일 소스 사용)
+    if capture_kind == 'video':
+        print(f"🎞️ 비디오 리플레이 스레드 시작: {capture_path}")
+        start_video_replay_thread(state, capture_path, replay_control)
+    elif capture_kind == 'camera':
+        print("🎥 카메라 캡처 스레드 시작...")
+        start_capture_thread(state)
+    
+    # 데이터셋 카탈로그 (목록 API용 파일 메타데이터 폴링)
+    dataset_catalog.start()
+    segment_bank.ensure_current()
     
     # 추론 엔진 시작
     print("🤖 추론 엔진 시작...")
@@ -146,7 +219,7 @@ if __name__ == "__main__":
     signal.signal(signal.SIGINT, signal_handler)
     
     try:
-        web.run_app(main(), host="0.0.0.0", port=3000)
+        web.run_app(main(), host="0.0.0.0", port=PORT)
     except KeyboardInterrupt:
         print("\n🛑 사용자에 의해 종료되었습니다.")
         sys.exit(0)
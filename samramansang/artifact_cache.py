@@ -0,0 +1,149 @@
+"""
+프로세스 공용 산출물 캐시
+segments*.json, windows_index.json, embeddings.npy 같은 학습 산출물을 경로별로 한 번만 읽어 공유한다.
+- 키: (경로, 종류), 유효성: 파일 (mtime_ns, size, inode) - 파이프라인이 파일을 교체하면 다음 조회에서 다시 읽음
+- 반환: 파싱된 JSON 객체 / 메모리 맵 배열 / 사용자 로더 결과 (호출자는 수정하지 않고 읽기만 해야 함)
+- 바이트 예산 LRU (메모리 맵은 OS 페이지 캐시가 관리하므로 비용 0으로 계산)
+- 단일 비행: 같은 키를 동시에 요청하면 한 번만 읽고 나머지는 그 결과를 기다림
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+ARTIFACT_CACHE_MB = float(os.getenv("ARTIFACT_CACHE_MB", "512"))
+
+
+class _Flight:
+    """진행 중인 로드 하나 (기다리는 요청들이 결과를 공유)"""
+
+    def __init__(self, stamp):
+        self.stamp = stamp
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ArtifactCache:
+    """경로/종류별 로드 결과 캐시 (스레드 안전, 실행기 스레드에서 호출)"""
+
+    def __init__(self, budget_bytes: int = int(ARTIFACT_CACHE_MB * 1024 * 1024)):
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[tuple, Any, int]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], _Flight] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _stamp(path: str) -> tuple:
+        st = os.stat(path)  # 없으면 FileNotFoundError
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def get(self, path: str, kind: str, loader: Callable[[str], Any], cost: Optional[Callable[[Any, int], int]] = None) -> Any:
+        """
+        path를 loader로 읽은 결과 (파일이 바뀌지 않았으면 캐시)
+        cost(value, file_size) -> 예산에 계산할 바이트 (기본: 파일 크기)
+        """
+        key = (path, kind)
+        stamp = self._stamp(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            flight = self._inflight.get(key)
+            if flight is not None and flight.stamp == stamp:
+                self.shared += 1
+                owner = False
+            else:
+                flight = _Flight(stamp)
+                self._inflight[key] = flight
+                self.misses += 1
+                owner = True
+
+        if not owner:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = loader(path)
+            # 읽는 도중 교체되었으면 캐시하지 않음 (다음 조회에서 다시 읽음)
+            try:
+                unchanged = self._stamp(path) == stamp
+            except OSError:
+                unchanged = False
+            if unchanged:
+                size = cost(value, stamp[1]) if cost else stamp[1]
+                self._store(key, stamp, value, size)
+            flight.value = value
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            flight.done.set()
+
+    def _store(self, key, stamp, value, size: int):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (stamp, value, size)
+            self._bytes += size
+            # 오래된 항목부터 제거 (방금 넣은 항목은 유지)
+            while self._bytes > self.budget_bytes and len(self._entries) > 1:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    # ------------------------------------------------------------------
+    # 자주 쓰는 종류
+    # ------------------------------------------------------------------
+    def json(self, path: str) -> Any:
+        """파싱된 JSON (공유 객체 - 수정 금지)"""
+        def load(p):
+            with open(p, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return self.get(path, 'json', load)
+
+    def npy(self, path: str, mmap: bool = True) -> np.ndarray:
+        """.npy 배열 (기본: 읽기 전용 메모리 맵)"""
+        if mmap:
+            return self.get(path, 'npy-mmap', lambda p: np.load(p, mmap_mode='r'), cost=lambda v, size: 0)
+        return self.get(path, 'npy', np.load, cost=lambda v, size: int(v.nbytes))
+
+    def invalidate(self, path: Optional[str] = None):
+        """path의 모든 항목 (None이면 전체) 제거"""
+        with self._lock:
+            for key in [k for k in self._entries if path is None or k[0] == path]:
+                self._bytes -= self._entries.pop(key)[2]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'budget_bytes': self.budget_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'shared_loads': self.shared,
+                'evictions': self.evictions,
+            }
+
+
+# 전역 산출물 캐시 (각 라우터/모듈에서 공유)
+artifact_cache = ArtifactCache()
@@ -0,0 +1,107 @@
+"""
+CPU 스레드/affinity 설정 모듈
+4–8코어 장비에서 캡처 스레드, 추론 스레드, 인코딩 스레드 풀, 이벤트 루프가
+서로 코어를 빼앗지 않도록 torch 스레드 수와 스레드별 CPU 고정을 설정한다.
+
+환경 변수:
+  TORCH_THREADS          torch intra-op 스레드 수 (0 = torch 기본값)
+  TORCH_INTEROP_THREADS  torch inter-op 스레드 수 (0 = torch 기본값)
+  CPU_AFFINITY_CAPTURE   캡처 스레드 CPU 목록 (예: "0")
+  CPU_AFFINITY_INFER     추론 스레드 CPU 목록 (예: "1-3")
+  CPU_AFFINITY_ENCODE    JPEG 인코딩 스레드 풀 CPU 목록 (예: "0,3")
+  INFER_AUTOTUNE         1이면 시작 시 더미 프레임으로 스레드 수를 자동 선택
+"""
+
+import os
+import threading
+from typing import Dict, Optional, Set
+
+TORCH_THREADS = int(os.getenv("TORCH_THREADS", "0"))
+TORCH_INTEROP_THREADS = int(os.getenv("TORCH_INTEROP_THREADS", "0"))
+CPU_AFFINITY_CAPTURE = os.getenv("CPU_AFFINITY_CAPTURE", "")
+CPU_AFFINITY_INFER = os.getenv("CPU_AFFINITY_INFER", "")
+CPU_AFFINITY_ENCODE = os.getenv("CPU_AFFINITY_ENCODE", "")
+INFER_AUTOTUNE = os.getenv("INFER_AUTOTUNE", "0").strip().lower() in ("1", "true", "yes")
+INFER_AUTOTUNE_SECONDS = float(os.getenv("INFER_AUTOTUNE_SECONDS", "2.0"))
+
+# 실제 적용된 배치 (역할 -> CPU 목록), /metrics 노출용
+_applied: Dict[str, Optional[list]] = {}
+_applied_lock = threading.Lock()
+
+
+def parse_cpu_list(spec: str) -> Optional[Set[int]]:
+    """'0-2,5' -> {0, 1, 2, 5} (빈 문자열이면 None)"""
+    spec = (spec or "").strip()
+    if not spec:
+        return None
+    cpus: Set[int] = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            lo, hi = part.split('-', 1)
+            cpus.update(range(int(lo), int(hi) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus or None
+
+
+def available_cpus() -> int:
+    """현재 프로세스가 사용할 수 있는 CPU 수"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except Exception:
+        return os.cpu_count() or 1
+
+
+def pin_current_thread(spec, role: str) -> bool:
+    """
+    호출한 스레드를 지정한 CPU에 고정 (Linux 전용, 다른 OS에서는 무시)
+    spec: CPU 목록 문자열 또는 set
+    """
+    cpus = parse_cpu_list(spec) if isinstance(spec, str) else spec
+    if not cpus:
+        return False
+    if not hasattr(os, 'sched_setaffinity'):
+        print(f"⚠️ CPU affinity 미지원 플랫폼 ({role} 고정 생략)")
+        return False
+    try:
+        # Linux에서 pid 0은 호출한 스레드 자신
+        os.sched_setaffinity(0, cpus)
+        with _applied_lock:
+            _applied[role] = sorted(cpus)
+        print(f"📌 {role} 스레드 CPU 고정: {sorted(cpus)}")
+        return True
+    except Exception as e:
+        print(f"⚠️ {role} 스레드 CPU 고정 실패: {e}")
+        return False
+
+
+def apply_torch_threads(intra: int = TORCH_THREADS, inter: int = TORCH_INTEROP_THREADS):
+    """torch 스레드 수 적용 (0이면 기본값 유지). inter-op은 첫 병렬 작업 전에만 변경 가능"""
+    import torch
+    if inter and inter > 0:
+        try:
+            torch.set_num_interop_threads(int(inter))
+        except RuntimeError as e:
+            print(f"⚠️ torch inter-op 스레드 설정 실패 (이미 사용됨): {e}")
+    if intra and intra > 0:
+        torch.set_num_threads(int(intra))
+
+
+def applied_affinity() -> Dict[str, Optional[list]]:
+    """역할별로 실제 적용된 CPU 고정 목록"""
+    with _applied_lock:
+        return dict(_applied)
+
+
+def current_layout() -> Dict:
+    """현재 스레드 배치 정보"""
+    import torch
+    return {
+        'cpus': available_cpus(),
+        'torch_threads': torch.get_num_threads(),
+        'torch_interop_threads': torch.get_num_interop_threads(),
+        'affinity': applied_affinity(),
+    }
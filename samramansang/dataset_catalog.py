@@ -0,0 +1,262 @@
+"""
+데이터셋 디렉토리 카탈로그
+녹화 파일(JSONL)과 학습 산출물의 메타데이터(크기, 수정 시각, 프레임 수, 재생 시간, 임베딩 여부)를
+백그라운드 스레드가 mtime 폴링으로 갱신하고, 목록 API는 메모리 스냅샷에서 바로 응답한다.
+- 프레임 수/재생 시간은 dataset_index로 계산 (바뀐 파일만 다시 계산)
+- 임베딩 여부: windows_index.json의 files 목록에 포함된 녹화
+- 요약/썸네일: recording_summary 사이드카 (없으면 녹화가 끝난 뒤 백그라운드에서 생성 예약)
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+from training.window_dataset import recording_chunk_paths
+from dataset_index import dataset_index
+from recording_summary import load_summary, recording_summarizer
+
+CATALOG_POLL_SECONDS = float(os.getenv("CATALOG_POLL_SECONDS", "2.0"))
+
+# 기본으로 감시하는 녹화 파일 패턴
+DATASET_PATTERNS = [
+    'dataset/raw/*.jsonl',
+    'training/dataset/raw/*.jsonl',
+    'dataset/*.jsonl',
+    'training/dataset/*.jsonl',
+]
+
+# 학습 산출물 (목록/자동 로드용)
+ARTIFACT_PATHS = [
+    'training/runs/simclr/windows_index.json',
+    'training/runs/windows_index.json',
+    'training/runs/simclr/windows_preview.json',
+    'training/runs/windows_preview.json',
+    'training/runs/simclr/embeddings_2d.npy',
+    'training/runs/embeddings_2d.npy',
+    'embeddings_2d.npy',
+    'training/runs/segments.json',
+    'training/runs/segments_representative.json',
+    'training/runs/segments_final.json',
+]
+
+# 임베딩된 녹화 목록을 읽을 windows index
+WINDOWS_INDEX_PATHS = [
+    'training/runs/simclr/windows_index.json',
+    'training/runs/windows_index.json',
+]
+
+
+def _chunk_key(path: str) -> Tuple[int, float]:
+    """녹화 청크 전체의 (크기 합, 최신 mtime) - 청크가 추가/증가하면 바뀜"""
+    size, mtime = 0, 0.0
+    for c in recording_chunk_paths(path):
+        st = os.stat(c)
+        size += st.st_size
+        mtime = max(mtime, st.st_mtime)
+    return size, mtime
+
+
+class DatasetCatalog:
+    """녹화/산출물 파일 메타데이터 캐시 (스냅샷은 통째로 교체되므로 읽기에 잠금 불필요)"""
+
+    def __init__(self, patterns: Iterable[str] = DATASET_PATTERNS,
+                 artifacts: Iterable[str] = ARTIFACT_PATHS,
+                 poll_seconds: float = CATALOG_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._patterns: List[str] = list(patterns)
+        self._artifact_paths: List[str] = list(artifacts)
+        self._scan_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # 스냅샷
+        self._by_pattern: Dict[str, List[str]] = {}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._artifacts: Dict[str, Dict[str, Any]] = {}
+        self._embedded: set = set()
+        self._embedded_key = None
+        self.last_scan = 0.0
+        self.scan_count = 0
+
+    # ------------------------------------------------------------------
+    # 수명 주기
+    # ------------------------------------------------------------------
+    def start(self):
+        """초기 스캔 후 폴링 스레드 시작"""
+        if self._running:
+            return
+        self._running = True
+        self.refresh()
+        self._thread = threading.Thread(target=self._poll_loop, name="dataset-catalog", daemon=True)
+        self._thread.start()
+        print(f"🗂️ 데이터셋 카탈로그 시작 (파일 {len(self._entries)}개, 폴링 {self.poll_seconds}s)")
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+
+    def notify_changed(self):
+        """녹화 종료 등 변경을 알고 있을 때 다음 폴링을 앞당김"""
+        self._wake.set()
+
+    def _poll_loop(self):
+        while self._running:
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            if not self._running:
+                break
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️ 데이터셋 카탈로그 갱신 오류: {e}")
+
+    # ------------------------------------------------------------------
+    # 스캔
+    # ------------------------------------------------------------------
+    def refresh(self):
+        """패턴/산출물을 다시 스캔 (크기/mtime이 바뀐 파일만 프레임 정보 재계산)"""
+        with self._scan_lock:
+            by_pattern: Dict[str, List[str]] = {}
+            entries: Dict[str, Dict[str, Any]] = {}
+            for pattern in self._patterns:
+                paths = []
+                for path in glob.glob(pattern):
+                    if not os.path.isfile(path):
+                        continue
+                    paths.append(path)
+                    if path not in entries:
+                        entry = self._scan_file(path)
+                        if entry is not None:
+                            entries[path] = entry
+                by_pattern[pattern] = [p for p in paths if p in entries]
+
+            artifacts: Dict[str, Dict[str, Any]] = {}
+            for path in self._artifact_paths:
+                if os.path.isfile(path):
+                    st = os.stat(path)
+                    artifacts[path] = {
+                        'path': path,
+                        'name': os.path.basename(path),
+                        'size': st.st_size,
+                        'modified': st.st_mtime,
+                    }
+
+            self._refresh_embedded(artifacts)
+            for entry in entries.values():
+                entry['embedded'] = entry['name'] in self._embedded
+
+            self._by_pattern = by_pattern
+            self._entries = entries
+            self._artifacts = artifacts
+            self.last_scan = time.time()
+            self.scan_count += 1
+
+    def _scan_file(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            size, mtime = _chunk_key(path)
+        except OSError:
+            return None
+        prev = self._entries.get(path)
+        if prev is not None and prev['size'] == size and prev['modified'] == mtime:
+            entry = dict(prev)
+            if entry['summary'] is None:
+                self._attach_summary(entry)
+            return entry
+        entry = {
+            'path': path,
+            'name': os.path.basename(path),
+            'size': size,
+            'modified': mtime,
+            'relative_path': path,
+            'frame_count': None,
+            'duration_s': None,
+            'embedded': False,
+            'summary': None,
+            'thumbnail': None,
+        }
+        try:
+            info = dataset_index.info(path)
+            entry['frame_count'] = info.get('frame_count')
+            entry['duration_s'] = info.get('duration_s')
+        except Exception as e:
+            print(f"⚠️ 카탈로그 프레임 정보 계산 실패 ({path}): {e}")
+        self._attach_summary(entry)
+        return entry
+
+    @staticmethod
+    def _attach_summary(entry: Dict[str, Any]):
+        """요약 사이드카가 최신이면 붙이고, 없으면 (녹화가 끝난 파일만) 생성 예약"""
+        summary = load_summary(entry['path'])
+        if summary is None:
+            recording_summarizer.schedule_if_idle(entry['path'], entry['modified'])
+            return
+        entry['summary'] = {
+            k: summary.get(k)
+            for k in ('duration_s', 'frame_count', 'mean_confidence', 'motion_energy', 'detected_ratio')
+        }
+        entry['thumbnail'] = f"/playback/thumbnail?path={quote(entry['path'])}"
+
+    def _refresh_embedded(self, artifacts: Dict[str, Dict[str, Any]]):
+        """windows_index.json이 바뀌었을 때만 임베딩된 녹화 목록을 다시 읽음"""
+        key = tuple((p, artifacts[p]['size'], artifacts[p]['modified']) for p in WINDOWS_INDEX_PATHS if p in artifacts)
+        if key == self._embedded_key:
+            return
+        embedded = set()
+        for p, _, _ in key:
+            try:
+                with open(p, 'r', encoding='utf-8') as f:
+                    embedded.update(json.load(f).get('files', []))
+            except Exception as e:
+                print(f"⚠️ windows index 읽기 실패 ({p}): {e}")
+        self._embedded = embedded
+        self._embedded_key = key
+
+    # ------------------------------------------------------------------
+    # 조회 (메모리 스냅샷)
+    # ------------------------------------------------------------------
+    def files(self, patterns: Iterable[str] = DATASET_PATTERNS) -> List[Dict[str, Any]]:
+        """감시 중인 패턴들에 해당하는 파일 메타데이터 목록 (경로 중복 제거, 감시하지 않는 패턴은 무시)"""
+        by_pattern, entries = self._by_pattern, self._entries
+        seen, out = set(), []
+        for pattern in patterns:
+            for path in by_pattern.get(pattern, []):
+                if path not in seen and path in entries:
+                    seen.add(path)
+                    out.append(dict(entries[path]))
+        return out
+
+    def watches(self, pattern: str) -> bool:
+        return pattern in self._patterns
+
+    def entry(self, path: str) -> Optional[Dict[str, Any]]:
+        """감시 중인 녹화 파일 하나의 메타데이터 (없으면 None)"""
+        entry = self._entries.get(path)
+        return dict(entry) if entry else None
+
+    def artifact(self, path: str) -> Optional[Dict[str, Any]]:
+        """감시 중인 학습 산출물 메타데이터 (없거나 감시 대상이 아니면 None)"""
+        entry = self._artifacts.get(path)
+        return dict(entry) if entry else None
+
+    def embedded_files(self) -> List[str]:
+        return sorted(self._embedded)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'files': len(self._entries),
+            'artifacts': len(self._artifacts),
+            'embedded': len(self._embedded),
+            'summaries': recording_summarizer.get_stats(),
+            'last_scan': self.last_scan,
+            'scan_count': self.scan_count,
+            'poll_seconds': self.poll_seconds,
+        }
+
+
+# 전역 카탈로그 (app.py에서 start, 각 라우터에서 조회)
+dataset_catalog = DatasetCatalog()
@@ -0,0 +1,351 @@
+"""
+데이터셋 파일 인덱스
+JSONL/Parquet 포즈 파일마다 프레임 위치 인덱스와 요약 정보(프레임 수, 첫/마지막 프레임,
+크기/수정 시각)를 유지해서, 파일 정보 조회는 O(1), 구간 조회는 seek만으로 처리한다.
+
+- PoseRecorder가 만든 녹화(<seq>.manifest.json 존재): 레코더가 쓰는 <seq>.idx를 그대로 사용
+- 그 외 JSONL: 같은 형식의 <base>.lines.idx를 서버가 생성 (학습 스크립트가 읽는 레코더 .idx와 구분)
+  파일이 뒤로 늘어났고 기존 부분(앞/끝 샘플 해시, 줄 경계)이 그대로일 때만 늘어난 부분을 추가 인덱싱, 아니면 전체 재생성
+- Parquet: row group 메타데이터로 프레임 수/구간을 계산
+요약 정보는 <base>.info.json 사이드카에 저장되어 서버 재시작 후에도 재사용된다.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from training.window_dataset import (
+    INDEX_RECORD,
+    recording_chunk_paths,
+    recording_index_path,
+    recording_manifest_path,
+)
+
+# INDEX_RECORD ('<IQ')와 같은 레이아웃의 structured dtype
+INDEX_DTYPE = np.dtype([('chunk', '<u4'), ('offset', '<u8')])
+INFO_VERSION = 2
+# 증분 인덱싱 전에 기존 부분이 바뀌지 않았는지 확인할 샘플 크기 (앞/끝 각각)
+PREFIX_SAMPLE_BYTES = 64 * 1024
+
+
+def _base(path: str) -> str:
+    for ext in ('.jsonl', '.parquet'):
+        if path.endswith(ext):
+            return path[:-len(ext)]
+    return path
+
+
+def info_path(path: str) -> str:
+    return _base(path) + '.info.json'
+
+
+def line_index_path(path: str) -> str:
+    """서버가 만드는 라인 오프셋 인덱스 (레코더의 <base>.idx와 다른 이름)"""
+    return _base(path) + '.lines.idx'
+
+
+def index_path(path: str) -> str:
+    """레코더 녹화(manifest 존재)는 레코더 인덱스, 그 외는 서버 라인 인덱스"""
+    if os.path.exists(recording_manifest_path(path)):
+        return recording_index_path(path)
+    return line_index_path(path)
+
+
+def _prefix_digest(path: str, size: int) -> str:
+    """파일 [0, size) 구간의 앞/끝 샘플 해시 (증분 인덱싱 전 기존 부분 확인용)"""
+    h = hashlib.sha1(str(size).encode())
+    with open(path, 'rb') as f:
+        h.update(f.read(min(size, PREFIX_SAMPLE_BYTES)))
+        tail = max(0, size - PREFIX_SAMPLE_BYTES)
+        f.seek(tail)
+        h.update(f.read(size - tail))
+    return h.hexdigest()
+
+
+def _frame_metadata(frame: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not frame:
+        return {}
+    return {
+        'width': frame.get('width', 0),
+        'height': frame.get('height', 0),
+        'fps': frame.get('fps', 0),
+        'seq_id': frame.get('seq_id', ''),
+        'has_keypoints': 'kpts' in frame,
+        'keypoint_count': len(frame.get('kpts', [])) if 'kpts' in frame else 0,
+    }
+
+
+def _duration_s(first: Optional[Dict[str, Any]], last: Optional[Dict[str, Any]], frame_count: int) -> Optional[float]:
+    """ts(ms) 차이로 재생 시간 계산, ts가 없으면 fps 기준 추정"""
+    if first and last and first.get('ts') is not None and last.get('ts') is not None:
+        return max(0.0, (float(last['ts']) - float(first['ts'])) / 1000.0)
+    fps = (first or {}).get('fps')
+    if fps:
+        return frame_count / float(fps)
+    return None
+
+
+class DatasetIndex:
+    """파일별 인덱스/요약 정보 캐시 (동기 API - 이벤트 루프에서는 executor로 호출)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._file_locks: Dict[str, threading.Lock] = {}
+        self._cache: Dict[str, Dict[str, Any]] = {}
+
+    def _file_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            lock = self._file_locks.get(path)
+            if lock is None:
+                lock = self._file_locks[path] = threading.Lock()
+            return lock
+
+    # ------------------------------------------------------------------
+    # 요약 정보
+    # ------------------------------------------------------------------
+    def info(self, path: str) -> Dict[str, Any]:
+        """파일 요약 정보 (변경이 없으면 캐시/사이드카에서 바로 반환)"""
+        path = os.path.normpath(path)
+        with self._file_lock(path):
+            if path.endswith('.parquet'):
+                return self._parquet_info(path)
+            return self._jsonl_info(path)
+
+    def _stat(self, path: str) -> Tuple[List[str], List[int], float]:
+        chunks = recording_chunk_paths(path)
+        sizes, mtime = [], 0.0
+        for c in chunks:
+            st = os.stat(c)
+            sizes.append(st.st_size)
+            mtime = max(mtime, st.st_mtime)
+        return chunks, sizes, mtime
+
+    def _load_info(self, path: str) -> Optional[Dict[str, Any]]:
+        cached = self._cache.get(path)
+        if cached is not None:
+            return cached
+        try:
+            with open(info_path(path), 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            if info.get('version') == INFO_VERSION:
+                return info
+        except Exception:
+            pass
+        return None
+
+    def _save_info(self, path: str, info: Dict[str, Any]):
+        self._cache[path] = info
+        tmp = info_path(path) + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(info, f, ensure_ascii=False)
+            os.replace(tmp, info_path(path))
+        except Exception as e:
+            print(f"⚠️ 데이터셋 인덱스 정보 저장 실패 ({path}): {e}")
+
+    def _jsonl_info(self, path: str) -> Dict[str, Any]:
+        chunks, sizes, mtime = self._stat(path)
+        prev = self._load_info(path)
+        if prev and prev.get('sizes') == sizes and prev.get('mtime') == mtime:
+            self._cache[path] = prev
+            return prev
+
+        recorder_owned = os.path.exists(recording_manifest_path(path))
+        indexed_bytes, prefix_digest = None, None
+        if not recorder_owned:
+            indexed_bytes, prefix_digest = self._update_line_index(path, sizes[0], prev)
+
+        offsets = self.load_offsets(path)
+        frame_count = int(len(offsets))
+        first = self._read_frame(chunks, offsets, 0) if frame_count else None
+        last = self._read_frame(chunks, offsets, frame_count - 1) if frame_count else None
+        info = {
+            'version': INFO_VERSION,
+            'path': path,
+            'format': 'jsonl',
+            'size': int(sum(sizes)),
+            'sizes': sizes,
+            'mtime': mtime,
+            'chunks': len(chunks),
+            'indexed_bytes': indexed_bytes,
+            'prefix_digest': prefix_digest,
+            'frame_count': frame_count,
+            'duration_s': _duration_s(first, last, frame_count),
+            'metadata': _frame_metadata(first),
+            'first_frame': first,
+            'last_frame': last,
+        }
+        self._save_info(path, info)
+        return info
+
+    def _prefix_unchanged(self, path: str, size: int, prev: Optional[Dict[str, Any]]) -> bool:
+        """이전 인덱스가 현재 파일의 앞부분에 그대로 맞는지 (같은 길이 이상으로 다시 쓴 파일은 False)"""
+        prev = prev or {}
+        indexed = prev.get('indexed_bytes')
+        idx_path = line_index_path(path)
+        if not indexed or indexed > size or not prev.get('prefix_digest') or not os.path.exists(idx_path):
+            return False
+        if os.path.getsize(idx_path) != int(prev.get('frame_count', -1)) * INDEX_DTYPE.itemsize:
+            return False
+        with open(path, 'rb') as f:
+            f.seek(indexed - 1)
+            if f.read(1) != b'\n':
+                return False
+        return _prefix_digest(path, indexed) == prev['prefix_digest']
+
+    def _update_line_index(self, path: str, size: int, prev: Optional[Dict[str, Any]]) -> Tuple[int, Optional[str]]:
+        """
+        레코더 인덱스가 없는 단일 JSONL: 라인 오프셋 인덱스를 생성/증분 갱신
+        -> (인덱싱된 바이트 수, 그 구간의 샘플 해시)
+        """
+        idx_path = line_index_path(path)
+        start = 0
+        mode = 'wb'
+        if self._prefix_unchanged(path, size, prev):
+            # 기존 부분이 그대로이고 뒤로 늘어난 경우만 이어서 인덱싱
+            start = int(prev['indexed_bytes'])
+            mode = 'ab'
+        records = bytearray()
+        with open(path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # 쓰는 중인 마지막 줄은 다음 갱신 때 인덱싱
+                if line.strip():
+                    records += INDEX_RECORD.pack(0, offset)
+                offset += len(line)
+        with open(idx_path, mode) as f:
+            f.write(records)
+        return offset, (_prefix_digest(path, offset) if offset else None)
+
+    def _parquet_info(self, path: str) -> Dict[str, Any]:
+        import pyarrow.parquet as pq  # type: ignore
+
+        st = os.stat(path)
+        prev = self._load_info(path)
+        if prev and prev.get('size') == st.st_size and prev.get('mtime') == st.st_mtime:
+            self._cache[path] = prev
+            return prev
+        pf = pq.ParquetFile(path)
+        frame_count = int(pf.metadata.num_rows)
+        first = self._parquet_rows(path, 0, 1)
+        last = self._parquet_rows(path, frame_count - 1, frame_count)
+        first = first[0] if first else None
+        last = last[0] if last else None
+        info = {
+            'version': INFO_VERSION,
+            'path': path,
+            'format': 'parquet',
+            'size': st.st_size,
+            'mtime': st.st_mtime,
+            'frame_count': frame_count,
+            'duration_s': _duration_s(first, last, frame_count),
+            'metadata': _frame_metadata(first),
+            'first_frame': first,
+            'last_frame': last,
+        }
+        self._save_info(path, info)
+        return info
+
+    # ------------------------------------------------------------------
+    # 구간 조회
+    # ------------------------------------------------------------------
+    @staticmethod
+    def load_offsets(path: str) -> np.ndarray:
+        """(chunk, offset) 레코드 배열 (인덱스가 없으면 빈 배열)"""
+        idx_path = index_path(path)
+        if not os.path.exists(idx_path):
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        n = os.path.getsize(idx_path) // INDEX_DTYPE.itemsize
+        if n == 0:
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        return np.memmap(idx_path, dtype=INDEX_DTYPE, mode='r', shape=(n,))
+
+    @staticmethod
+    def _read_frame(chunks: List[str], offsets: np.ndarray, i: int) -> Optional[Dict[str, Any]]:
+        rec = offsets[i]
+        with open(chunks[int(rec['chunk'])], 'rb') as f:
+            f.seek(int(rec['offset']))
+            line = f.readline()
+        try:
+            return json.loads(line)
+        except Exception:
+            return None
+
+    def read_range(self, path: str, start: int, end: int) -> Tuple[bytes, int, int, int]:
+        """
+        [start, end) 프레임을 JSONL 바이트열로 반환 -> (data, start, end, frame_count)
+        JSONL은 인덱스 오프셋으로 seek 후 원본 바이트를 그대로 잘라서 반환한다.
+        """
+        info = self.info(path)
+        total = int(info['frame_count'])
+        start = max(0, min(int(start), total))
+        end = max(start, min(int(end), total))
+        if start == end:
+            return b'', start, end, total
+        if info.get('format') == 'parquet':
+            rows = self._parquet_rows(path, start, end)
+            data = ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in rows).encode('utf-8')
+            return data, start, end, total
+
+        chunks = recording_chunk_paths(path)
+        offsets = self.load_offsets(path)
+        sel = offsets[start:end + 1]  # 다음 프레임 오프셋까지 (구간 끝 계산용)
+        parts: List[bytes] = []
+        i = 0
+        n = end - start
+        while i < n:
+            chunk = int(sel[i]['chunk'])
+            j = i
+            while j + 1 < n and int(sel[j + 1]['chunk']) == chunk:
+                j += 1
+            begin = int(sel[i]['offset'])
+            stop = None
+            if j + 1 < len(sel) and int(sel[j + 1]['chunk']) == chunk:
+                stop = int(sel[j + 1]['offset'])
+            with open(chunks[chunk], 'rb') as f:
+                f.seek(begin)
+                data = f.read(stop - begin) if stop is not None else f.read()
+            if stop is None:
+                # 청크 끝까지 읽은 경우: 아직 인덱싱되지 않은(쓰는 중인) 줄은 제외
+                lines = [ln for ln in data.splitlines(keepends=True) if ln.strip() and ln.endswith(b'\n')]
+                data = b''.join(lines[:j - i + 1])
+            parts.append(data)
+            i = j + 1
+        return b''.join(parts), start, end, total
+
+    @staticmethod
+    def _parquet_rows(path: str, start: int, end: int) -> List[Dict[str, Any]]:
+        """Parquet [start, end) 행을 필요한 row group만 읽어서 JSONL과 같은 dict로 변환"""
+        import pyarrow as pa  # type: ignore
+        import pyarrow.parquet as pq  # type: ignore
+
+        if end <= start:
+            return []
+        pf = pq.ParquetFile(path)
+        groups, first_row, row = [], None, 0
+        for g in range(pf.metadata.num_row_groups):
+            n = pf.metadata.row_group(g).num_rows
+            if row + n > start and row < end:
+                groups.append(g)
+                if first_row is None:
+                    first_row = row
+            row += n
+        if not groups:
+            return []
+        table = pa.concat_tables([pf.read_row_group(g) for g in groups])
+        table = table.slice(start - first_row, end - start)
+        cols = {name: table[name].to_pylist() for name in table.column_names}
+        if 'kpts' not in cols and 'keypoints' in cols:
+            cols['kpts'] = cols.pop('keypoints')
+        n = table.num_rows
+        return [{k: v[i] for k, v in cols.items()} for i in range(n)]
+
+
+# 전역 데이터셋 인덱스 (playback_router 등에서 공유)
+dataset_index = DatasetIndex()
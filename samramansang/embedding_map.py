@@ -0,0 +1,386 @@
+"""
+임베딩 2D 맵 바이너리 전송
+embeddings_2d.npy를 hex JSON 대신 바이너리로, 격자 기반 LOD로 솎아서 보낸다 (/embeddings/points).
+미리보기 포즈는 전체 windows_preview.json 대신 점 하나씩 조회한다 (/embeddings/preview).
+
+응답 형식 (리틀 엔디언):
+  헤더 36바이트: magic b'EMP1', 좌표 포맷(u8: 0=f32, 1=f16), flags(u8: 1=라벨 포함), grid(u16),
+                 전체 점 수(u32), 보낸 점 수(u32), 메타 JSON 길이(u32), bbox(minx, maxx, miny, maxy f32)
+  윈도우 ID u32[count] + 좌표 [count, 2] (bbox 기준 [0,1] 정규화) + 라벨 i32[count] + 메타 JSON
+  메타: {"source", "label_counts"} (라벨 개수는 솎기 전 전체 기준)
+LOD: grid x grid 칸마다 (칸, 라벨) 조합별로 첫 점 하나만 남긴다 (grid=0이면 전체).
+캔버스 해상도 정도의 grid면 50만 점도 화면에서 구분되는 점 수로 줄어든다.
+
+타일 피라미드 (/embeddings/tiles/{z}/{x}/{y}):
+  점을 최대 줌(TILE_MAX_ZOOM) 격자의 Morton 코드 순으로 정렬해 embeddings_2d_tiles.npz로 원본 옆에 저장한다.
+  타일 (z, x, y)는 정렬된 코드의 연속 구간이라 이진 탐색 두 번으로 찾고, 타일 안에서 같은 격자 솎기를 한다.
+  응답은 위와 같은 형식 (헤더의 전체 점 수 = 타일 안 점 수), 메타에 타일 좌표와 클러스터별 개수/중심이 들어간다.
+  타일 y는 화면 방향 (위가 0), 좌표는 전체 bbox 기준 [0,1] 그대로.
+"""
+
+import json
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from artifact_cache import artifact_cache
+from dataset_catalog import dataset_catalog
+from dataset_index import dataset_index
+from segment_frames import SEGMENT_JSONL_PATTERNS, WINDOWS_INDEX_PATH
+
+EMBEDDINGS_2D_PATTERNS = [
+    'training/runs/simclr/embeddings_2d.npy',
+    'training/runs/embeddings_2d.npy',
+    'embeddings_2d.npy'
+]
+EMBEDDING_SEGMENTS_PATH = 'training/runs/segments.json'
+PREVIEW_PATTERNS = [
+    'training/runs/simclr/windows_preview.json',
+    'training/runs/windows_preview.json'
+]
+EMBEDDING_MAP_CACHE = int(os.getenv("EMBEDDING_MAP_CACHE", "8"))
+EMBEDDING_TILE_CACHE = int(os.getenv("EMBEDDING_TILE_CACHE", "256"))
+TILE_GRID = int(os.getenv("EMBEDDING_TILE_GRID", "128"))
+TILE_MAX_ZOOM = 16  # Morton 코드 32비트 (축당 16비트)
+TILE_VERSION = 1
+MAX_GRID = 4096
+
+MAP_MAGIC = b'EMP1'
+MAP_HEADER = struct.Struct('<4sBBHIII4f')
+MAP_FORMATS = {'f32': (0, np.dtype('<f4')), 'f16': (1, np.dtype('<f2'))}
+FLAG_LABELS = 1
+
+
+def _mtime(path: Optional[str]) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns if path else None
+    except OSError:
+        return None
+
+
+def newest_artifact(patterns: List[str]) -> Optional[Dict[str, Any]]:
+    """후보 경로 중 존재하는 가장 최근 파일 (카탈로그 항목)"""
+    found = [e for e in (dataset_catalog.artifact(p) for p in patterns) if e]
+    return max(found, key=lambda x: x['modified']) if found else None
+
+
+def window_labels(segments_data: Any, n: int) -> np.ndarray:
+    """segments.json -> 윈도우별 라벨 (세그먼트에 속하지 않으면 -1)"""
+    labels = np.full(n, -1, dtype=np.int32)
+    if isinstance(segments_data, dict) and isinstance(segments_data.get('labels'), list):
+        src = np.asarray(segments_data['labels'], dtype=np.int32)[:n]
+        labels[:src.shape[0]] = src
+        return labels
+    segments = segments_data.get('segments', []) if isinstance(segments_data, dict) else (segments_data or [])
+    for seg in segments:
+        s, e = max(0, int(seg.get('start', 0))), min(n - 1, int(seg.get('end', -1)))
+        if s <= e:
+            labels[s:e + 1] = int(seg.get('label', -1))
+    return labels
+
+
+def grid_thin(unit: np.ndarray, labels: np.ndarray, grid: int) -> np.ndarray:
+    """[0,1] 좌표 -> 칸/라벨 조합별 첫 점의 인덱스 (오름차순)"""
+    cells = np.minimum((unit * grid).astype(np.int64), grid - 1)
+    cell = cells[:, 1] * grid + cells[:, 0]
+    _, lab = np.unique(labels, return_inverse=True)
+    key = cell * (int(lab.max()) + 1 if lab.size else 1) + lab
+    _, first = np.unique(key, return_index=True)
+    return np.sort(first)
+
+
+def _spread_bits(v: np.ndarray) -> np.ndarray:
+    """16비트 정수의 비트 사이에 0을 끼움 (Morton 인터리브용)"""
+    v = v.astype(np.uint64) & 0xFFFF
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+
+def morton_codes(unit: np.ndarray, zoom: int = TILE_MAX_ZOOM) -> np.ndarray:
+    """[0,1] 좌표 (y 위쪽) -> 최대 줌 격자의 Morton 코드 (타일 y는 화면 방향)"""
+    side = 1 << zoom
+    tx = np.clip((unit[:, 0] * side).astype(np.int64), 0, side - 1)
+    ty = np.clip(((1.0 - unit[:, 1]) * side).astype(np.int64), 0, side - 1)
+    return _spread_bits(tx) | (_spread_bits(ty) << np.uint64(1))
+
+
+def tile_code_range(z: int, x: int, y: int, zoom: int = TILE_MAX_ZOOM) -> Tuple[int, int]:
+    """타일 (z, x, y) -> 최대 줌 Morton 코드 구간 [lo, hi)"""
+    prefix = int(_spread_bits(np.array([x]))[0] | (_spread_bits(np.array([y]))[0] << np.uint64(1)))
+    shift = 2 * (zoom - z)
+    return prefix << shift, (prefix + 1) << shift
+
+
+def pack_points(ids: np.ndarray, unit: np.ndarray, labels: np.ndarray, fmt: str, grid: int, total: int,
+                bbox: Tuple[float, float, float, float], meta: Dict[str, Any]) -> bytes:
+    """점 목록 -> 응답 바이너리 (헤더 + ID + 좌표 + 라벨 + 메타 JSON)"""
+    code, dtype = MAP_FORMATS[fmt]
+    meta_bytes = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+    header = MAP_HEADER.pack(MAP_MAGIC, code, FLAG_LABELS, grid, total, len(ids), len(meta_bytes), *bbox)
+    return b''.join([
+        header,
+        np.asarray(ids).astype('<u4').tobytes(),
+        np.asarray(unit).astype(dtype).tobytes(),
+        np.asarray(labels).astype('<i4').tobytes(),
+        meta_bytes,
+    ])
+
+
+class EmbeddingMap:
+    """2D 좌표/라벨 캐시, LOD 인코딩 결과 LRU, 점별 미리보기"""
+
+    def __init__(self, cache_size: int = EMBEDDING_MAP_CACHE):
+        self._lock = threading.Lock()
+        self._key = None
+        self._data: Optional[Dict[str, Any]] = None
+        self._cache: "OrderedDict[tuple, Tuple[bytes, int, int]]" = OrderedDict()
+        self.cache_size = cache_size
+        self._tiles_key = None
+        self._tiles: Optional[Dict[str, np.ndarray]] = None
+        self._tile_cache: "OrderedDict[tuple, Tuple[bytes, int, int]]" = OrderedDict()
+        self.tile_builds = 0
+
+    def source_paths(self) -> List[str]:
+        """현재 맵을 구성하는 파일 (ETag 계산용)"""
+        entry = newest_artifact(EMBEDDINGS_2D_PATTERNS)
+        return [p for p in (entry['path'] if entry else None, EMBEDDING_SEGMENTS_PATH) if p]
+
+    def _load(self) -> Tuple[tuple, Dict[str, Any]]:
+        entry = newest_artifact(EMBEDDINGS_2D_PATTERNS)
+        if entry is None:
+            raise LookupError("embeddings_2d.npy 파일이 없습니다")
+        path = entry['path']
+        key = (path, _mtime(path), _mtime(EMBEDDING_SEGMENTS_PATH))
+        with self._lock:
+            if key == self._key:
+                return key, self._data
+        P = artifact_cache.npy(path)
+        P = (P[:, :2] if P.ndim == 2 else P.reshape(-1, 2)).astype(np.float32)
+        n = P.shape[0]
+        labels = np.full(n, -1, dtype=np.int32)
+        if key[2] is not None:
+            try:
+                labels = window_labels(artifact_cache.json(EMBEDDING_SEGMENTS_PATH), n)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ 임베딩 맵 라벨 읽기 실패: {e}")
+        finite = np.isfinite(P).all(axis=1)
+        lo = P[finite].min(axis=0) if finite.any() else np.zeros(2, dtype=np.float32)
+        hi = P[finite].max(axis=0) if finite.any() else np.ones(2, dtype=np.float32)
+        unit = np.clip((P - lo) / np.maximum(hi - lo, 1e-6), 0.0, 1.0)
+        unit[~finite] = 0.0
+        uniq, counts = np.unique(labels, return_counts=True)
+        data = {
+            'name': entry.get('name', os.path.basename(path)),
+            'path': path,
+            'unit': unit.astype(np.float32),
+            'labels': labels,
+            'bbox': (float(lo[0]), float(hi[0]), float(lo[1]), float(hi[1])),
+            'label_counts': {str(int(l)): int(c) for l, c in zip(uniq, counts)},
+        }
+        with self._lock:
+            self._key, self._data = key, data
+            self._cache.clear()
+        return key, data
+
+    def encode(self, grid: int = 0, fmt: str = 'f16') -> Tuple[bytes, int, int]:
+        """LOD 응답 바이너리 -> (body, 전체 점 수, 보낸 점 수)"""
+        if fmt not in MAP_FORMATS:
+            raise ValueError(f"지원하지 않는 포맷입니다: {fmt}")
+        grid = max(0, min(int(grid), MAX_GRID))
+        source_key, data = self._load()
+        key = (source_key, grid, fmt)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        unit, labels = data['unit'], data['labels']
+        total = unit.shape[0]
+        ids = grid_thin(unit, labels, grid) if grid > 0 and total else np.arange(total)
+        meta = {'source': data['name'], 'label_counts': data['label_counts']}
+        body = pack_points(ids, unit[ids], labels[ids], fmt, grid, total, data['bbox'], meta)
+        result = (body, total, len(ids))
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    # ------------------------------------------------------------------
+    # 타일 피라미드
+    # ------------------------------------------------------------------
+    @staticmethod
+    def tiles_path(source_path: str) -> str:
+        """runs/embeddings_2d.npy -> runs/embeddings_2d_tiles.npz"""
+        return os.path.splitext(source_path)[0] + '_tiles.npz'
+
+    def _load_tiles(self) -> Tuple[tuple, Dict[str, Any], Dict[str, np.ndarray]]:
+        """Morton 정렬 점 배열 (디스크 캐시가 원본/라벨과 맞지 않으면 다시 만들어 저장)"""
+        source_key, data = self._load()
+        with self._lock:
+            if self._tiles_key == source_key:
+                return source_key, data, self._tiles
+        path = self.tiles_path(data['path'])
+        stamp = json.dumps([source_key[1], source_key[2], TILE_VERSION])
+        tiles = None
+        try:
+            with np.load(path) as z:
+                if str(z['stamp']) == stamp:
+                    tiles = {k: z[k] for k in ('codes', 'ids', 'unit', 'labels')}
+        except (OSError, ValueError, KeyError):
+            tiles = None
+        if tiles is None:
+            codes = morton_codes(data['unit'])
+            order = np.argsort(codes, kind='stable')
+            tiles = {
+                'codes': codes[order],
+                'ids': order.astype(np.uint32),
+                'unit': data['unit'][order],
+                'labels': data['labels'][order],
+            }
+            tmp = path + '.tmp'
+            try:
+                with open(tmp, 'wb') as f:  # 파일 객체로 저장해야 .tmp 이름이 유지됨
+                    np.savez(f, stamp=np.array(stamp), **tiles)
+                os.replace(tmp, path)
+            except OSError as e:
+                print(f"⚠️ 임베딩 타일 캐시 저장 실패 (메모리에서만 사용): {e}")
+            self.tile_builds += 1
+            print(f"🗺️ 임베딩 타일 인덱스 생성: {len(order)}개 점 -> {path}")
+        with self._lock:
+            self._tiles_key, self._tiles = source_key, tiles
+            self._tile_cache.clear()
+        return source_key, data, tiles
+
+    def tiles_info(self) -> Dict[str, Any]:
+        """뷰어 초기화용 메타 (전체 점 수, 최대 줌, 타일 격자, 라벨 개수)"""
+        _, data, tiles = self._load_tiles()
+        return {
+            'source': data['name'],
+            'total': int(tiles['codes'].shape[0]),
+            'max_zoom': TILE_MAX_ZOOM,
+            'tile_grid': TILE_GRID,
+            'bbox': data['bbox'],
+            'label_counts': data['label_counts'],
+        }
+
+    def tile(self, z: int, x: int, y: int, grid: int = TILE_GRID, fmt: str = 'f16', points: bool = True) -> Tuple[bytes, int, int]:
+        """
+        타일 하나 -> (body, 타일 안 점 수, 보낸 점 수)
+        grid: 타일 안 솎기 격자 (0이면 전체), points=False면 클러스터 집계만
+        """
+        if fmt not in MAP_FORMATS:
+            raise ValueError(f"지원하지 않는 포맷입니다: {fmt}")
+        if not 0 <= z <= TILE_MAX_ZOOM or not (0 <= x < (1 << z) and 0 <= y < (1 << z)):
+            raise ValueError(f"잘못된 타일 좌표입니다: {z}/{x}/{y}")
+        grid = max(0, min(int(grid), MAX_GRID))
+        source_key, data, tiles = self._load_tiles()
+        key = (source_key, z, x, y, grid, fmt, points)
+        with self._lock:
+            cached = self._tile_cache.get(key)
+            if cached is not None:
+                self._tile_cache.move_to_end(key)
+                return cached
+
+        lo, hi = tile_code_range(z, x, y)
+        a, b = np.searchsorted(tiles['codes'], [lo, hi])
+        unit, labels, ids = tiles['unit'][a:b], tiles['labels'][a:b], tiles['ids'][a:b]
+        total = int(b - a)
+
+        # 클러스터별 개수/중심 (솎기 전 기준)
+        clusters = []
+        if total:
+            uniq, inv, counts = np.unique(labels, return_inverse=True, return_counts=True)
+            cx = np.bincount(inv, weights=unit[:, 0]) / counts
+            cy = np.bincount(inv, weights=unit[:, 1]) / counts
+            clusters = [{'label': int(l), 'count': int(c), 'x': round(float(px), 6), 'y': round(float(py), 6)}
+                        for l, c, px, py in zip(uniq, counts, cx, cy)]
+
+        if not points:
+            keep = np.zeros(0, dtype=np.int64)
+        elif grid > 0 and total:
+            side = 1 << z
+            local = np.stack([unit[:, 0] * side - x, (1.0 - unit[:, 1]) * side - y], axis=1)
+            keep = grid_thin(np.clip(local, 0.0, 1.0), labels, grid)
+        else:
+            keep = np.arange(total)
+        meta = {'source': data['name'], 'z': z, 'x': x, 'y': y, 'clusters': clusters}
+        body = pack_points(ids[keep], unit[keep], labels[keep], fmt, grid, total, data['bbox'], meta)
+        result = (body, total, len(keep))
+        with self._lock:
+            self._tile_cache[key] = result
+            while len(self._tile_cache) > EMBEDDING_TILE_CACHE:
+                self._tile_cache.popitem(last=False)
+        return result
+
+    # ------------------------------------------------------------------
+    # 점별 미리보기
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _windows_index() -> Optional[Dict[str, Any]]:
+        try:
+            return artifact_cache.json(WINDOWS_INDEX_PATH)
+        except FileNotFoundError:
+            return None
+
+    def _preview_from_recording(self, window_id: int) -> Optional[Dict[str, Any]]:
+        """windows_index의 윈도우 중간 프레임을 녹화 파일에서 직접 읽음 (windows_preview.json과 같은 프레임)"""
+        windows_index = self._windows_index()
+        if not windows_index:
+            return None
+        windows = windows_index.get('windows', [])
+        if not 0 <= window_id < len(windows):
+            return None
+        wrec = windows[window_id]
+        base = (wrec.get('file') or '').replace('.jsonl', '')
+        recordings = {f['name'][:-len('.jsonl')]: f['path'] for f in dataset_catalog.files(SEGMENT_JSONL_PATTERNS)}
+        path = recordings.get(base)
+        if path is None:
+            return None
+        frame = int(wrec.get('start', 0)) + int(windows_index.get('window', 32)) // 2
+        data, _, _, _ = dataset_index.read_range(path, frame, frame + 1)
+        line = next((ln for ln in data.splitlines() if ln.strip()), None)
+        if line is None:
+            return None
+        item = json.loads(line)
+        k = item.get('kpts') or item.get('keypoints')
+        k = (k + [[0.0, 0.0, 0.0]] * 17)[:17] if isinstance(k, list) and len(k) >= 17 else [[0.0, 0.0, 0.0]] * 17
+        return {'w': int(item.get('width', 0)), 'h': int(item.get('height', 0)), 'kpts': k}
+
+    def _preview_from_file(self, window_id: int) -> Optional[Dict[str, Any]]:
+        entry = newest_artifact(PREVIEW_PATTERNS)
+        if entry is None:
+            return None
+        previews = artifact_cache.json(entry['path']) or []
+        return previews[window_id] if 0 <= window_id < len(previews) else None
+
+    def preview(self, window_id: int) -> Dict[str, Any]:
+        """윈도우 하나의 미리보기 포즈 {w, h, kpts} (없으면 LookupError)"""
+        p = self._preview_from_recording(window_id)
+        if p is None:
+            p = self._preview_from_file(window_id)
+        if p is None:
+            raise LookupError(f"미리보기를 찾을 수 없습니다: {window_id}")
+        return p
+
+    def get_stats(self) -> Dict[str, Any]:
+        data = self._data
+        return {
+            'loaded': data is not None,
+            'points': int(data['unit'].shape[0]) if data is not None else 0,
+            'cached_levels': len(self._cache),
+            'cached_tiles': len(self._tile_cache),
+            'tile_builds': self.tile_builds,
+        }
+
+
+# 전역 임베딩 맵 (embeddings_router에서 사용)
+embedding_map = EmbeddingMap()
@@ -0,0 +1,150 @@
+"""
+윈도우 임베딩 k-NN 검색
+training/knn_index.py의 IVF 인덱스(runs/embeddings_index.npz)를 embeddings.npy와 함께 메모리에 올려 두고
+윈도우 ID 또는 포즈 클립으로 가까운 윈도우를 찾는다 (/embeddings/query).
+- 인덱스가 없거나 embeddings.npy와 맞지 않으면 knn_index.update_index로 갱신 (새 행만 삽입, 필요 시 재학습)
+- 임베딩/인덱스 파일이 바뀌면 다음 조회 때 다시 읽음
+- 포즈 클립은 녹화 JSONL과 같은 정규화 kpts 프레임 목록, live_matcher와 같은 인코더로 임베딩
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from artifact_cache import artifact_cache
+from training.knn_index import IVFIndex, index_path_for, row_fingerprint, update_index
+from training.window_dataset import center_and_scale, to_numpy_window
+from segment_frames import WINDOWS_INDEX_PATH
+from live_matcher import MATCH_CKPT_PATH, load_temporal_encoder
+
+EMBEDDINGS_PATH = 'training/runs/embeddings.npy'
+KNN_NPROBE = int(os.getenv("KNN_NPROBE", "8"))
+KNN_MAX_K = int(os.getenv("KNN_MAX_K", "100"))
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class EmbeddingSearch:
+    """인덱스/임베딩/윈도우 목록 캐시와 조회"""
+
+    def __init__(self, embeddings_path: str = EMBEDDINGS_PATH):
+        self.embeddings_path = embeddings_path
+        self.index_path = index_path_for(embeddings_path)
+        self._lock = threading.Lock()
+        self._key = None
+        self._index: Optional[IVFIndex] = None
+        self._windows: List[Dict[str, Any]] = []
+        self._window_size = 32
+        self._encoder = None
+        self._encoder_key = None
+        self.queries = 0
+        self.last_query_ms: Optional[float] = None
+
+    def _ensure(self) -> IVFIndex:
+        """파일이 바뀌었으면 인덱스를 다시 연다 (임베딩 파일이 없으면 LookupError)"""
+        key = (_mtime(self.embeddings_path), _mtime(self.index_path), _mtime(WINDOWS_INDEX_PATH))
+        if key[0] is None:
+            raise LookupError("임베딩 파일이 없습니다")
+        if key == self._key and self._index is not None:
+            return self._index
+
+        E = artifact_cache.npy(self.embeddings_path)
+        index = None
+        if key[1] is not None:
+            try:
+                index = IVFIndex.load(self.index_path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ k-NN 인덱스 읽기 실패: {e}")
+        if index is None or index.size != E.shape[0] or index.meta.get('fingerprint') != row_fingerprint(E, index.size):
+            # 인덱스가 없거나 임베딩보다 뒤처짐 -> 갱신 후 저장
+            print("🔧 k-NN 인덱스 갱신 중...")
+            index = update_index(self.embeddings_path, self.index_path)
+        index.attach(E)
+
+        windows, window_size = [], 32
+        if key[2] is not None:
+            try:
+                data = artifact_cache.json(WINDOWS_INDEX_PATH)
+                windows = data.get('windows', [])
+                window_size = int(data.get('window', 32))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ windows_index 읽기 실패: {e}")
+
+        # 갱신으로 인덱스 파일 mtime이 바뀌었을 수 있으므로 키를 다시 잼
+        self._key = (key[0], _mtime(self.index_path), key[2])
+        self._index, self._windows, self._window_size = index, windows, window_size
+        return index
+
+    def _encode_clip(self, frames: List[Dict[str, Any]]) -> np.ndarray:
+        """정규화 kpts 프레임 목록 -> 임베딩 (마지막 window 프레임 사용, 짧으면 0 프레임으로 채움)"""
+        import torch
+
+        key = _mtime(MATCH_CKPT_PATH)
+        if key is None:
+            raise LookupError("모델 체크포인트가 없습니다")
+        if key != self._encoder_key:
+            self._encoder = load_temporal_encoder(MATCH_CKPT_PATH)
+            self._encoder_key = key
+        T = self._window_size
+        arr = to_numpy_window(frames, max(0, len(frames) - T), T)
+        if arr.shape[0] < T:
+            arr = np.concatenate([arr, np.zeros((T - arr.shape[0], 17, 3), dtype=np.float32)])
+        x = torch.from_numpy(center_and_scale(arr)).permute(2, 1, 0).unsqueeze(0).contiguous()  # (1, C, J, T)
+        with torch.inference_mode():
+            return self._encoder(x).float().numpy()[0]
+
+    def query(self, window_id: Optional[int] = None, frames: Optional[List[Dict[str, Any]]] = None,
+              k: int = 10, nprobe: int = KNN_NPROBE) -> Dict[str, Any]:
+        """
+        window_id 또는 frames로 k개 최근접 윈도우 조회
+        (잘못된 window_id는 IndexError, 파일 없음은 LookupError)
+        """
+        t0 = time.perf_counter()
+        k = max(1, min(int(k), KNN_MAX_K))
+        with self._lock:
+            index = self._ensure()
+            if window_id is not None:
+                if not 0 <= window_id < index.size:
+                    raise IndexError(f"window_id 범위 초과: {window_id} (0..{index.size - 1})")
+                q = np.asarray(artifact_cache.npy(self.embeddings_path)[window_id], dtype=np.float32)
+                ids, dist = index.search(q, k, nprobe, exclude=window_id)
+            else:
+                ids, dist = index.search(self._encode_clip(frames or []), k, nprobe)
+            windows = self._windows
+
+        neighbors = []
+        for i, d in zip(ids.tolist(), dist.tolist()):
+            item = {'window_id': int(i), 'distance': round(float(d), 6)}
+            if i < len(windows):
+                item['file'] = windows[i].get('file')
+                item['start'] = windows[i].get('start')
+            neighbors.append(item)
+        self.queries += 1
+        self.last_query_ms = (time.perf_counter() - t0) * 1000.0
+        return {
+            'neighbors': neighbors,
+            'took_ms': round(self.last_query_ms, 3),
+            'index': {'size': index.size, 'nlist': index.nlist, 'nprobe': min(nprobe, index.nlist)},
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        index = self._index
+        return {
+            'loaded': index is not None,
+            'size': index.size if index is not None else 0,
+            'nlist': index.nlist if index is not None else 0,
+            'queries': self.queries,
+            'last_query_ms': round(self.last_query_ms, 3) if self.last_query_ms is not None else None,
+        }
+
+
+# 전역 임베딩 검색기 (embeddings_router에서 사용)
+embedding_search = EmbeddingSearch()
@@ -1,9 +1,12 @@
-import os
-import glob
-import json
+import asyncio
 from aiohttp import web
 from aiohttp.web import FileResponse
 
+from http_stream import JsonFileString, file_etag, not_modified, stream_json
+from dataset_catalog import dataset_catalog
+from embedding_search import KNN_NPROBE, embedding_search
+from embedding_map import EMBEDDING_SEGMENTS_PATH, EMBEDDINGS_2D_PATTERNS, PREVIEW_PATTERNS, TILE_GRID, embedding_map
+
 async def embeddings_page_handler(request):
     """Embeddings 페이지 제공"""
     return FileResponse('static/embeddings.html')
@@ -15,105 +18,216 @@ async def auto_load_files_handler(request):
         auto_files = {}
         
         # 1. embeddings_2d.npy file (from training/runs/simclr/)
-        embeddings_patterns = [
-            'training/runs/simclr/embeddings_2d.npy',
-            'training/runs/embeddings_2d.npy',
-            'embeddings_2d.npy'
-        ]
         embeddings_files = []
-        for pattern in embeddings_patterns:
-            if os.path.exists(pattern):
-                stat = os.stat(pattern)
-                embeddings_files.append({
-                    'path': pattern,
-                    'name': 'embeddings_2d.npy',
-                    'size': stat.st_size,
-                    'modified': stat.st_mtime
-                })
+        for pattern in EMBEDDINGS_2D_PATTERNS:
+            entry = dataset_catalog.artifact(pattern)
+            if entry:
+                embeddings_files.append(entry)
         if embeddings_files:
             auto_files['embeddings'] = max(embeddings_files, key=lambda x: x['modified'])
         
         # 2. segments.json file (from training/runs/) - 전체 클러스터링 결과
-        segments_path = 'training/runs/segments.json'
-        if os.path.exists(segments_path):
-            stat = os.stat(segments_path)
-            auto_files['segments'] = {
-                'path': segments_path,
-                'name': 'segments.json',
-                'size': stat.st_size,
-                'modified': stat.st_mtime
-            }
+        segments = dataset_catalog.artifact(EMBEDDING_SEGMENTS_PATH)
+        if segments:
+            auto_files['segments'] = segments
         
         # 3. windows_preview.json file (from training/runs/simclr/)
-        preview_patterns = [
-            'training/runs/simclr/windows_preview.json',
-            'training/runs/windows_preview.json'
-        ]
         preview_files = []
-        for pattern in preview_patterns:
-            if os.path.exists(pattern):
-                stat = os.stat(pattern)
-                preview_files.append({
-                    'path': pattern,
-                    'name': 'windows_preview.json',
-                    'size': stat.st_size,
-                    'modified': stat.st_mtime
-                })
+        for pattern in PREVIEW_PATTERNS:
+            entry = dataset_catalog.artifact(pattern)
+            if entry:
+                preview_files.append(entry)
         if preview_files:
             auto_files['preview'] = max(preview_files, key=lambda x: x['modified'])
         
+        # Stream file contents in chunks instead of reading them whole (same JSON shape)
         loaded_data = {}
         
-        # Load embeddings file content (binary)
+        # embeddings: binary -> hex string for JSON
         if 'embeddings' in auto_files:
-            embeddings_path = auto_files['embeddings']['path']
-            try:
-                with open(embeddings_path, 'rb') as f:
-                    content = f.read()
-                loaded_data['embeddings'] = {
-                    'content': content.hex(),  # Convert binary to hex string for JSON
-                    'info': auto_files['embeddings']
-                }
-            except Exception as e:
-                print(f"❌ Embeddings 파일 로드 오류: {e}")
-        
-        # Load segments file content
-        if 'segments' in auto_files:
-            segments_path = auto_files['segments']['path']
-            try:
-                with open(segments_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                loaded_data['segments'] = {
-                    'content': content,
-                    'info': auto_files['segments']
-                }
-            except Exception as e:
-                print(f"❌ Segments 파일 로드 오류: {e}")
+            loaded_data['embeddings'] = {
+                'content': JsonFileString(auto_files['embeddings']['path'], mode='hex'),
+                'info': auto_files['embeddings']
+            }
         
-        # Load preview file content
-        if 'preview' in auto_files:
-            preview_path = auto_files['preview']['path']
-            try:
-                with open(preview_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                loaded_data['preview'] = {
-                    'content': content,
-                    'info': auto_files['preview']
+        for key in ('segments', 'preview'):
+            if key in auto_files:
+                loaded_data[key] = {
+                    'content': JsonFileString(auto_files[key]['path']),
+                    'info': auto_files[key]
                 }
-            except Exception as e:
-                print(f"❌ Preview 파일 로드 오류: {e}")
         
-        return web.json_response({
+        paths = [auto_files[k]['path'] for k in ('embeddings', 'segments', 'preview') if k in auto_files]
+        return await stream_json(request, {
             'status': 'ok',
             'loaded_files': loaded_data,
             'found': list(loaded_data.keys())
-        })
+        }, etag=file_etag(paths, extra='embeddings-auto-load'))
         
     except Exception as e:
         print(f"❌ 자동 파일 로드 오류: {e}")
         return web.json_response({"error": str(e)}, status=500)
 
+async def embeddings_points_handler(request):
+    """
+    2D 임베딩 좌표 바이너리 (embedding_map 형식)
+    ?grid=900: grid x grid 칸마다 라벨별 한 점만 (0이면 전체), &format=f16|f32
+    """
+    try:
+        try:
+            grid = int(request.query.get('grid', '0'))
+        except ValueError:
+            return web.json_response({"error": "잘못된 grid 값입니다"}, status=400)
+        fmt = request.query.get('format', 'f16')
+        paths = embedding_map.source_paths()
+        if not paths:
+            return web.json_response({"error": "embeddings_2d.npy 파일이 없습니다"}, status=404)
+        etag = file_etag(paths, extra=f'points:{grid}:{fmt}')
+        if not_modified(request, etag):
+            return web.Response(status=304, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
+        loop = asyncio.get_running_loop()
+        body, total, count = await loop.run_in_executor(None, embedding_map.encode, grid, fmt)
+        return web.Response(
+            body=body,
+            content_type='application/octet-stream',
+            headers={'ETag': etag, 'Cache-Control': 'no-cache', 'X-Point-Total': str(total), 'X-Point-Count': str(count)}
+        )
+    except LookupError as e:
+        return web.json_response({"error": str(e)}, status=404)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    except Exception as e:
+        print(f"❌ 임베딩 좌표 조회 오류: {e}")
+        return web.json_response({"error": str(e)}, status=500)
+
+async def embeddings_tiles_info_handler(request):
+    """타일 피라미드 메타 (전체 점 수, 최대 줌, 타일 격자, 라벨 개수)"""
+    try:
+        loop = asyncio.get_running_loop()
+        info = await loop.run_in_executor(None, embedding_map.tiles_info)
+        return web.json_response(info, headers={'Cache-Control': 'no-cache'})
+    except LookupError as e:
+        return web.json_response({"error": str(e)}, status=404)
+    except Exception as e:
+        print(f"❌ 임베딩 타일 정보 조회 오류: {e}")
+        return web.json_response({"error": str(e)}, status=500)
+
+async def embeddings_tile_handler(request):
+    """
+    타일 하나의 점 (embedding_map 형식, 타일 안에서 격자 솎기)
+    /embeddings/tiles/{z}/{x}/{y}?grid=128&format=f16&points=0 (points=0이면 클러스터 집계만)
+    """
+    try:
+        z = int(request.match_info['z'])
+        x = int(request.match_info['x'])
+        y = int(request.match_info['y'])
+        grid = int(request.query.get('grid', TILE_GRID))
+    except ValueError:
+        return web.json_response({"error": "잘못된 타일 좌표입니다"}, status=400)
+    fmt = request.query.get('format', 'f16')
+    points = request.query.get('points', '1') != '0'
+    try:
+        paths = embedding_map.source_paths()
+        if not paths:
+            return web.json_response({"error": "embeddings_2d.npy 파일이 없습니다"}, status=404)
+        etag = file_etag(paths, extra=f'tile:{z}:{x}:{y}:{grid}:{fmt}:{int(points)}')
+        if not_modified(request, etag):
+            return web.Response(status=304, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
+        loop = asyncio.get_running_loop()
+        body, total, count = await loop.run_in_executor(None, embedding_map.tile, z, x, y, grid, fmt, points)
+        return web.Response(
+            body=body,
+            content_type='application/octet-stream',
+            headers={'ETag': etag, 'Cache-Control': 'no-cache', 'X-Point-Total': str(total), 'X-Point-Count': str(count)}
+        )
+    except LookupError as e:
+        return web.json_response({"error": str(e)}, status=404)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    except Exception as e:
+        print(f"❌ 임베딩 타일 조회 오류: {e}")
+        return web.json_response({"error": str(e)}, status=500)
+
+async def embeddings_preview_handler(request):
+    """윈도우 하나의 미리보기 포즈 (?id=123 -> {w, h, kpts})"""
+    try:
+        window_id = int(request.query.get('id', ''))
+    except ValueError:
+        return web.json_response({"error": "윈도우 ID가 필요합니다"}, status=400)
+    try:
+        loop = asyncio.get_running_loop()
+        preview = await loop.run_in_executor(None, embedding_map.preview, window_id)
+        return web.json_response(preview, headers={'Cache-Control': 'max-age=60'})
+    except LookupError as e:
+        return web.json_response({"error": str(e)}, status=404)
+    except Exception as e:
+        print(f"❌ 미리보기 조회 오류: {e}")
+        return web.json_response({"error": str(e)}, status=500)
+
+def _valid_clip_frame(frame) -> bool:
+    """포즈 클립 프레임 검증: {"kpts": [[x, y, score] x 17]} (숫자만)"""
+    if not isinstance(frame, dict):
+        return False
+    kpts = frame.get('kpts')
+    if not isinstance(kpts, list) or len(kpts) != 17:
+        return False
+    for p in kpts:
+        if not isinstance(p, (list, tuple)) or len(p) != 3:
+            return False
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in p):
+            return False
+    return True
+
+
+async def embeddings_query_handler(request):
+    """
+    윈도우 임베딩 k-NN 조회
+    GET  ?window_id=123&k=10&nprobe=8
+    POST {"window_id": 123} 또는 {"frames": [{"kpts": [[x, y, score] x 17]}, ...]} (+ k, nprobe)
+    """
+    try:
+        params = dict(request.query)
+        if request.method == 'POST':
+            body = await request.json()
+            if not isinstance(body, dict):
+                return web.json_response({"error": "JSON 객체가 필요합니다"}, status=400)
+            params.update(body)
+        window_id = params.get('window_id')
+        frames = params.get('frames')
+        k = int(params.get('k', 10))
+        nprobe = int(params.get('nprobe', KNN_NPROBE))
+        if window_id is not None:
+            window_id = int(window_id)
+        elif not isinstance(frames, list) or not frames:
+            return web.json_response({"error": "window_id 또는 frames가 필요합니다"}, status=400)
+        else:
+            bad = next((i for i, f in enumerate(frames) if not _valid_clip_frame(f)), None)
+            if bad is not None:
+                return web.json_response({"error": f"frames[{bad}]는 kpts가 17x3 숫자 리스트인 객체여야 합니다"}, status=400)
+    except (ValueError, TypeError) as e:
+        return web.json_response({"error": f"잘못된 파라미터: {e}"}, status=400)
+
+    try:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, lambda: embedding_search.query(window_id, frames, k, nprobe))
+        return web.json_response(result)
+    except IndexError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    except LookupError as e:
+        return web.json_response({"error": str(e)}, status=404)
+    except Exception as e:
+        print(f"❌ 임베딩 조회 오류: {e}")
+        return web.json_response({"error": str(e)}, status=500)
+
 def setup_embeddings_routes(app):
     """Embeddings 관련 라우트들을 앱에 등록"""
     app.router.add_get('/embeddings', embeddings_page_handler)
     app.router.add_get('/embeddings/auto-load', auto_load_files_handler)
+    app.router.add_get('/embeddings/points', embeddings_points_handler)
+    app.router.add_get('/embeddings/tiles', embeddings_tiles_info_handler)
+    app.router.add_get('/embeddings/tiles/{z}/{x}/{y}', embeddings_tile_handler)
+    app.router.add_get('/embeddings/preview', embeddings_preview_handler)
+    app.router.add_get('/embeddings/query', embeddings_query_handler)
+    app.router.add_post('/embeddings/query', embeddings_query_handler)
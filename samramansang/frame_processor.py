@@ -4,23 +4,93 @@ import cv2
 import os
 
 from shared_state import SharedState
+from cpu_tuning import CPU_AFFINITY_CAPTURE, pin_current_thread
 
 SENSOR_ID = int(os.getenv("SENSOR_ID", "0"))
 SENSOR_MODE = int(os.getenv("SENSOR_MODE", "2"))
 STREAM_SIZE = os.getenv("STREAM_SIZE", "1280x720")
 WIDTH, HEIGHT = map(int, STREAM_SIZE.lower().split("x"))
 FLIP_METHOD = int(os.getenv("FLIP_METHOD", "0"))
+# 캡처 단계 축소 옵션 (긴 변 기준 픽셀, 0 = 축소하지 않음)
+INFER_MAX_SIDE = int(os.getenv("INFER_MAX_SIDE", "640"))      # 추론용 프레임
+DISPLAY_MAX_SIDE = int(os.getenv("DISPLAY_MAX_SIDE", "0"))    # 전송(JPEG)용 프레임
+
+
+def fit_size(width, height, max_side):
+    """긴 변이 max_side 이하가 되도록 비율을 유지한 (w, h) 반환 (짝수로 맞춤)"""
+    if not max_side or max_side <= 0 or max(width, height) <= max_side:
+        return width, height
+    scale = float(max_side) / float(max(width, height))
+    w = max(2, int(round(width * scale)) // 2 * 2)
+    h = max(2, int(round(height * scale)) // 2 * 2)
+    return w, h
+
+
+# 전송용 해상도는 nvvidconv(하드웨어)에서 바로 맞춰서 CPU videoconvert가 작은 프레임만 처리하도록 함
+PIPE_WIDTH, PIPE_HEIGHT = fit_size(WIDTH, HEIGHT, DISPLAY_MAX_SIDE)
 
 GST = (
     f"nvarguscamerasrc sensor-id={SENSOR_ID} sensor-mode={SENSOR_MODE} ! "
     "video/x-raw(memory:NVMM), framerate=30/1, format=NV12 ! "
-    f"nvvidconv flip-method={FLIP_METHOD} ! video/x-raw, format=BGRx, width={WIDTH}, height={HEIGHT} ! "
+    f"nvvidconv flip-method={FLIP_METHOD} ! video/x-raw, format=BGRx, width={PIPE_WIDTH}, height={PIPE_HEIGHT} ! "
     "videoconvert ! video/x-raw, format=BGR ! "
     "appsink drop=true max-buffers=1 sync=false"
 )
 
-def start_capture_thread(state: SharedState):
+
+def v4l2_pipeline(device, width=640, height=480):
+    """V4L2 소스 파이프라인 (DISPLAY_MAX_SIDE가 작으면 videoscale로 YUY2 단계에서 축소)"""
+    out_w, out_h = fit_size(width, height, DISPLAY_MAX_SIDE)
+    scale = f"videoscale ! video/x-raw, width={out_w}, height={out_h} ! " if (out_w, out_h) != (width, height) else ""
+    return (
+        f"v4l2src device={device} ! video/x-raw, format=YUY2, width={width}, height={height} ! "
+        f"{scale}videoconvert ! video/x-raw, format=BGR ! appsink"
+    )
+
+
+class FrameScaler:
+    """
+    캡처 스레드에서 한 번에 추론용/전송용 프레임을 만들어 SharedState에 넣기 위한 헬퍼.
+    파이프라인에서 이미 원하는 크기로 나온 경우 복사 없이 같은 배열을 그대로 사용한다.
+    """
+
+    def __init__(self, infer_max_side=INFER_MAX_SIDE, display_max_side=DISPLAY_MAX_SIDE):
+        self.infer_max_side = infer_max_side
+        self.display_max_side = display_max_side
+        self._sizes = {}  # (h, w) -> ((infer_w, infer_h), (display_w, display_h))
+
+    def _targets(self, h, w):
+        key = (h, w)
+        if key not in self._sizes:
+            self._sizes[key] = (
+                fit_size(w, h, self.infer_max_side),
+                fit_size(w, h, self.display_max_side),
+            )
+        return self._sizes[key]
+
+    @staticmethod
+    def _resize(frame, size):
+        h, w = frame.shape[:2]
+        if size == (w, h):
+            return frame
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    def __call__(self, frame):
+        """frame -> (infer_frame, display_frame)"""
+        h, w = frame.shape[:2]
+        infer_size, display_size = self._targets(h, w)
+        display_frame = self._resize(frame, display_size)
+        # 전송용 프레임이 이미 축소되었다면 거기서 한 번 더 줄이는 편이 저렴함
+        src = display_frame if display_size[0] >= infer_size[0] else frame
+        infer_frame = self._resize(src, infer_size)
+        return infer_frame, display_frame
+
+
+def start_capture_thread(state: SharedState, scaler: FrameScaler = None):
+    scaler = scaler or FrameScaler()
+
     def _loop():
+        pin_current_thread(CPU_AFFINITY_CAPTURE, 'capture')
         cap = None
         camera_initialized = False
         
@@ -29,8 +99,8 @@ def start_capture_thread(state: SharedState):
             # CSI 카메라 (NVIDIA Jetson)
             GST,
             # V4L2 소스들 (Linux)
-            "v4l2src device=/dev/video0 ! video/x-raw, format=YUY2, width=640, height=480 ! videoconvert ! video/x-raw, format=BGR ! appsink",
-            "v4l2src device=/dev/video1 ! video/x-raw, format=YUY2, width=640, height=480 ! videoconvert ! video/x-raw, format=BGR ! appsink",
+            v4l2_pipeline("/dev/video0"),
+            v4l2_pipeline("/dev/video1"),
             # macOS 전용: AVFoundation 백엔드 장치 0/1
             (0, 'avfoundation'),
             (1, 'avfoundation'),
@@ -111,8 +181,9 @@ def start_capture_thread(state: SharedState):
             print("⚠️ 모든 카메라 소스 실패. 더미 프레임으로 대체합니다.")
             # 더미 프레임 생성
             dummy_frame = create_dummy_frame()
+            dummy_infer, dummy_display = scaler(dummy_frame)
             while not state.stop:
-                state.update_frame(dummy_frame)
+                state.update_frame(dummy_frame, dummy_infer, dummy_display)
                 time.sleep(1.0/30.0)  # 30 FPS
             return
         
@@ -122,8 +193,9 @@ def start_capture_thread(state: SharedState):
                 if not ok:
                     time.sleep(0.005)
                     continue
-                # 여기서 바로 최신 프레임만 갱신
-                state.update_frame(frame)
+                # 추론용/전송용 프레임을 함께 만들어 최신 프레임만 갱신
+                infer_frame, display_frame = scaler(frame)
+                state.update_frame(frame, infer_frame, display_frame)
         finally:
             if cap:
                 cap.release()
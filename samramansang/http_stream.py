@@ -0,0 +1,235 @@
+"""
+대용량 파일 스트리밍 응답 유틸리티
+파일을 통째로 읽지 않고 executor에서 청크 단위로 읽어 chunked 전송한다.
+- Accept-Encoding에 따라 brotli(설치된 경우)/gzip 압축
+- 파일 크기/수정 시각 기반 ETag, If-None-Match가 일치하면 304 (변경 없는 파일은 재전송하지 않음)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+
+from aiohttp import web
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # 선택 의존성
+    brotli = None
+
+CHUNK_SIZE = int(os.getenv("HTTP_STREAM_CHUNK", str(256 * 1024)))
+GZIP_LEVEL = int(os.getenv("HTTP_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("HTTP_BROTLI_QUALITY", "5"))
+
+
+def file_etag(paths: Iterable[str], extra: str = "") -> str:
+    """파일 목록의 (경로, 크기, mtime)으로 만든 약한 ETag (존재하지 않는 파일은 건너뜀)"""
+    h = hashlib.sha1(extra.encode("utf-8"))
+    for p in paths:
+        try:
+            st = os.stat(p)
+        except OSError:
+            continue
+        h.update(f"{p}:{st.st_size}:{st.st_mtime_ns};".encode("utf-8"))
+    return f'W/"{h.hexdigest()[:20]}"'
+
+
+def not_modified(request: web.Request, etag: str) -> bool:
+    """If-None-Match 헤더가 현재 ETag와 일치하는지 확인"""
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or etag.replace('W/', '', 1) in tags
+
+
+def negotiate_encoding(request: web.Request) -> Optional[str]:
+    """Accept-Encoding에서 사용할 압축 방식 선택 ('br' > 'gzip' > 없음)"""
+    accepted = {}
+    for part in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.lower()] = q
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class _Encoder:
+    """스트리밍 압축기 (encoding이 None이면 그대로 통과)"""
+
+    def __init__(self, encoding: Optional[str]):
+        self.encoding = encoding
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+        elif encoding == "gzip":
+            self._c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        else:
+            self._c = None
+
+    def compress(self, data: bytes) -> bytes:
+        if self._c is None or not data:
+            return data
+        if self.encoding == "br":
+            return self._c.process(data)
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        if self._c is None:
+            return b""
+        return self._c.finish() if self.encoding == "br" else self._c.flush()
+
+
+class JsonFileString:
+    """
+    stream_json()에서 JSON 문자열 값으로 스트리밍할 파일 내용
+    mode='text': UTF-8 텍스트를 JSON 이스케이프, mode='hex': 바이너리를 hex 문자열로
+    여러 파일이면 separator로 이어붙인다 (읽기 실패한 파일은 건너뜀)
+    """
+
+    def __init__(self, paths, mode: str = "text", separator: str = "\n"):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.mode = mode
+        self.separator = separator
+
+    def iter_pieces(self, chunk_size: int):
+        """JSON 문자열 내부(따옴표 제외)에 들어갈 바이트 조각 생성"""
+        first = True
+        for path in self.paths:
+            try:
+                f = open(path, "rb") if self.mode == "hex" else open(path, "r", encoding="utf-8")
+            except OSError as e:
+                print(f"❌ 파일 스트리밍 오류 ({path}): {e}")
+                continue
+            with f:
+                if not first and self.separator:
+                    yield _escape(self.separator)
+                first = False
+                while True:
+                    data = f.read(chunk_size)
+                    if not data:
+                        break
+                    yield data.hex().encode("ascii") if self.mode == "hex" else _escape(data)
+
+
+def _escape(text: str) -> bytes:
+    return json.dumps(text, ensure_ascii=False)[1:-1].encode("utf-8")
+
+
+def _split_template(obj: Any) -> List[Any]:
+    """JsonFileString 자리를 토큰으로 바꿔 직렬화한 뒤 [bytes, JsonFileString, bytes, ...]로 분리"""
+    sources: Dict[str, JsonFileString] = {}
+
+    def replace(o):
+        if isinstance(o, JsonFileString):
+            token = f"\x00stream{len(sources)}\x00"
+            sources[token] = o
+            return token
+        if isinstance(o, dict):
+            return {k: replace(v) for k, v in o.items()}
+        if isinstance(o, (list, tuple)):
+            return [replace(v) for v in o]
+        return o
+
+    text = json.dumps(replace(obj), ensure_ascii=False)
+    parts: List[Any] = []
+    for token, source in sources.items():
+        quoted = json.dumps(token)
+        head, _, text = text.partition(quoted)
+        parts.append((head + '"').encode("utf-8"))
+        parts.append(source)
+        text = '"' + text
+    parts.append(text.encode("utf-8"))
+    return parts
+
+
+async def _prepare(request, etag, content_type, encoding, headers):
+    response = web.StreamResponse(status=200, headers=headers or {})
+    response.content_type = content_type
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"  # 매번 재검증 (변경 없으면 304)
+    response.headers["Vary"] = "Accept-Encoding"
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    return response
+
+
+async def _pump(response, iterator, encoder: _Encoder):
+    """동기 제너레이터를 executor에서 한 조각씩 읽고 압축해서 전송"""
+    loop = asyncio.get_running_loop()
+
+    def step():
+        # 압축 후 일정 크기가 모일 때까지 읽음 -> (데이터, 끝났는지)
+        buf = bytearray()
+        for piece in iterator:
+            buf += encoder.compress(piece)
+            if len(buf) >= CHUNK_SIZE // 4:
+                return bytes(buf), False
+        buf += encoder.flush()
+        return bytes(buf), True
+
+    finished = False
+    while not finished:
+        data, finished = await loop.run_in_executor(None, step)
+        if data:
+            await response.write(data)
+    await response.write_eof()
+    return response
+
+
+async def stream_files(
+    request: web.Request,
+    paths: List[str],
+    content_type: str = "application/octet-stream",
+    headers: Optional[Dict[str, str]] = None,
+    etag: Optional[str] = None,
+):
+    """여러 파일을 순서대로 이어서 스트리밍 (청크로 나뉜 녹화 등)"""
+    etag = etag or file_etag(paths)
+    if not_modified(request, etag):
+        return web.Response(status=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    encoding = negotiate_encoding(request)
+    response = await _prepare(request, etag, content_type, encoding, headers)
+
+    def pieces():
+        for p in paths:
+            with open(p, "rb") as f:
+                while True:
+                    data = f.read(CHUNK_SIZE)
+                    if not data:
+                        break
+                    yield data
+
+    return await _pump(response, pieces(), _Encoder(encoding))
+
+
+async def stream_json(request: web.Request, obj: Any, etag: str, headers: Optional[Dict[str, str]] = None):
+    """
+    JsonFileString 값을 포함한 객체를 JSON으로 스트리밍
+    (json_response와 같은 구조를 유지하면서 파일 내용은 메모리에 모으지 않음)
+    """
+    if not_modified(request, etag):
+        return web.Response(status=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    encoding = negotiate_encoding(request)
+    response = await _prepare(request, etag, "application/json", encoding, headers)
+
+    def pieces():
+        for part in _split_template(obj):
+            if isinstance(part, JsonFileString):
+                yield from part.iter_pieces(CHUNK_SIZE)
+            else:
+                yield part
+
+    return await _pump(response, pieces(), _Encoder(encoding))
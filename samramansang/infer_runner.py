@@ -1,8 +1,13 @@
 from ultralytics import YOLO
 from collections import deque
 import threading
+import time
 import os
 from shared_state import SharedState
+from cpu_tuning import (
+    CPU_AFFINITY_INFER, INFER_AUTOTUNE, INFER_AUTOTUNE_SECONDS,
+    apply_torch_threads, available_cpus, current_layout, pin_current_thread,
+)
 import torch
 
 MODEL_POSE = os.getenv("MODEL_POSE", "yolo11n-pose.pt")
@@ -12,15 +17,25 @@ POSE_MODE = os.getenv("POSE_MODE", "track").strip().lower()  # 'track' | 'predic
 TRACKER_CFG = os.getenv("TRACKER_CFG", "bytetrack.yaml")
 
 class InferRunner:
-    def __init__(self, state: SharedState, model_path=MODEL_POSE, imgsz=640, conf=CONF, mode: str = POSE_MODE, tracker_cfg: str = TRACKER_CFG):
+    def __init__(self, state: SharedState, model_path=MODEL_POSE, imgsz=640, conf=CONF, mode: str = POSE_MODE, tracker_cfg: str = TRACKER_CFG, autotune: bool = INFER_AUTOTUNE):
         self.state = state
+        # torch 스레드 수는 첫 연산 전에 적용 (inter-op은 이후 변경 불가)
+        apply_torch_threads()
         self.model = YOLO(model_path)
         self.imgsz = imgsz
         self.conf = conf
         self.mode = (mode or "track").strip().lower()
         self.tracker_cfg = tracker_cfg
-        self.results_q = deque(maxlen=2)  # 최신 결과만 유지
+        self.results_q = deque(maxlen=8)  # 최근 결과만 유지 (전송 루프가 틱 사이 결과를 놓치지 않을 만큼)
+        self.result_id = 0  # 결과마다 증가하는 ID (get_results_since 기준)
         self.thread = None
+        # 추론 지연 통계 (/metrics, 학습 거버너가 참고)
+        self.infer_count = 0
+        self.last_latency_ms = 0.0
+        self.latency_ms_ema = 0.0
+        self.last_result_time = None
+        self.autotune = autotune
+        self.thread_layout = None  # 실제 적용된 스레드 배치 (자동 튜닝 결과 포함)
         # 디바이스 자동 선택 (cuda -> mps -> cpu)
         if torch.cuda.is_available():
             self.device = 0  # ultralytics는 정수 인덱스 허용
@@ -29,43 +44,134 @@ class InferRunner:
         else:
             self.device = "cpu"
 
+    def _run_model(self, frame, track: bool):
+        # 선택 가능한 모드: 'track' 또는 'predict'
+        if track:
+            # 프레임 간 ID 유지를 위해 persist=True, ByteTrack 기본값 사용
+            return self.model.track(
+                source=frame,
+                device=self.device,
+                imgsz=self.imgsz,
+                conf=self.conf,
+                iou=0.5,
+                max_det=50,
+                tracker=self.tracker_cfg,
+                persist=True,
+                verbose=False
+            )
+        return self.model.predict(
+            source=frame,
+            device=self.device,
+            imgsz=self.imgsz,
+            conf=self.conf,
+            iou=0.5,
+            max_det=50,
+            verbose=False
+        )
+
+    def _autotune_threads(self, seconds: float = INFER_AUTOTUNE_SECONDS):
+        """더미 프레임으로 intra-op 스레드 수 후보를 돌려보고 지속 fps가 가장 높은 값을 선택"""
+        from frame_processor import FrameScaler, create_dummy_frame
+
+        frame, _ = FrameScaler()(create_dummy_frame())
+        n = available_cpus()  # 추론 스레드를 고정했다면 고정된 CPU 수
+        candidates = sorted({c for c in (n, n - 1, n // 2, 2, 1, torch.get_num_threads()) if 1 <= c <= n}, reverse=True)
+        print(f"🔧 추론 스레드 자동 튜닝 시작: 후보 {candidates} (각 {seconds:.1f}s)")
+
+        trials = []
+        for threads in candidates:
+            torch.set_num_threads(threads)
+            for _ in range(2):  # 워밍업
+                self._run_model(frame, track=False)
+            count = 0
+            t0 = time.perf_counter()
+            while time.perf_counter() - t0 < seconds and not self.state.stop:
+                self._run_model(frame, track=False)
+                count += 1
+            elapsed = time.perf_counter() - t0
+            fps = count / elapsed if elapsed > 0 else 0.0
+            trials.append({'torch_threads': threads, 'fps': round(fps, 2)})
+            print(f"   - torch_threads={threads}: {fps:.2f} fps")
+            if self.state.stop:
+                break
+
+        best = max(trials, key=lambda t: t['fps'])
+        torch.set_num_threads(best['torch_threads'])
+        print(f"✅ 자동 튜닝 결과: torch_threads={best['torch_threads']} ({best['fps']:.2f} fps)")
+        return trials
+
     def start(self):
         def _loop():
+            pin_current_thread(CPU_AFFINITY_INFER, 'infer')
+            apply_torch_threads(inter=0)  # OpenMP 스레드 수는 호출 스레드 기준이므로 추론 스레드에서 다시 적용
+            trials = None
+            if self.autotune:
+                if self.device == "cpu":
+                    try:
+                        trials = self._autotune_threads()
+                    except Exception as e:
+                        print(f"⚠️ 추론 스레드 자동 튜닝 실패: {e}")
+                else:
+                    print(f"ℹ️ 추론 디바이스가 {self.device}이므로 스레드 자동 튜닝 생략")
+            self.thread_layout = current_layout()
+            if trials is not None:
+                self.thread_layout['autotune'] = trials
+            print(f"🧵 추론 스레드 배치: {self.thread_layout}")
+
+            last_seq = None
             while not self.state.stop:
-                frame, seq = self.state.get_latest()
+                frame, seq, capture_ts = self.state.get_latest_infer_stamped()
                 if frame is None:
                     continue
+                if seq == last_seq:
+                    # 같은 프레임을 다시 추론하지 않음 (결과는 프레임당 하나)
+                    time.sleep(0.001)
+                    continue
+                last_seq = seq
 
-                # 선택 가능한 모드: 'track' 또는 'predict'
-                if self.mode == "track":
-                    # 프레임 간 ID 유지를 위해 persist=True, ByteTrack 기본값 사용
-                    r = self.model.track(
-                        source=frame,
-                        device=self.device,
-                        imgsz=self.imgsz,
-                        conf=self.conf,
-                        iou=0.5,
-                        max_det=50,
-                        tracker=self.tracker_cfg,
-                        persist=True,
-                        verbose=False
-                    )
-                else:
-                    r = self.model.predict(
-                        source=frame,
-                        device=self.device,
-                        imgsz=self.imgsz,
-                        conf=self.conf,
-                        iou=0.5,
-                        max_det=50,
-                        verbose=False
-                    )
-
-                self.results_q.append(r[0])
+                t0 = time.perf_counter()
+                r = self._run_model(frame, track=(self.mode == "track"))
+
+                result = r[0]
+                result.capture_ts = capture_ts  # 캡처 시각 (unix 초)
+                result.frame_seq = seq
+                self._publish(result)
+                self._record_latency((time.perf_counter() - t0) * 1000.0)
 
         self.thread = threading.Thread(target=_loop, daemon=True)
         self.thread.start()
 
+    def _publish(self, result):
+        self.result_id += 1
+        result.result_id = self.result_id
+        self.results_q.append(result)
+
+    def _record_latency(self, latency_ms: float):
+        self.infer_count += 1
+        self.last_latency_ms = latency_ms
+        self.latency_ms_ema = latency_ms if self.infer_count == 1 else 0.9 * self.latency_ms_ema + 0.1 * latency_ms
+        self.last_result_time = time.perf_counter()
+
+    def get_stats(self):
+        """추론 지연 통계 반환 (result_age_ms: 마지막 결과 이후 경과 시간)"""
+        age_ms = None
+        if self.last_result_time is not None:
+            age_ms = (time.perf_counter() - self.last_result_time) * 1000.0
+        return {
+            'device': str(self.device),
+            'infer_count': self.infer_count,
+            'last_latency_ms': round(self.last_latency_ms, 2),
+            'latency_ms_ema': round(self.latency_ms_ema, 2),
+            'infer_fps': round(1000.0 / self.latency_ms_ema, 2) if self.latency_ms_ema > 0 else 0.0,
+            'result_age_ms': round(age_ms, 1) if age_ms is not None else None,
+            'capture_seq': self.state.latest_seq,  # 캡처가 멈췄는지 판단용 (진행하지 않으면 result_age_ms는 의미 없음)
+            'thread_layout': self.thread_layout,
+        }
+
+    def get_results_since(self, last_id):
+        """last_id 이후에 나온 결과 목록 (오래된 순, 큐에 남아 있는 것만)"""
+        return [r for r in list(self.results_q) if r.result_id > last_id]
+
     def get_latest_result(self):
         try:
             # 가장 최신 결과를 제거하지 않고 반환 (멀티 소비자 안전)
@@ -0,0 +1,201 @@
+"""
+비동기 작업 관리자
+무거운 계산(최종 세그먼트 저장, 세그먼트 거리 계산 등)을 이벤트 루프 밖 스레드 풀에서 실행한다.
+- POST 핸들러는 작업을 등록하고 작업 ID를 바로 반환 (라이브 포즈 전송이 멈추지 않음)
+- 진행률/결과는 GET /jobs/{id}로 조회, POST /jobs/{id}/cancel로 취소
+- 같은 종류/같은 파라미터의 작업이 진행 중이면 새로 만들지 않고 그 작업을 돌려준다
+numpy 연산은 GIL을 놓고, 외부 스크립트는 Job.run_subprocess로 실행하므로 스레드 풀로 충분하다.
+"""
+
+import json
+import os
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "50"))
+
+ACTIVE_STATES = ('queued', 'running')
+
+
+class JobCancelled(Exception):
+    """작업 함수 안에서 취소 요청을 확인했을 때"""
+
+
+class Job:
+    """작업 하나의 상태 (작업 함수에 전달되어 진행률 보고/취소 확인에 사용)"""
+
+    def __init__(self, kind: str, params: Dict[str, Any], key: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.key = key
+        self.status = 'queued'
+        self.progress = 0.0
+        self.message = ''
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel = threading.Event()
+        self._proc: Optional[subprocess.Popen] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATES
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def update(self, progress: Optional[float] = None, message: Optional[str] = None):
+        """진행률(0~1)/메시지 갱신 - 취소 요청이 있으면 JobCancelled"""
+        if progress is not None:
+            self.progress = max(0.0, min(1.0, float(progress)))
+        if message is not None:
+            self.message = message
+        self.check_cancelled()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def cancel(self):
+        self._cancel.set()
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            try:
+                if os.name == 'posix':
+                    os.killpg(proc.pid, signal.SIGTERM)  # start_new_session으로 띄운 프로세스 그룹 전체
+                else:
+                    proc.terminate()
+            except (ProcessLookupError, PermissionError, OSError):
+                pass
+
+    def run_subprocess(self, cmd: List[str], **kwargs) -> Tuple[int, str, str]:
+        """외부 명령 실행 (취소 시 프로세스 그룹 종료) -> (returncode, stdout, stderr)"""
+        self.check_cancelled()
+        kwargs.setdefault('start_new_session', True)
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **kwargs)
+        self._proc = proc
+        try:
+            stdout, stderr = proc.communicate()
+        finally:
+            self._proc = None
+        self.check_cancelled()
+        return proc.returncode, stdout, stderr
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': round(self.progress, 4),
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobManager:
+    """작업 등록/중복 제거/실행/조회"""
+
+    def __init__(self, workers: int = JOB_WORKERS, history: int = JOB_HISTORY):
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.deduplicated = 0
+
+    @staticmethod
+    def _key(kind: str, params: Dict[str, Any]) -> str:
+        return kind + ':' + json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+
+    def submit(self, kind: str, params: Dict[str, Any], fn: Callable[[Job], Any]) -> Tuple[Job, bool]:
+        """
+        작업 등록 -> (Job, 새로 만들었는지)
+        fn(job)은 스레드 풀에서 실행되며 반환값이 job.result가 된다
+        """
+        key = self._key(kind, params)
+        with self._lock:
+            for job in self._jobs.values():
+                if job.key == key and job.active and not job.cancelled:
+                    self.deduplicated += 1
+                    return job, False
+            job = Job(kind, params, key)
+            self._jobs[job.id] = job
+            self.submitted += 1
+            self._prune()
+        self._executor.submit(self._run, job, fn)
+        return job, True
+
+    def _prune(self):
+        # 끝난 작업은 최근 history개만 보관
+        finished = [jid for jid, j in self._jobs.items() if not j.active]
+        for jid in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[jid]
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]):
+        if job.cancelled:
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+            return
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            job.result = fn(job)
+            job.progress = 1.0
+            job.status = 'done'
+        except JobCancelled:
+            job.status = 'cancelled'
+            print(f"🛑 작업 취소됨: {job.kind} ({job.id})")
+        except Exception as e:
+            job.status = 'cancelled' if job.cancelled else 'failed'
+            job.error = str(e)
+            if job.status == 'failed':
+                print(f"❌ 작업 실패: {job.kind} ({job.id}): {e}")
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is not None and job.active:
+            job.cancel()
+        return job
+
+    def list(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [j.to_dict() for j in list(self._jobs.values()) if kind is None or j.kind == kind]
+
+    def shutdown(self):
+        """진행 중인 작업 취소 후 풀 종료 (서버 종료 시)"""
+        for job in list(self._jobs.values()):
+            if job.active:
+                job.cancel()
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        jobs = list(self._jobs.values())
+        return {
+            'active': sum(1 for j in jobs if j.active),
+            'submitted': self.submitted,
+            'deduplicated': self.deduplicated,
+            'failed': sum(1 for j in jobs if j.status == 'failed'),
+        }
+
+
+# 전역 작업 관리자 (각 라우터에서 submit, jobs_router에서 조회/취소)
+job_manager = JobManager()
@@ -0,0 +1,46 @@
+"""
+Jobs 관련 라우터
+비동기 작업(job_manager) 진행 상황 조회와 취소 기능 제공
+"""
+
+from aiohttp import web
+
+from job_manager import job_manager
+
+
+def job_accepted_response(job, created: bool):
+    """작업 등록 응답 (202 + 작업 ID, 진행 중인 같은 작업이면 그 작업)"""
+    return web.json_response({
+        'status': 'accepted',
+        'job_id': job.id,
+        'deduplicated': not created,
+        'job': job.to_dict(),
+    }, status=202)
+
+
+async def jobs_list_handler(request):
+    """작업 목록 (?kind=로 종류 필터)"""
+    return web.json_response({'jobs': job_manager.list(request.query.get('kind')), 'stats': job_manager.get_stats()})
+
+
+async def job_status_handler(request):
+    """작업 상태/진행률/결과"""
+    job = job_manager.get(request.match_info['job_id'])
+    if job is None:
+        return web.json_response({"error": "작업을 찾을 수 없습니다"}, status=404)
+    return web.json_response(job.to_dict())
+
+
+async def job_cancel_handler(request):
+    """작업 취소 요청 (실행 중이면 다음 진행률 보고 시점 또는 서브프로세스 종료로 중단)"""
+    job = job_manager.cancel(request.match_info['job_id'])
+    if job is None:
+        return web.json_response({"error": "작업을 찾을 수 없습니다"}, status=404)
+    return web.json_response(job.to_dict())
+
+
+def setup_jobs_routes(app):
+    """Jobs 관련 라우트들을 앱에 등록"""
+    app.router.add_get('/jobs', jobs_list_handler)
+    app.router.add_get('/jobs/{job_id}', job_status_handler)
+    app.router.add_post('/jobs/{job_id}/cancel', job_cancel_handler)
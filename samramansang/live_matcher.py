@@ -0,0 +1,210 @@
+"""
+실시간 포즈 -> 세그먼트 매칭
+후처리된 라이브 키포인트로 최근 32프레임 윈도우를 유지하고, stride 프레임마다
+학습된 TemporalEncoder(runs/simclr/best.pt)로 임베딩해 segments_final 세그먼트 시작 임베딩(요약 표 segments_final_table.npz)과 비교한다.
+가장 가까운 세그먼트들을 /ws로 바로 푸시한다:
+  {"type": "segment_match", "source": "final", "matches": [{"segment_index", "distance"}], "capture_ts", "latency_ms"}
+- 전처리는 학습과 동일 (window_dataset.center_and_scale, validity_ok)
+- 인코딩/검색은 전용 스레드 하나(CPU)에서 실행, 이전 매칭이 끝나지 않았으면 이번 윈도우는 건너뜀
+- 체크포인트/세그먼트/요약 표 파일이 바뀌면 다음 매칭 때 다시 읽음 (표가 없을 때만 임베딩에서 계산)
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from artifact_cache import artifact_cache
+from pose_codec import as_pose_array, normalize_keypoints
+from training.segment_table import load_table, table_for, table_path_for
+from training.window_dataset import center_and_scale, validity_ok
+from websocket_manager import websocket_manager
+
+LIVE_MATCH_ENABLED = os.getenv("LIVE_MATCH_ENABLED", "1") == "1"
+LIVE_MATCH_WINDOW = int(os.getenv("LIVE_MATCH_WINDOW", "32"))
+LIVE_MATCH_STRIDE = int(os.getenv("LIVE_MATCH_STRIDE", "8"))
+LIVE_MATCH_TOP_K = int(os.getenv("LIVE_MATCH_TOP_K", "5"))
+
+MATCH_CKPT_PATH = 'training/runs/simclr/best.pt'
+MATCH_EMBEDDINGS_PATH = 'training/runs/embeddings.npy'
+MATCH_SEGMENTS_PATH = 'training/runs/segments_final.json'
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def load_temporal_encoder(ckpt_path: str):
+    """체크포인트에서 TemporalEncoder만 불러옴 (extract_embeddings.py와 같은 키 처리, CPU/eval)"""
+    import torch
+    from training.models.temporal_encoder import TemporalEncoder
+
+    ckpt = torch.load(ckpt_path, map_location='cpu')
+    enc = TemporalEncoder(in_channels=3, num_joints=17, hidden_dim=128, emb_dim=128)
+    state = ckpt.get('model', ckpt)
+    # MotionEncoder 체크포인트면 encoder.* 키만 사용
+    new_state = {}
+    for k, v in state.items():
+        if k.startswith('encoder.'):
+            new_state[k[len('encoder.'):]] = v
+        elif k.startswith('module.encoder.'):
+            new_state[k[len('module.encoder.'):]] = v
+        elif k in enc.state_dict():
+            new_state[k] = v
+    enc.load_state_dict(new_state, strict=False)
+    enc.eval()
+    return enc
+
+
+class LiveMatcher:
+    """라이브 윈도우 임베딩과 세그먼트 시작 임베딩 최근접 검색"""
+
+    def __init__(self, window: int = LIVE_MATCH_WINDOW, stride: int = LIVE_MATCH_STRIDE, top_k: int = LIVE_MATCH_TOP_K,
+                 enabled: bool = LIVE_MATCH_ENABLED):
+        self.window = window
+        self.stride = max(1, stride)
+        self.top_k = top_k
+        self.enabled = enabled
+        self._frames: deque = deque(maxlen=window)
+        self._since_last = 0
+        self._busy = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="live-match")
+
+        # 작업 스레드에서만 접근
+        self._encoder = None
+        self._encoder_key = None
+        self._starts: Optional[np.ndarray] = None  # (M, D) 정규화된 세그먼트 시작 임베딩
+        self._index_key = None
+
+        self.matches_sent = 0
+        self.skipped_busy = 0
+        self.skipped_invalid = 0
+        self.last_latency_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_matches: List[Dict[str, Any]] = []
+
+    # ------------------------------------------------------------------
+    # 결과 구독 (이벤트 루프)
+    # ------------------------------------------------------------------
+    def on_result(self, result):
+        """PoseWebSocketSender 결과 리스너: 프레임 추가, stride마다 매칭 예약"""
+        if not self.enabled:
+            return
+        self._frames.append(self._normalized(result))
+        self._since_last += 1
+        if len(self._frames) < self.window or self._since_last < self.stride:
+            return
+        self._since_last = 0
+        if not websocket_manager.connections:
+            return  # 받을 클라이언트가 없으면 계산하지 않음
+        if self._busy:
+            self.skipped_busy += 1
+            return
+        window = np.stack(self._frames)  # (T, 17, 3)
+        self._busy = True
+        asyncio.get_running_loop().create_task(self._match_and_push(window, getattr(result, 'capture_ts', None)))
+
+    @staticmethod
+    def _normalized(result) -> np.ndarray:
+        """결과의 첫 번째 사람 -> 정규화 (17, 3), 사람이 없으면 0 (학습 윈도우와 동일)"""
+        kpts = getattr(result, 'keypoints', None)
+        data = kpts.data if kpts is not None else None
+        if data is None or len(data) == 0:
+            return np.zeros((17, 3), dtype=np.float32)
+        pts = data[0].cpu().numpy()
+        h, w = int(result.orig_shape[0]), int(result.orig_shape[1])
+        return normalize_keypoints(as_pose_array(pts), w, h, np.float32)[0]
+
+    async def _match_and_push(self, window: np.ndarray, capture_ts: Optional[float]):
+        loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+        try:
+            matches = await loop.run_in_executor(self._executor, self._match, window)
+            if matches is None:
+                return
+            self.last_latency_ms = (time.perf_counter() - t0) * 1000.0
+            self.last_matches = matches
+            message = {
+                'type': 'segment_match',
+                'source': 'final',
+                'matches': matches,
+                'latency_ms': round(self.last_latency_ms, 2),
+                'ts': time.time(),
+            }
+            if capture_ts is not None:
+                message['capture_ts'] = capture_ts
+            await websocket_manager.broadcast(message)
+            self.matches_sent += 1
+        except Exception as e:
+            if str(e) != self.last_error:
+                print(f"⚠️ 라이브 세그먼트 매칭 오류: {e}")
+            self.last_error = str(e)
+        finally:
+            self._busy = False
+
+    # ------------------------------------------------------------------
+    # 인코딩/검색 (작업 스레드)
+    # ------------------------------------------------------------------
+    def _ensure_encoder(self) -> bool:
+        key = _mtime(MATCH_CKPT_PATH)
+        if key is None:
+            return False
+        if key != self._encoder_key:
+            self._encoder = load_temporal_encoder(MATCH_CKPT_PATH)
+            self._encoder_key = key
+            print(f"🧭 라이브 매칭 인코더 로드: {MATCH_CKPT_PATH}")
+        return True
+
+    def _ensure_index(self) -> bool:
+        key = (_mtime(MATCH_SEGMENTS_PATH), _mtime(table_path_for(MATCH_SEGMENTS_PATH)), _mtime(MATCH_EMBEDDINGS_PATH))
+        if key[0] is None or key[1:] == (None, None):
+            return False
+        if key != self._index_key:
+            data = artifact_cache.json(MATCH_SEGMENTS_PATH)
+            segments = data.get('segments', []) if isinstance(data, dict) else data
+            table = table_for(MATCH_SEGMENTS_PATH, segments, MATCH_EMBEDDINGS_PATH,
+                              load=lambda p: artifact_cache.get(p, 'segment_table', load_table))
+            self._starts = table['start_emb']  # 이미 L2 정규화됨
+            self._index_key = key
+        return self._starts is not None and len(self._starts) > 0
+
+    def _match(self, window: np.ndarray) -> Optional[List[Dict[str, Any]]]:
+        if not validity_ok(window):
+            self.skipped_invalid += 1
+            return None
+        if not self._ensure_encoder() or not self._ensure_index():
+            return None
+        import torch
+
+        x = torch.from_numpy(center_and_scale(window)).permute(2, 1, 0).unsqueeze(0).contiguous()  # (1, C, J, T)
+        with torch.inference_mode():
+            e = self._encoder(x).float().numpy()[0]
+        e /= (np.linalg.norm(e) + 1e-9)
+        dist = 1.0 - self._starts @ e
+        k = min(self.top_k, len(dist))
+        idx = np.argpartition(dist, k - 1)[:k]
+        idx = idx[np.argsort(dist[idx])]
+        return [{'segment_index': int(i), 'distance': round(float(dist[i]), 4)} for i in idx]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'window': self.window,
+            'stride': self.stride,
+            'matches_sent': self.matches_sent,
+            'skipped_busy': self.skipped_busy,
+            'skipped_invalid': self.skipped_invalid,
+            'last_latency_ms': round(self.last_latency_ms, 2) if self.last_latency_ms is not None else None,
+            'last_error': self.last_error,
+        }
+
+
+# 전역 라이브 매처 (app.py에서 PoseWebSocketSender 결과 리스너로 등록)
+live_matcher = LiveMatcher()
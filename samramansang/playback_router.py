@@ -4,11 +4,21 @@ Playback 관련 라우터
 """
 
 import os
-import glob
 import json
+import asyncio
 from aiohttp import web
 from aiohttp.web import FileResponse
 
+from training.window_dataset import recording_chunk_paths
+from dataset_index import dataset_index
+from dataset_catalog import DATASET_PATTERNS, dataset_catalog
+from http_stream import stream_files
+from playback_session import PlaybackSession
+from recording_summary import load_summary, thumbnail_path
+
+# 구간 조회 한 번에 반환할 최대 프레임 수
+MAX_RANGE_FRAMES = 20000
+
 
 async def playback_page_handler(request):
     """Playback 페이지 제공"""
@@ -17,27 +27,8 @@ async def playback_page_handler(request):
 async def dataset_files_handler(request):
     """데이터셋 파일 목록 조회"""
     try:
-        # 여러 경로에서 JSONL 파일 검색
-        search_paths = [
-            'dataset/raw/*.jsonl',
-            'training/dataset/raw/*.jsonl',
-            'dataset/*.jsonl',
-            'training/dataset/*.jsonl'
-        ]
-        
-        all_files = []
-        for pattern in search_paths:
-            files = glob.glob(pattern)
-            for file_path in files:
-                if os.path.exists(file_path):
-                    stat = os.stat(file_path)
-                    all_files.append({
-                        'path': file_path,
-                        'name': os.path.basename(file_path),
-                        'size': stat.st_size,
-                        'modified': stat.st_mtime,
-                        'relative_path': file_path
-                    })
+        # 카탈로그 스냅샷에서 조회 (디렉토리 스캔은 백그라운드 폴링이 담당)
+        all_files = dataset_catalog.files(DATASET_PATTERNS)
         
         # 중복 제거 (같은 파일명이 여러 경로에 있을 수 있음)
         unique_files = {}
@@ -67,25 +58,23 @@ async def dataset_file_handler(request):
         if not file_path:
             return web.json_response({"error": "파일 경로가 필요합니다"}, status=400)
         
-        # 보안을 위해 경로 검증
-        if not os.path.exists(file_path):
+        # 카탈로그에 있는 데이터셋 파일만 허용 (구간 조회는 인덱스 사이드카를 만들므로 임의 경로 금지)
+        if dataset_catalog.entry(file_path) is None or not os.path.exists(file_path):
             return web.json_response({"error": "파일을 찾을 수 없습니다"}, status=404)
         
+        # 구간 조회 (?start=&end=): 인덱스로 seek해서 요청한 프레임만 반환
+        if 'start' in request.query or 'end' in request.query:
+            return await _dataset_range_response(request, file_path)
+        
         # JSONL 파일인지 확인
         if not file_path.endswith('.jsonl'):
             return web.json_response({"error": "JSONL 파일만 지원됩니다"}, status=400)
         
-        # 파일 크기 제한 (10MB)
-        file_size = os.path.getsize(file_path)
-        if file_size > 10 * 1024 * 1024:
-            return web.json_response({"error": "파일이 너무 큽니다 (10MB 제한)"}, status=413)
-        
-        # 파일 내용 읽기
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        return web.Response(
-            text=content,
+        # 청크로 나뉜 녹화는 모든 청크를 이어서 스트리밍 (변경 없으면 304)
+        chunks = recording_chunk_paths(file_path)
+        return await stream_files(
+            request,
+            chunks,
             content_type='application/jsonl',
             headers={
                 'Content-Disposition': f'attachment; filename="{os.path.basename(file_path)}"'
@@ -97,60 +86,59 @@ async def dataset_file_handler(request):
         return web.json_response({"error": str(e)}, status=500)
 
 
+async def _dataset_range_response(request, file_path):
+    """[start, end) 프레임 구간을 JSONL로 반환"""
+    if not (file_path.endswith('.jsonl') or file_path.endswith('.parquet')):
+        return web.json_response({"error": "JSONL/Parquet 파일만 지원됩니다"}, status=400)
+    try:
+        start = int(request.query.get('start', 0))
+        end = int(request.query.get('end', start + MAX_RANGE_FRAMES))
+    except ValueError:
+        return web.json_response({"error": "start/end는 정수여야 합니다"}, status=400)
+    if start < 0 or end < start:
+        return web.json_response({"error": "잘못된 구간입니다"}, status=400)
+    end = min(end, start + MAX_RANGE_FRAMES)
+    
+    loop = asyncio.get_running_loop()
+    data, start, end, total = await loop.run_in_executor(None, dataset_index.read_range, file_path, start, end)
+    return web.Response(
+        body=data,
+        content_type='application/jsonl',
+        headers={
+            'X-Frame-Count': str(total),
+            'X-Range-Start': str(start),
+            'X-Range-End': str(end),
+        }
+    )
+
+
 async def dataset_file_info_handler(request):
-    """데이터셋 파일 정보 조회 (프레임 수, 메타데이터 등)"""
+    """데이터셋 파일 정보 조회 (프레임 수, 메타데이터 등) - 인덱스 요약 정보로 응답"""
     try:
         file_path = request.query.get('path')
         if not file_path:
             return web.json_response({"error": "파일 경로가 필요합니다"}, status=400)
         
-        if not os.path.exists(file_path):
+        # 카탈로그에 있는 데이터셋 파일만 허용 (요약 정보 조회가 사이드카를 만듦)
+        if dataset_catalog.entry(file_path) is None or not os.path.exists(file_path):
             return web.json_response({"error": "파일을 찾을 수 없습니다"}, status=404)
         
-        if not file_path.endswith('.jsonl'):
-            return web.json_response({"error": "JSONL 파일만 지원됩니다"}, status=400)
-        
-        # 파일 정보 수집
-        frame_count = 0
-        first_frame = None
-        last_frame = None
-        metadata = {}
+        if not (file_path.endswith('.jsonl') or file_path.endswith('.parquet')):
+            return web.json_response({"error": "JSONL/Parquet 파일만 지원됩니다"}, status=400)
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f):
-                if line.strip():
-                    try:
-                        data = json.loads(line.strip())
-                        frame_count += 1
-                        
-                        if first_frame is None:
-                            first_frame = data
-                            # 메타데이터 추출
-                            metadata = {
-                                'width': data.get('width', 0),
-                                'height': data.get('height', 0),
-                                'fps': data.get('fps', 0),
-                                'seq_id': data.get('seq_id', ''),
-                                'has_keypoints': 'kpts' in data,
-                                'keypoint_count': len(data.get('kpts', [])) if 'kpts' in data else 0
-                            }
-                        
-                        last_frame = data
-                        
-                        # 너무 큰 파일은 샘플링
-                        if frame_count > 10000:
-                            break
-                            
-                    except json.JSONDecodeError:
-                        continue
+        # 변경이 없으면 캐시된 요약 정보, 늘어났으면 늘어난 부분만 인덱싱
+        loop = asyncio.get_running_loop()
+        info = await loop.run_in_executor(None, dataset_index.info, file_path)
         
         return web.json_response({
             'status': 'ok',
             'file_path': file_path,
-            'frame_count': frame_count,
-            'metadata': metadata,
-            'first_frame': first_frame,
-            'last_frame': last_frame
+            'frame_count': info['frame_count'],
+            'duration_s': info.get('duration_s'),
+            'size': info.get('size'),
+            'metadata': info['metadata'],
+            'first_frame': info['first_frame'],
+            'last_frame': info['last_frame']
         })
         
     except Exception as e:
@@ -158,6 +146,53 @@ async def dataset_file_info_handler(request):
         return web.json_response({"error": str(e)}, status=500)
 
 
+async def thumbnail_handler(request):
+    """녹화 스켈레톤 몽타주 썸네일 (요약 사이드카가 최신일 때만)"""
+    file_path = request.query.get('path')
+    if not file_path:
+        return web.json_response({"error": "파일 경로가 필요합니다"}, status=400)
+    # 카탈로그에 있는 녹화만 허용
+    if dataset_catalog.entry(file_path) is None:
+        return web.json_response({"error": "파일을 찾을 수 없습니다"}, status=404)
+    thumb = thumbnail_path(file_path)
+    if load_summary(file_path) is None or not os.path.exists(thumb):
+        return web.json_response({"error": "요약이 아직 생성되지 않았습니다"}, status=404)
+    return FileResponse(thumb, headers={'Cache-Control': 'no-cache'})
+
+
+async def playback_ws_handler(request):
+    """서버 주도 재생 세션 WebSocket (명령은 JSON 텍스트, 프레임은 바이너리로 전송)"""
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+    session = PlaybackSession(ws)
+    
+    try:
+        async for msg in ws:
+            if msg.type == web.WSMsgType.TEXT:
+                try:
+                    cmd = json.loads(msg.data)
+                except ValueError:
+                    await session.send_error("잘못된 명령 형식입니다")
+                    continue
+                if not isinstance(cmd, dict):
+                    await session.send_error("잘못된 명령 형식입니다")
+                    continue
+                try:
+                    await session.handle(cmd)
+                except (TypeError, ValueError) as e:
+                    await session.send_error(f"잘못된 명령 인자입니다: {e}")
+            elif msg.type == web.WSMsgType.ERROR:
+                break
+    
+    except Exception as e:
+        print(f"❌ 재생 WebSocket 오류 ({request.remote}): {e}")
+    
+    finally:
+        await session.close()
+    
+    return ws
+
+
 def setup_playback_routes(app):
     """Playback 관련 라우트들을 앱에 등록"""
     # Playback 페이지 라우트
@@ -167,3 +202,8 @@ def setup_playback_routes(app):
     app.router.add_get('/playback/dataset-files', dataset_files_handler)
     app.router.add_get('/playback/dataset-file', dataset_file_handler)
     app.router.add_get('/playback/dataset-file-info', dataset_file_info_handler)
+    
+    app.router.add_get('/playback/thumbnail', thumbnail_handler)
+    
+    # 서버 주도 재생 세션
+    app.router.add_get('/playback/ws', playback_ws_handler)
@@ -0,0 +1,238 @@
+"""
+서버 주도 녹화 재생 세션 (/playback/ws)
+클라이언트가 녹화를 열고 재생/일시정지/이동/속도 명령을 보내면, 서버가 인덱스로 필요한 구간만 읽어
+녹화 시각(ts) 기준 실시간으로 바이너리 프레임(pose_codec.encode_frame)을 전송한다.
+브라우저는 현재 프레임만 유지하므로 녹화 길이와 관계없이 메모리 사용량이 일정하다.
+
+클라이언트 명령 (JSON 텍스트):
+  {"cmd": "open", "path": ..., "fps": 15, "format": "u16"}   fps: 전송 상한 (없으면 원본 그대로)
+  {"cmd": "play"} / {"cmd": "pause"} / {"cmd": "stop"}
+  {"cmd": "seek", "frame": n}
+  {"cmd": "speed", "value": 2.0} / {"cmd": "loop", "value": true}
+서버 메시지: 바이너리 프레임, {"type": "opened" | "state" | "ended" | "error", ...}
+"""
+
+import asyncio
+import json
+import os
+from collections import namedtuple
+from typing import Any, Dict, List, Optional
+
+from dataset_catalog import dataset_catalog
+from dataset_index import dataset_index
+from pose_codec import PACK_DTYPES, encode_jsonl_line
+
+PLAYBACK_BATCH_FRAMES = int(os.getenv("PLAYBACK_BATCH_FRAMES", "256"))
+PLAYBACK_MAX_FPS = float(os.getenv("PLAYBACK_MAX_FPS", "60"))
+# 녹화 ts가 이보다 크게 벌어지면(모션 게이트 공백 등) 기다리지 않고 바로 다음 프레임으로
+PLAYBACK_MAX_WAIT_S = float(os.getenv("PLAYBACK_MAX_WAIT_S", "1.0"))
+PLAYBACK_SPEEDS = (0.1, 8.0)
+DEFAULT_FPS = 30.0
+
+# 전송 준비가 끝난 프레임 (payload는 encode_frame 결과)
+_Frame = namedtuple('_Frame', 'index ts_ms payload')
+
+
+class PlaybackSession:
+    """WebSocket 연결 하나의 재생 상태"""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.path: Optional[str] = None
+        self.frame_count = 0
+        self.native_fps = DEFAULT_FPS
+        self.fmt = 'u16'
+        self.max_fps: Optional[float] = None
+        self.position = 0
+        self.speed = 1.0
+        self.loop = False
+        self.playing = False
+        self._dirty = False  # seek/speed 변경 -> 재생 루프가 기준 시각을 다시 잡음
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # 메시지 전송
+    # ------------------------------------------------------------------
+    async def _send_json(self, message: Dict[str, Any]):
+        if not self.ws.closed:
+            await self.ws.send_str(json.dumps(message))
+
+    async def send_error(self, error: str):
+        await self._send_json({'type': 'error', 'error': error})
+
+    async def _send_state(self, kind: str = 'state'):
+        await self._send_json({
+            'type': kind,
+            'playing': self.playing,
+            'position': self.position,
+            'frame_count': self.frame_count,
+            'speed': self.speed,
+            'loop': self.loop,
+        })
+
+    # ------------------------------------------------------------------
+    # 명령 처리
+    # ------------------------------------------------------------------
+    async def handle(self, cmd: Dict[str, Any]):
+        name = cmd.get('cmd')
+        if name == 'open':
+            await self.open(cmd.get('path'), cmd.get('fps'), cmd.get('format', 'u16'))
+            return
+        if self.path is None:
+            await self.send_error("먼저 녹화 파일을 열어야 합니다")
+            return
+        if name == 'play':
+            self.play()
+        elif name == 'pause':
+            await self.pause()
+        elif name == 'stop':
+            await self.pause()
+            await self.seek(0)
+        elif name == 'seek':
+            await self.seek(int(cmd.get('frame', 0)))
+        elif name == 'speed':
+            self.speed = min(max(float(cmd.get('value', 1.0)), PLAYBACK_SPEEDS[0]), PLAYBACK_SPEEDS[1])
+            self._dirty = True
+        elif name == 'loop':
+            self.loop = bool(cmd.get('value'))
+        else:
+            await self.send_error(f"알 수 없는 명령입니다: {name}")
+            return
+        await self._send_state()
+
+    async def open(self, path: Optional[str], fps=None, fmt: str = 'u16'):
+        await self.pause()
+        # 카탈로그에 있는 데이터셋 파일만 허용 (요약 정보 조회가 인덱스 사이드카를 만듦)
+        if not path or dataset_catalog.entry(path) is None or not os.path.exists(path):
+            await self.send_error("파일을 찾을 수 없습니다")
+            return
+        if not (path.endswith('.jsonl') or path.endswith('.parquet')):
+            await self.send_error("JSONL/Parquet 파일만 지원됩니다")
+            return
+        if fmt not in PACK_DTYPES:
+            await self.send_error(f"지원하지 않는 포맷입니다: {fmt}")
+            return
+        loop = asyncio.get_running_loop()
+        info = await loop.run_in_executor(None, dataset_index.info, path)
+        meta = info.get('metadata', {})
+        self.path = path
+        self.frame_count = int(info['frame_count'])
+        self.native_fps = float(meta.get('fps') or DEFAULT_FPS)
+        self.fmt = fmt
+        self.max_fps = min(float(fps), PLAYBACK_MAX_FPS) if fps else None
+        self.position = 0
+        await self._send_json({
+            'type': 'opened',
+            'path': path,
+            'frame_count': self.frame_count,
+            'duration_s': info.get('duration_s'),
+            'width': meta.get('width', 0),
+            'height': meta.get('height', 0),
+            'fps': self.native_fps,
+            'max_fps': self.max_fps,
+            'format': fmt,
+        })
+        await self._send_frame_at(0)
+
+    def play(self):
+        if self.playing or not self.frame_count:
+            return
+        if self.position >= self.frame_count:
+            self.position = 0
+        self.playing = True
+        self._dirty = True
+        self._task = asyncio.create_task(self._play_loop())
+
+    async def pause(self):
+        self.playing = False
+        task, self._task = self._task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def seek(self, frame: int):
+        self.position = max(0, min(frame, max(0, self.frame_count - 1)))
+        self._dirty = True
+        if not self.playing:
+            await self._send_frame_at(self.position)  # 일시정지 중 이동은 해당 프레임 미리보기
+
+    async def close(self):
+        await self.pause()
+
+    # ------------------------------------------------------------------
+    # 재생
+    # ------------------------------------------------------------------
+    def _read_batch(self, start: int, end: int) -> List[_Frame]:
+        """[start, end) 프레임을 읽어 바이너리 프레임으로 변환 (executor에서 실행)"""
+        data, start, end, _ = dataset_index.read_range(self.path, start, end)
+        lines = [ln for ln in data.splitlines() if ln.strip()]
+        frames = []
+        for i, line in enumerate(lines):
+            ts_ms, payload = encode_jsonl_line(line, start + i, self.native_fps, self.fmt)
+            frames.append(_Frame(start + i, ts_ms, payload))
+        return frames
+
+    async def _send_frame_at(self, index: int):
+        if not self.frame_count:
+            return
+        loop = asyncio.get_running_loop()
+        frames = await loop.run_in_executor(None, self._read_batch, index, index + 1)
+        if frames and not self.ws.closed:
+            await self.ws.send_bytes(frames[0].payload)
+
+    async def _play_loop(self):
+        loop = asyncio.get_running_loop()
+        anchor = None  # (루프 시각, 녹화 ts_ms)
+        last_sent_ts = None
+        try:
+            while self.playing and not self.ws.closed:
+                if self.position >= self.frame_count:
+                    if not self.loop:
+                        self.playing = False
+                        await self._send_state('ended')
+                        return
+                    self.position = 0
+                    self._dirty = True
+
+                if self._dirty:
+                    self._dirty = False
+                    anchor = None
+                    last_sent_ts = None
+
+                start = self.position
+                end = min(self.frame_count, start + PLAYBACK_BATCH_FRAMES)
+                frames = await loop.run_in_executor(None, self._read_batch, start, end)
+                if not frames:
+                    self.position = end
+                    continue
+
+                for frame in frames:
+                    if self._dirty or not self.playing:
+                        break
+                    if anchor is None or frame.ts_ms < anchor[1] or \
+                            (last_sent_ts is not None and frame.ts_ms - last_sent_ts > PLAYBACK_MAX_WAIT_S * 1000.0):
+                        anchor = (loop.time(), frame.ts_ms)
+                    # 클라이언트 fps 상한: 녹화 시간 간격(배속 반영)이 전송 간격보다 짧으면 건너뜀
+                    if self.max_fps and last_sent_ts is not None:
+                        if (frame.ts_ms - last_sent_ts) / self.speed < 1000.0 / self.max_fps - 1.0:
+                            self.position = frame.index + 1
+                            continue
+                    delay = anchor[0] + (frame.ts_ms - anchor[1]) / 1000.0 / self.speed - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    if self._dirty or not self.playing or self.ws.closed:
+                        break
+                    await self.ws.send_bytes(frame.payload)
+                    last_sent_ts = frame.ts_ms
+                    self.position = frame.index + 1
+                else:
+                    self.position = max(self.position, end)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ 재생 세션 오류 ({self.path}): {e}")
+            self.playing = False
+            await self.send_error(str(e))
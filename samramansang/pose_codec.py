@@ -0,0 +1,153 @@
+"""
+포즈 키포인트 변환 공통 모듈
+정규화/클램프/NaN 처리/dtype 패킹을 (N, 17, 3) 배열 단위 NumPy 연산으로 수행
+(PoseRecorder, PoseWebSocketSender 페이로드, PoseProcessor JSON 변환에서 공통 사용)
+"""
+import json
+import struct
+from typing import List, Tuple, Union
+
+import numpy as np
+
+NUM_KEYPOINTS = 17
+
+# 패킹 포맷: 정규화 좌표 [0,1] 기준
+#   f32: float32 그대로, f16: float16, u16: [0,1] -> 0..65535 양자화
+PACK_DTYPES = {
+    'f32': np.dtype('<f4'),
+    'f16': np.dtype('<f2'),
+    'u16': np.dtype('<u2'),
+}
+
+# 바이너리 프레임 메시지 (WebSocket 전송용): 24바이트 헤더 + pack() 키포인트
+#   magic b'PKF1', format 코드(u8), 사람 수(u8), flags(u16), frame_id(u32),
+#   width(u16), height(u16), ts_ms(f64)
+FRAME_MAGIC = b'PKF1'
+FRAME_HEADER = struct.Struct('<4sBBHIHHd')
+FORMAT_CODES = {'f32': 0, 'f16': 1, 'u16': 2}
+FRAME_FLAG_GAP = 1  # 이 프레임 앞에 녹화 공백(gap_before)이 있음
+
+
+def as_pose_array(kpts, num_keypoints: int = NUM_KEYPOINTS) -> np.ndarray:
+    """
+    (17, C) 또는 (N, 17, C) 키포인트 -> (N, 17, 3) float32 복사본
+    C == 2이면 score는 1.0으로 채움
+    """
+    k = np.asarray(kpts, dtype=np.float32)
+    if k.ndim == 2:
+        k = k[None]
+    if k.ndim != 3 or k.shape[1] < num_keypoints or k.shape[2] < 2:
+        raise ValueError(f"kpts must be ({num_keypoints}, >=2) or (N, {num_keypoints}, >=2)")
+    out = np.ones((k.shape[0], num_keypoints, 3), dtype=np.float32)
+    cols = min(3, k.shape[2])
+    out[:, :, :cols] = k[:, :num_keypoints, :cols]
+    return out
+
+
+def sanitize(kpts: np.ndarray) -> np.ndarray:
+    """NaN/inf -> 0 (제자리 변환 후 반환)"""
+    return np.nan_to_num(kpts, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def normalize_keypoints(
+    kpts: np.ndarray,
+    width: Union[int, np.ndarray],
+    height: Union[int, np.ndarray],
+    dtype=np.float64,
+) -> np.ndarray:
+    """
+    픽셀 좌표 (N, 17, 3) -> 정규화 좌표 (N, 17, 3), x/y/score 모두 [0,1]로 클램프
+    width/height: 스칼라 또는 프레임별 (N,) 배열 (0 이하는 1로 처리)
+    """
+    out = np.array(kpts, dtype=dtype, copy=True)
+    n = out.shape[0]
+    w = np.maximum(1, np.broadcast_to(np.asarray(width, dtype=np.int64), (n,))).astype(dtype)
+    h = np.maximum(1, np.broadcast_to(np.asarray(height, dtype=np.int64), (n,))).astype(dtype)
+    out[:, :, 0] /= w[:, None]
+    out[:, :, 1] /= h[:, None]
+    sanitize(out)
+    np.clip(out, 0.0, 1.0, out=out)
+    return out
+
+
+def pixel_payload(kpts: np.ndarray) -> List:
+    """
+    픽셀 좌표 키포인트 -> 전송용 리스트 [[x:int, y:int, score:float], ...]
+    (17, 3) 입력이면 한 명, (N, 17, 3) 입력이면 사람별 리스트
+    """
+    k = sanitize(np.array(kpts, dtype=np.float32, copy=True))
+    xy = np.trunc(k[..., :2]).astype(np.int32).tolist()
+    score = k[..., 2].astype(np.float64).tolist()
+    if k.ndim == 2:
+        return [[p[0], p[1], s] for p, s in zip(xy, score)]
+    return [[[p[0], p[1], s] for p, s in zip(xy_i, score_i)] for xy_i, score_i in zip(xy, score)]
+
+
+def float_rows(kpts: np.ndarray) -> List:
+    """키포인트 배열 -> float 중첩 리스트 (NaN/inf는 0)"""
+    return sanitize(np.array(kpts, dtype=np.float64, copy=True)).tolist()
+
+
+def pack(norm: np.ndarray, fmt: str = 'f32') -> bytes:
+    """정규화 좌표 (N, 17, 3) -> 리틀엔디언 바이트열"""
+    dtype = PACK_DTYPES[fmt]
+    if fmt == 'u16':
+        q = np.rint(np.clip(norm, 0.0, 1.0) * 65535.0)
+        return q.astype(dtype).tobytes()
+    return np.asarray(norm).astype(dtype).tobytes()
+
+
+def unpack(buf: bytes, fmt: str = 'f32', num_keypoints: int = NUM_KEYPOINTS) -> np.ndarray:
+    """pack()의 역변환 -> (N, 17, 3) float32"""
+    arr = np.frombuffer(buf, dtype=PACK_DTYPES[fmt]).reshape(-1, num_keypoints, 3)
+    if fmt == 'u16':
+        return arr.astype(np.float32) / 65535.0
+    return arr.astype(np.float32)
+
+
+def encode_frame(
+    norm: np.ndarray,
+    frame_id: int,
+    width: int,
+    height: int,
+    ts_ms: float = 0.0,
+    fmt: str = 'u16',
+    flags: int = 0,
+) -> bytes:
+    """정규화 좌표 (N, 17, 3) 한 프레임 -> 헤더 + 패킹된 키포인트 바이트열 (N=0이면 헤더만)"""
+    persons = int(norm.shape[0]) if norm is not None else 0
+    header = FRAME_HEADER.pack(
+        FRAME_MAGIC, FORMAT_CODES[fmt], persons, int(flags) & 0xFFFF,
+        int(frame_id) & 0xFFFFFFFF, int(width) & 0xFFFF, int(height) & 0xFFFF, float(ts_ms),
+    )
+    if not persons:
+        return header
+    return header + pack(norm, fmt)
+
+
+def encode_jsonl_line(line: bytes, index: int, fallback_fps: float = 30.0, fmt: str = 'u16') -> Tuple[float, bytes]:
+    """
+    녹화 JSONL 한 줄 -> (ts_ms, encode_frame 바이트열)
+    키포인트가 없거나 깨진 줄은 사람 0명 프레임, 픽셀 좌표로 저장된 예전 파일은 정규화해서 패킹
+    """
+    try:
+        obj = json.loads(line)
+    except ValueError:
+        obj = {}
+    width = int(obj.get('width') or 0)
+    height = int(obj.get('height') or 0)
+    ts = obj.get('ts')
+    ts_ms = float(ts) if ts is not None else index * 1000.0 / fallback_fps
+    flags = FRAME_FLAG_GAP if obj.get('gap_before') else 0
+    kpts = obj.get('kpts', obj.get('keypoints'))
+    norm = np.zeros((0, NUM_KEYPOINTS, 3), np.float32)
+    if kpts:
+        try:
+            arr = as_pose_array(kpts)
+            if width > 0 and height > 0 and float(np.nanmax(arr[..., :2])) > 1.0:
+                norm = normalize_keypoints(arr, width, height, np.float32)
+            else:
+                norm = np.clip(sanitize(arr), 0.0, 1.0)
+        except ValueError:
+            pass
+    return ts_ms, encode_frame(norm, obj.get('frame_id', index), width, height, ts_ms, fmt, flags)
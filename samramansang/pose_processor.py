@@ -3,6 +3,7 @@
 webrtc_manager와 pose_websocket_sender에서 공통으로 사용
 """
 from noise_filter import server_noise_filter
+from pose_codec import float_rows, pixel_payload
 
 
 class PoseProcessor:
@@ -135,19 +136,14 @@ class PoseProcessor:
                 hand_handedness = []
                 # numpy array인 경우 (MediaPipe)
                 if hasattr(result_hand.keypoints.data, 'shape') and not hasattr(result_hand.keypoints.data, 'cpu'):
-                    import numpy as np
-                    for i in range(result_hand.keypoints.data.shape[0]):
-                        hand_data = result_hand.keypoints.data[i]  # (K,3)
-                        hand_kpts.append([[float(p[0]), float(p[1]), float(p[2])] for p in hand_data])
+                    hand_kpts = float_rows(result_hand.keypoints.data[..., :3])  # (N,K,3)
                     
                     # MediaPipe handedness 정보 추출
                     if hasattr(result_hand, 'handedness') and result_hand.handedness:
                         hand_handedness = result_hand.handedness
                 # torch tensor인 경우 (YOLO)
                 elif hasattr(result_hand.keypoints.data, 'cpu'):
-                    for i in range(result_hand.keypoints.data.shape[0]):
-                        hand_data = result_hand.keypoints.data[i].cpu().numpy()  # (K,3)
-                        hand_kpts.append([[float(p[0]), float(p[1]), float(p[2])] for p in hand_data])
+                    hand_kpts = float_rows(result_hand.keypoints.data.cpu().numpy()[..., :3])  # (N,K,3)
                 
                 result_pose.hands = hand_kpts
                 # handedness 정보가 있으면 추가
@@ -171,8 +167,10 @@ class PoseProcessor:
         
         # 키포인트 추출
         if hasattr(result_pose, "keypoints") and result_pose.keypoints is not None:
-            pts = result_pose.keypoints.data[0].cpu().numpy()  # (K,3) = x,y,score
-            kpts = [[int(p[0]), int(p[1]), float(p[2])] for p in pts]
+            data = result_pose.keypoints.data
+            if len(data) > 0:
+                pts = data[0].cpu().numpy()  # (K,3) = x,y,score
+                kpts = pixel_payload(pts)
         
         # 손 인식 결과 추출
         if hasattr(result_pose, 'hands') and result_pose.hands:
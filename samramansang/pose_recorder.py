@@ -1,11 +1,322 @@
 import os
 import json
+import shutil
+import struct
 import time
 import threading
+from collections import deque, namedtuple
 from typing import List, Optional, Dict, Any
 
 import numpy as np
 
+from pose_codec import as_pose_array, normalize_keypoints
+
+
+# Optional columnar sidecar next to the JSONL: '' (off) | 'npy' | 'arrow'
+RECORD_BINARY_FORMAT = os.getenv("RECORD_BINARY_FORMAT", "").strip().lower()
+RECORD_FLUSH_INTERVAL = float(os.getenv("RECORD_FLUSH_INTERVAL", "0.25"))  # seconds between writer batches
+RECORD_NPY_CHUNK = int(os.getenv("RECORD_NPY_CHUNK", "1024"))  # frames per .npz chunk
+RECORD_CHUNK_FRAMES = int(os.getenv("RECORD_CHUNK_FRAMES", "9000"))  # frames per JSONL chunk (0 = single file)
+RECORD_FSYNC_FRAMES = int(os.getenv("RECORD_FSYNC_FRAMES", "300"))  # group commit: fsync after this many frames
+RECORD_FSYNC_MS = float(os.getenv("RECORD_FSYNC_MS", "2000"))  # ... or after this many ms, whichever comes first
+
+# motion-gated recording: drop frames after RECORD_IDLE_SECONDS of stillness or absence
+RECORD_MOTION_GATE = os.getenv("RECORD_MOTION_GATE", "0").strip().lower() in ("1", "true", "yes")
+RECORD_IDLE_SECONDS = float(os.getenv("RECORD_IDLE_SECONDS", "3.0"))
+RECORD_MOTION_THRESHOLD = float(os.getenv("RECORD_MOTION_THRESHOLD", "0.004"))  # mean joint displacement (normalized)
+
+# sidecar index record: (chunk number u32, byte offset u64) per frame_id
+# (same layout as training/window_dataset.py INDEX_RECORD, which reads it)
+INDEX_RECORD = struct.Struct("<IQ")
+
+
+# one queued frame: kpts is a compact (17, 3) float32 copy in pixel space
+_QueuedFrame = namedtuple("_QueuedFrame", "kpts ts_ms width height fps frame_seq extra")
+
+
+class _MotionGate:
+    """
+    Per-frame motion energy over normalized keypoints: mean displacement of joints
+    visible (score >= conf_thr) in both this and the previous frame. Frames are kept
+    while someone moved within the last idle_seconds; after that they are dropped
+    until motion resumes, and the first kept frame carries a gap marker.
+    """
+
+    def __init__(self, idle_seconds: float, threshold: float, conf_thr: float = 0.3, min_visible: int = 5):
+        self.idle_ms = max(0.0, float(idle_seconds)) * 1000.0
+        self.threshold = float(threshold)
+        self.conf_thr = float(conf_thr)
+        self.min_visible = int(min_visible)
+        self._prev: Optional[np.ndarray] = None
+        self._last_motion_ms: Optional[int] = None
+        self._gap_start_ms: Optional[int] = None
+        self._gap_dropped = 0
+        self._gap_reason: Optional[str] = None
+        self.dropped = 0
+
+    def _energies(self, norm: np.ndarray):
+        """(N, 17, 3) -> per-frame motion energy (N,) and presence mask (N,)"""
+        vis = norm[:, :, 2] >= self.conf_thr
+        present = vis.sum(axis=1) >= self.min_visible
+        prev = norm[:1] if self._prev is None else self._prev[None]
+        prev_all = np.concatenate([prev, norm[:-1]], axis=0)
+        prev_vis = prev_all[:, :, 2] >= self.conf_thr
+        both = vis & prev_vis
+        disp = np.linalg.norm(norm[:, :, :2] - prev_all[:, :, :2], axis=2)
+        count = both.sum(axis=1)
+        energy = np.where(count > 0, (disp * both).sum(axis=1) / np.maximum(count, 1), 0.0)
+        if self._prev is None:
+            energy[0] = np.inf  # first frame of a recording counts as motion
+        self._prev = norm[-1].copy()
+        return energy, present
+
+    def filter(self, norm: np.ndarray, ts_ms: np.ndarray):
+        """-> (keep mask (N,), {row: gap marker dict} for kept rows that follow a gap)"""
+        energy, present = self._energies(norm)
+        keep = np.ones(len(norm), dtype=bool)
+        gaps: Dict[int, Dict[str, Any]] = {}
+        for i in range(len(norm)):
+            t = int(ts_ms[i])
+            if present[i] and energy[i] >= self.threshold:
+                self._last_motion_ms = t
+            idle = self._last_motion_ms is None or (t - self._last_motion_ms) > self.idle_ms
+            if idle:
+                keep[i] = False
+                self.dropped += 1
+                if self._gap_start_ms is None:
+                    self._gap_start_ms = t
+                self._gap_dropped += 1
+                self._gap_reason = "still" if present[i] else "absent"
+            elif self._gap_start_ms is not None:
+                gaps[i] = {
+                    "dropped": self._gap_dropped,
+                    "duration_ms": t - self._gap_start_ms,
+                    "reason": self._gap_reason,
+                }
+                self._gap_start_ms = None
+                self._gap_dropped = 0
+        return keep, gaps
+
+
+class _ChunkedJsonlWriter:
+    """
+    JSONL recording split into fixed-size chunks with a frame index:
+      <seq_id>.jsonl                first chunk (keeps existing *.jsonl globs working)
+      <seq_id>.parts/000001.jsonl   following chunks
+      <seq_id>.idx                  INDEX_RECORD per frame_id -> (chunk, byte offset)
+      <seq_id>.manifest.json        chunk list and frame count
+
+    Data and index are flushed every batch but only fsynced every fsync_frames
+    frames or fsync_ms milliseconds (group commit); data is synced before the index,
+    so an index entry never points past durable data.
+    """
+
+    def __init__(self, path: str, seq_id: str, chunk_frames: int, fsync_frames: int, fsync_ms: float):
+        self.path = path
+        self.seq_id = seq_id
+        self.base = path[:-len(".jsonl")] if path.endswith(".jsonl") else path
+        self.parts_dir = f"{self.base}.parts"
+        self.index_path = f"{self.base}.idx"
+        self.manifest_path = f"{self.base}.manifest.json"
+        self.chunk_frames = max(0, int(chunk_frames))
+        self.fsync_frames = max(1, int(fsync_frames))
+        self.fsync_ms = max(0.0, float(fsync_ms))
+
+        self.chunks = [path]
+        self.frames = 0
+        self._file = open(path, "ab")
+        self._offset = self._file.tell()
+        self._chunk_rows = 0
+        self._index = open(self.index_path, "ab")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._write_manifest(complete=False)
+
+    def write_lines(self, lines: List[bytes]):
+        """Append encoded lines (each ending in b"\\n") and their index records."""
+        index = bytearray()
+        buf: List[bytes] = []
+        for line in lines:
+            if self.chunk_frames and self._chunk_rows >= self.chunk_frames:
+                self._file.write(b"".join(buf))
+                buf = []
+                self._rollover()
+            index += INDEX_RECORD.pack(len(self.chunks) - 1, self._offset)
+            buf.append(line)
+            self._offset += len(line)
+            self._chunk_rows += 1
+        self._file.write(b"".join(buf))
+        self._file.flush()
+        self._index.write(index)
+        self._index.flush()
+        self.frames += len(lines)
+        self._unsynced += len(lines)
+        self.maybe_sync()
+
+    def maybe_sync(self):
+        if not self._unsynced:
+            return
+        elapsed_ms = (time.monotonic() - self._last_sync) * 1000.0
+        if self._unsynced >= self.fsync_frames or elapsed_ms >= self.fsync_ms:
+            self.sync()
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._index.flush()
+        os.fsync(self._index.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _rollover(self):
+        self.sync()
+        self._file.close()
+        os.makedirs(self.parts_dir, exist_ok=True)
+        chunk_path = os.path.join(self.parts_dir, f"{len(self.chunks):06d}.jsonl")
+        self._file = open(chunk_path, "ab")
+        self._offset = 0
+        self._chunk_rows = 0
+        self.chunks.append(chunk_path)
+        self._write_manifest(complete=False)
+
+    def _write_manifest(self, complete: bool):
+        root = os.path.dirname(self.path)
+        manifest = {
+            "seq_id": self.seq_id,
+            "chunk_frames": self.chunk_frames,
+            "chunks": [os.path.relpath(c, root) for c in self.chunks],
+            "frames": self.frames,
+            "index": os.path.basename(self.index_path),
+            "index_record": "<IQ",
+            "complete": complete,
+            "updated_at": time.time(),
+        }
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def close(self):
+        try:
+            self.sync()
+        finally:
+            self._file.close()
+            self._index.close()
+        self._write_manifest(complete=True)
+
+    def paths(self) -> List[str]:
+        # server-side sidecars that may exist by the time the recording is discarded:
+        # <base>.info.json (dataset index), <base>.summary.json / .thumb.png (recording summary)
+        sidecars = [f"{self.base}.info.json", f"{self.base}.summary.json", f"{self.base}.thumb.png"]
+        return [self.path, self.parts_dir, self.index_path, self.manifest_path] + sidecars
+
+
+class _NpyChunkWriter:
+    """
+    Columnar sidecar as numpy chunks: <seq_id>.chunks/000000.npz, 000001.npz, ...
+    Each chunk holds ts, frame_id, frame_seq (-1 if unknown), gap_before, width, height, fps and kpts (N, 17, 3) float32 (normalized).
+    """
+
+    def __init__(self, base_path: str, chunk_frames: int = RECORD_NPY_CHUNK):
+        self.dir = f"{base_path}.chunks"
+        self.chunk_frames = max(1, int(chunk_frames))
+        self._pending: List[Dict[str, np.ndarray]] = []
+        self._pending_rows = 0
+        self._chunk_index = 0
+        os.makedirs(self.dir, exist_ok=True)
+
+    def write(self, cols: Dict[str, np.ndarray]):
+        self._pending.append(cols)
+        self._pending_rows += len(cols["ts"])
+        if self._pending_rows >= self.chunk_frames:
+            self._flush_chunks(final=False)
+
+    def _flush_chunks(self, final: bool):
+        if not self._pending:
+            return
+        merged = {k: np.concatenate([c[k] for c in self._pending]) for k in self._pending[0]}
+        self._pending = []
+        self._pending_rows = 0
+        n = len(merged["ts"])
+        start = 0
+        while n - start >= self.chunk_frames or (final and start < n):
+            end = min(n, start + self.chunk_frames)
+            path = os.path.join(self.dir, f"{self._chunk_index:06d}.npz")
+            np.savez(path, **{k: v[start:end] for k, v in merged.items()})
+            self._chunk_index += 1
+            start = end
+        if start < n:
+            rest = {k: v[start:] for k, v in merged.items()}
+            self._pending = [rest]
+            self._pending_rows = n - start
+
+    def close(self):
+        self._flush_chunks(final=True)
+
+    def paths(self) -> List[str]:
+        return [self.dir]
+
+
+class _ArrowStreamWriter:
+    """Columnar sidecar as an Arrow IPC stream: <seq_id>.arrow (one record batch per writer batch)."""
+
+    def __init__(self, base_path: str):
+        import pyarrow as pa
+
+        self._pa = pa
+        self.path = f"{base_path}.arrow"
+        self.schema = pa.schema([
+            ("ts", pa.int64()),
+            ("frame_id", pa.int64()),
+            ("frame_seq", pa.int64()),
+            ("gap_before", pa.int8()),
+            ("width", pa.int32()),
+            ("height", pa.int32()),
+            ("fps", pa.float32()),
+            ("kpts", pa.list_(pa.float32(), 17 * 3)),
+        ])
+        self._sink = pa.OSFile(self.path, "wb")
+        self._writer = pa.ipc.new_stream(self._sink, self.schema)
+
+    def write(self, cols: Dict[str, np.ndarray]):
+        pa = self._pa
+        kpts = cols["kpts"].reshape(len(cols["ts"]), -1).astype(np.float32)
+        batch = pa.record_batch([
+            pa.array(cols["ts"]),
+            pa.array(cols["frame_id"]),
+            pa.array(cols["frame_seq"]),
+            pa.array(cols["gap_before"]),
+            pa.array(cols["width"]),
+            pa.array(cols["height"]),
+            pa.array(cols["fps"]),
+            pa.FixedSizeListArray.from_arrays(pa.array(kpts.ravel()), 17 * 3),
+        ], schema=self.schema)
+        self._writer.write_batch(batch)
+
+    def close(self):
+        try:
+            self._writer.close()
+        finally:
+            self._sink.close()
+
+    def paths(self) -> List[str]:
+        return [self.path]
+
+
+class _RecordingSession:
+    """State of one recording: the frame queue (filled by append) and the writer thread that drains it."""
+
+    def __init__(self, seq_id: str, path: str):
+        self.seq_id = seq_id
+        self.path = path
+        self.queue: deque = deque()  # append/popleft are atomic, so the producer never takes a lock
+        self.wake = threading.Event()
+        self.closing = False
+        self.discard = False
+        self.frame_id = 0  # assigned by the writer to frames that are actually written
+        self.gate: Optional[_MotionGate] = None
+        self.thread: Optional[threading.Thread] = None
+
 
 class PoseRecorder:
     """
@@ -13,21 +324,51 @@ class PoseRecorder:
 
     Each line schema:
       {
-        "ts": <unix_ms>,
+        "ts": <unix_ms, capture time of the frame>,
         "width": <int>,
         "height": <int>,
-        "kpts": [[x_norm, y_norm, score], ... 17 items]
+        "kpts": [[x_norm, y_norm, score], ... 17 items],
+        "frame_seq": <capture frame sequence number, when known>,
+        "gap_before": {"dropped", "duration_ms", "reason"}  (motion gate only, first frame after dropped frames)
       }
+
+    append() only copies the keypoints into a (17, 3) float32 array and queues it;
+    normalization, serialization and file I/O happen in batches on a writer thread,
+    so recording never blocks the realtime broadcast loop. Long recordings are
+    split into chunks of chunk_frames lines with a frame index sidecar (see
+    _ChunkedJsonlWriter); fsync is batched. With motion_gate, frames are dropped
+    after idle_seconds without motion or without a visible person (see _MotionGate).
+    With binary_format
+    'npy' or 'arrow' the same frames are also written as a columnar sidecar.
     """
 
-    def __init__(self, root_dir: str = "training/dataset/raw"):
+    def __init__(
+        self,
+        root_dir: str = "training/dataset/raw",
+        binary_format: Optional[str] = RECORD_BINARY_FORMAT,
+        flush_interval: float = RECORD_FLUSH_INTERVAL,
+        chunk_frames: int = RECORD_CHUNK_FRAMES,
+        fsync_frames: int = RECORD_FSYNC_FRAMES,
+        fsync_ms: float = RECORD_FSYNC_MS,
+        motion_gate: bool = RECORD_MOTION_GATE,
+        idle_seconds: float = RECORD_IDLE_SECONDS,
+        motion_threshold: float = RECORD_MOTION_THRESHOLD,
+    ):
         self.root_dir = root_dir
+        self.binary_format = (binary_format or "").strip().lower() or None
+        if self.binary_format not in (None, "npy", "arrow"):
+            raise ValueError(f"unsupported binary_format: {binary_format}")
+        self.flush_interval = max(0.01, float(flush_interval))
+        self.chunk_frames = chunk_frames
+        self.fsync_frames = fsync_frames
+        self.fsync_ms = fsync_ms
+        self.motion_gate = bool(motion_gate)
+        self.idle_seconds = idle_seconds
+        self.motion_threshold = motion_threshold
         self._lock = threading.Lock()
-        self._active = False
-        self._file = None
-        self._path = None
+        self._session: Optional[_RecordingSession] = None
         self._seq_id: Optional[str] = None
-        self._frame_id: int = 0
+        self._path: Optional[str] = None
 
         os.makedirs(self.root_dir, exist_ok=True)
 
@@ -37,104 +378,203 @@ class PoseRecorder:
         kpts: shape (17, 3) with (x, y, score) in pixel space
         returns: list of 17 [x_norm, y_norm, score] where x_norm,y_norm in [0,1]
         """
-        if not isinstance(kpts, np.ndarray):
-            kpts = np.array(kpts, dtype=np.float32)
-        if kpts.ndim != 2 or kpts.shape[0] < 17 or kpts.shape[1] < 2:
-            raise ValueError("kpts must be (17, >=2)")
-
-        w = max(1, int(width))
-        h = max(1, int(height))
-        out: List[List[float]] = []
-        for i in range(17):
-            x = float(kpts[i, 0]) / w
-            y = float(kpts[i, 1]) / h
-            s = float(kpts[i, 2]) if kpts.shape[1] >= 3 else 1.0
-            # clamp for safety
-            x = 0.0 if not np.isfinite(x) else max(0.0, min(1.0, x))
-            y = 0.0 if not np.isfinite(y) else max(0.0, min(1.0, y))
-            s = 0.0 if not np.isfinite(s) else max(0.0, min(1.0, s))
-            out.append([x, y, s])
-        return out
+        return normalize_keypoints(as_pose_array(kpts), width, height)[0].tolist()
 
     def start(self) -> str:
         with self._lock:
-            if self._active:
+            if self._session is not None:
                 return self._seq_id or ""
             # generate seq_id based on ms timestamp
             ms = int(time.time() * 1000)
-            self._seq_id = f"seq-{ms}"
-            self._frame_id = 0
-            filename = f"{self._seq_id}.jsonl"
-            path = os.path.join(self.root_dir, filename)
-            self._file = open(path, "a", buffering=1)
+            seq_id = f"seq-{ms}"
+            path = os.path.join(self.root_dir, f"{seq_id}.jsonl")
+            session = _RecordingSession(seq_id, path)
+            if self.motion_gate:
+                session.gate = _MotionGate(self.idle_seconds, self.motion_threshold)
+            # open files here so errors surface to the caller instead of the writer thread
+            jsonl = _ChunkedJsonlWriter(path, seq_id, self.chunk_frames, self.fsync_frames, self.fsync_ms)
+            binary = None
+            if self.binary_format is not None:
+                base = os.path.join(self.root_dir, seq_id)
+                try:
+                    binary = _ArrowStreamWriter(base) if self.binary_format == "arrow" else _NpyChunkWriter(base)
+                except ImportError:
+                    print("⚠️ pyarrow not available, falling back to npy chunks")
+                    binary = _NpyChunkWriter(base)
+            session.thread = threading.Thread(
+                target=self._writer_loop, args=(session, jsonl, binary), name="PoseRecorderWriter", daemon=True
+            )
+            session.thread.start()
+            self._session = session
+            self._seq_id = seq_id
             self._path = path
-            self._active = True
-            return self._seq_id
+            return seq_id
+
+    def _close_session(self, discard: bool) -> Optional[_RecordingSession]:
+        with self._lock:
+            session = self._session
+            self._session = None
+        if session is None:
+            return None
+        session.discard = discard
+        session.closing = True
+        session.wake.set()
+        if session.thread is not None:
+            session.thread.join()
+        return session
 
     def stop(self) -> Optional[str]:
+        # blocks until the writer has drained the queue, so the file is complete on return
+        self._close_session(discard=False)
         with self._lock:
-            if not self._active:
-                return self._seq_id
-            try:
-                if self._file:
-                    self._file.flush()
-                    self._file.close()
-            finally:
-                self._file = None
-                self._active = False
-                return self._seq_id
+            return self._seq_id
 
     def cancel(self) -> Optional[str]:
         """녹화를 취소하고 파일을 삭제 (저장하지 않음)"""
+        session = self._close_session(discard=True)
         with self._lock:
-            if not self._active:
+            if session is None:
                 return self._seq_id
-            seq_id = self._seq_id
-            path = self._path
-            try:
-                if self._file:
-                    self._file.close()
-            except Exception:
-                pass
-            finally:
-                self._file = None
-                self._active = False
-                self._seq_id = None
-                self._path = None
-                # 파일 삭제 (저장하지 않음)
-                if path and os.path.exists(path):
-                    try:
-                        os.remove(path)
-                    except Exception:
-                        pass
-                return seq_id
+            self._seq_id = None
+            self._path = None
+        return session.seq_id
 
     def is_active(self) -> bool:
         with self._lock:
-            return self._active
+            return self._session is not None
 
-    def append(self, keypoints: np.ndarray, width: int, height: int, fps: Optional[float] = None, extra: Optional[Dict[str, Any]] = None):
-        with self._lock:
-            if not self._active or self._file is None:
+    def append(
+        self,
+        keypoints: np.ndarray,
+        width: int,
+        height: int,
+        fps: Optional[float] = None,
+        extra: Optional[Dict[str, Any]] = None,
+        capture_ts: Optional[float] = None,
+        frame_seq: Optional[int] = None,
+    ):
+        """
+        Queue one frame. capture_ts (unix seconds) is the camera capture time of the
+        frame the pose was inferred from; the append time is used when it is missing.
+        """
+        session = self._session
+        if session is None or session.closing:
+            return
+        try:
+            item = _QueuedFrame(
+                kpts=as_pose_array(keypoints)[0],
+                ts_ms=int((capture_ts if capture_ts is not None else time.time()) * 1000),
+                width=int(width),
+                height=int(height),
+                fps=float(fps) if fps is not None else None,
+                frame_seq=int(frame_seq) if frame_seq is not None else None,
+                extra=dict(extra) if isinstance(extra, dict) else None,
+            )
+        except Exception:
+            # fail silently to not disrupt realtime loop
+            return
+        session.queue.append(item)
+
+    # ------------------------------------------------------------------
+    # writer thread
+    # ------------------------------------------------------------------
+    def _writer_loop(self, session: _RecordingSession, jsonl, binary):
+        try:
+            while True:
+                session.wake.wait(self.flush_interval)
+                session.wake.clear()
+                closing = session.closing
+                batch = []
+                while session.queue:
+                    batch.append(session.queue.popleft())
+                if batch and not session.discard:
+                    try:
+                        self._write_batch(session, batch, jsonl, binary)
+                    except Exception as e:
+                        print(f"⚠️ PoseRecorder write failed: {e}")
+                elif not session.discard:
+                    try:
+                        jsonl.maybe_sync()  # time-based group commit while idle
+                    except Exception as e:
+                        print(f"⚠️ PoseRecorder sync failed: {e}")
+                if closing and not session.queue:
+                    break
+        finally:
+            for f in (jsonl, binary):
+                try:
+                    if f is not None:
+                        f.close()
+                except Exception:
+                    pass
+            if session.discard:
+                paths = jsonl.paths() + (binary.paths() if binary is not None else [])
+                for p in paths:
+                    self._remove(p)
+
+    def _write_batch(self, session: _RecordingSession, batch: list, jsonl, binary):
+        kpts = np.stack([it.kpts for it in batch])
+        cols = {
+            "ts": np.array([it.ts_ms for it in batch], dtype=np.int64),
+            "width": np.array([it.width for it in batch], dtype=np.int32),
+            "height": np.array([it.height for it in batch], dtype=np.int32),
+            "fps": np.array([np.nan if it.fps is None else it.fps for it in batch], dtype=np.float32),
+            "frame_seq": np.array([-1 if it.frame_seq is None else it.frame_seq for it in batch], dtype=np.int64),
+        }
+        norm = normalize_keypoints(kpts, cols["width"], cols["height"])
+
+        gaps: Dict[int, Dict[str, Any]] = {}
+        if session.gate is not None:
+            keep, gaps = session.gate.filter(norm, cols["ts"])
+            if not keep.all():
+                rows = np.flatnonzero(keep)
+                gaps = {int(np.searchsorted(rows, r)): g for r, g in gaps.items()}
+                batch = [batch[r] for r in rows]
+                norm = norm[rows]
+                cols = {k: v[rows] for k, v in cols.items()}
+            if not batch:
                 return
-            try:
-                kpts_norm = self._normalize_keypoints(keypoints, width, height)
-                obj: Dict[str, Any] = {
-                    "ts": int(time.time() * 1000),
-                    "width": int(width),
-                    "height": int(height),
-                    "seq_id": self._seq_id,
-                    "frame_id": int(self._frame_id),
-                    "fps": float(fps) if fps is not None else None,
-                    "kpts": kpts_norm,
-                }
-                if isinstance(extra, dict):
-                    obj.update(extra)
-                self._file.write(json.dumps(obj, ensure_ascii=False) + "\n")
-                self._frame_id += 1
-            except Exception:
-                # fail silently to not disrupt realtime loop
-                pass
+
+        # frame ids are contiguous over written frames, so the index stays dense
+        first_id = session.frame_id
+        session.frame_id += len(batch)
+        cols["frame_id"] = np.arange(first_id, session.frame_id, dtype=np.int64)
+        cols["gap_before"] = np.zeros(len(batch), dtype=np.int8)
+        for r in gaps:
+            cols["gap_before"][r] = 1
+
+        lines = []
+        for i, it in enumerate(batch):
+            obj: Dict[str, Any] = {
+                "ts": it.ts_ms,
+                "width": it.width,
+                "height": it.height,
+                "seq_id": session.seq_id,
+                "frame_id": first_id + i,
+                "fps": it.fps,
+                "kpts": norm[i].tolist(),
+            }
+            if it.frame_seq is not None:
+                obj["frame_seq"] = it.frame_seq
+            if i in gaps:
+                obj["gap_before"] = gaps[i]
+            if it.extra:
+                obj.update(it.extra)
+            lines.append((json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8"))
+        jsonl.write_lines(lines)
+
+        if binary is not None:
+            cols["kpts"] = norm.astype(np.float32)
+            binary.write(cols)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+        except Exception:
+            pass
 
     def current_seq_id(self) -> Optional[str]:
         with self._lock:
@@ -143,5 +583,3 @@ class PoseRecorder:
     def current_path(self) -> Optional[str]:
         with self._lock:
             return self._path
-
-
@@ -15,7 +15,7 @@ from websocket_manager import websocket_manager
 class PoseWebSocketSender:
     """포즈 데이터와 비디오 프레임을 WebSocket으로 전송하는 독립적인 태스크"""
     
-    def __init__(self, state, infer_pose: InferRunner, infer_hand: InferRunner = None, fps=30, send_video=True, video_quality=85, recorder=None):
+    def __init__(self, state, infer_pose: InferRunner, infer_hand: InferRunner = None, fps=30, send_video=True, video_quality=85, recorder=None, encode_executor=None):
         self.state = state
         self.infer_pose = infer_pose
         self.infer_hand = infer_hand
@@ -27,9 +27,24 @@ class PoseWebSocketSender:
         self.send_video = send_video  # 비디오 전송 여부
         self.video_quality = video_quality  # JPEG 품질 (1-100)
         self.recorder = recorder  # 포즈 데이터 레코더 (optional)
+        self.encode_executor = encode_executor  # JPEG 인코딩 스레드 풀 (없으면 이벤트 루프에서 인코딩)
         
         # 포즈 데이터 프로세서 (공통 로직)
         self.pose_processor = PoseProcessor()
+        
+        # 전송 통계 (/metrics)
+        self.sent_count = 0
+        self.send_fps = 0.0  # EMA
+        
+        # 추론 결과 스트림: 새 결과마다 한 번만 후처리하고 구독자에게 전달
+        self._last_result_id = 0
+        self._latest_processed = None
+        self._last_capture_ts = None
+        self.result_fps = 0.0  # 추론 결과 도착률 (캡처 시각 기준 EMA)
+        self.result_count = 0
+        self._result_listeners = []
+        if recorder is not None:
+            self.add_result_listener(self._record_result)
     
     def start(self):
         """포즈 데이터 전송 태스크 시작"""
@@ -50,6 +65,68 @@ class PoseWebSocketSender:
             self._task.cancel()
         print("📡 포즈 데이터 WebSocket 전송 태스크 정지")
     
+    def get_stats(self):
+        """전송 통계 반환"""
+        return {
+            'target_fps': self.fps,
+            'send_fps': round(self.send_fps, 2),
+            'sent_count': self.sent_count,
+            'send_video': self.send_video,
+            'result_fps': round(self.result_fps, 2),
+            'result_count': self.result_count,
+        }
+    
+    def add_result_listener(self, callback):
+        """후처리된 추론 결과 구독 (결과마다 한 번, 이벤트 루프에서 호출됨)"""
+        self._result_listeners.append(callback)
+    
+    def _process_new_results(self):
+        """마지막 틱 이후 나온 추론 결과를 순서대로 후처리하고 구독자에게 전달"""
+        for raw in self.infer_pose.get_results_since(self._last_result_id):
+            self._last_result_id = raw.result_id
+            result_hand = self.infer_hand.get_latest_result() if self.infer_hand else None
+            # 메타데이터 후처리 파이프라인 (공통 프로세서 사용) - 노이즈 필터는 결과당 한 번만 갱신
+            result = self.pose_processor.postprocess_meta(raw)
+            result = self.pose_processor.add_hand_results(result, result_hand)
+            self._latest_processed = result
+            self.result_count += 1
+            
+            capture_ts = getattr(result, 'capture_ts', None)
+            if capture_ts is not None and self._last_capture_ts is not None:
+                dt = capture_ts - self._last_capture_ts
+                if dt > 0:
+                    self.result_fps = 0.9 * self.result_fps + 0.1 * (1.0 / dt) if self.result_fps else 1.0 / dt
+            self._last_capture_ts = capture_ts
+            
+            for callback in self._result_listeners:
+                try:
+                    callback(result)
+                except Exception:
+                    pass
+    
+    def _record_result(self, result):
+        """Recorder에 포즈 데이터 추가 (활성 상태일 때만, 추론 결과당 한 행)"""
+        if not self.recorder.is_active():
+            return
+        if not hasattr(result, 'keypoints') or result.keypoints is None:
+            return
+        data = result.keypoints.data
+        if len(data) > 0:
+            pts_np = data[0].cpu().numpy()  # (17,3)
+        elif self.recorder.motion_gate:
+            # 사람이 없는 프레임도 게이트에 넘겨 부재로 집계 (idle 후 버려지고, 돌아오면 gap_before 기록)
+            pts_np = np.zeros((17, 3), dtype=np.float32)
+        else:
+            return
+        self.recorder.append(
+            pts_np,
+            int(result.orig_shape[1]),
+            int(result.orig_shape[0]),
+            fps=round(self.result_fps, 2) if self.result_fps else None,
+            capture_ts=getattr(result, 'capture_ts', None),
+            frame_seq=getattr(result, 'frame_seq', None),
+        )
+    
     def _encode_frame(self, frame):
         """프레임을 JPEG base64로 인코딩"""
         if frame is None:
@@ -74,11 +151,11 @@ class PoseWebSocketSender:
                 t0 = time.perf_counter()
                 
                 # 최신 프레임 가져오기
-                frame, frame_seq = self.state.get_latest()
+                frame, frame_seq = self.state.get_latest_display()
                 
-                # 포즈 결과 가져오기
-                result_pose = self.infer_pose.get_latest_result()
-                result_hand = self.infer_hand.get_latest_result() if self.infer_hand else None
+                # 새 추론 결과 후처리 (전송 주기와 무관하게 결과마다 한 번)
+                self._process_new_results()
+                result_pose = self._latest_processed
                 
                 # FPS 제한 확인
                 current_time = time.perf_counter()
@@ -87,10 +164,6 @@ class PoseWebSocketSender:
                     
                     # 포즈 데이터 처리
                     if result_pose is not None:
-                        # 메타데이터 후처리 파이프라인 (공통 프로세서 사용)
-                        result_pose = self.pose_processor.postprocess_meta(result_pose)
-                        result_pose = self.pose_processor.add_hand_results(result_pose, result_hand)
-                        
                         # 포즈 데이터 추출 (공통 프로세서 사용)
                         kpts, hands = self.pose_processor.extract_pose_data(result_pose)
                         
@@ -103,10 +176,17 @@ class PoseWebSocketSender:
                         
                         if hands:
                             payload["hands"] = hands
+                        if getattr(result_pose, 'capture_ts', None) is not None:
+                            payload["capture_ts"] = result_pose.capture_ts  # 포즈가 추론된 프레임의 캡처 시각
                     
                     # 비디오 프레임 처리
                     if self.send_video and frame is not None:
-                        frame_base64 = self._encode_frame(frame)
+                        if self.encode_executor is not None:
+                            # cv2.imencode는 GIL을 놓으므로 풀에서 인코딩하면 이벤트 루프가 막히지 않음
+                            loop = asyncio.get_running_loop()
+                            frame_base64 = await loop.run_in_executor(self.encode_executor, self._encode_frame, frame)
+                        else:
+                            frame_base64 = self._encode_frame(frame)
                         if frame_base64:
                             payload.update({
                                 "type": "frame" if "type" not in payload else "frame_kpts",
@@ -121,21 +201,14 @@ class PoseWebSocketSender:
                     
                     # WebSocket 매니저로 브로드캐스트
                     if payload:
+                        payload["ts"] = time.time()  # 서버 전송 시각 (지연 측정용)
                         await websocket_manager.broadcast(payload)
+                        if self.last_send_time > 0:
+                            dt = current_time - self.last_send_time
+                            if dt > 0:
+                                self.send_fps = 0.9 * self.send_fps + 0.1 * (1.0 / dt) if self.send_fps else 1.0 / dt
                         self.last_send_time = current_time
-                        
-                        # Recorder에 포즈 데이터 추가 (활성 상태일 때만)
-                        if self.recorder is not None and result_pose is not None:
-                            try:
-                                if hasattr(self.recorder, 'is_active') and self.recorder.is_active():
-                                    if hasattr(result_pose, 'keypoints') and result_pose.keypoints is not None:
-                                        pts_np = result_pose.keypoints.data[0].cpu().numpy()  # (17,3)
-                                        W = int(result_pose.orig_shape[1])
-                                        H = int(result_pose.orig_shape[0])
-                                        if hasattr(self.recorder, 'append'):
-                                            self.recorder.append(pts_np, W, H, fps=self.fps)
-                            except Exception:
-                                pass
+                        self.sent_count += 1
                 
                 # FPS 유지를 위한 대기
                 elapsed = time.perf_counter() - t0
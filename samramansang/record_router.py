@@ -16,6 +16,12 @@ from datetime import datetime
 from aiohttp import web
 from aiohttp.web import FileResponse
 
+from training_governor import training_governor
+from dataset_catalog import dataset_catalog
+from recording_summary import recording_summarizer
+from segment_bank import segment_bank
+from training.segment_table import save_table, subset_table, table_for, table_path_for
+
 logger = logging.getLogger(__name__)
 
 
@@ -45,11 +51,15 @@ def auto_add_to_cluster(recorder_path, seq_id):
         
         # 임시 출력 파일 (나중에 기존 파일로 대체)
         temp_embeddings = os.path.abspath(os.path.join(training_dir, "runs", "embeddings_updated.npy"))
+        existing_index = os.path.abspath(os.path.join(training_dir, "runs", "embeddings_index.npz"))
+        temp_index = os.path.abspath(os.path.join(training_dir, "runs", "embeddings_updated_index.npz"))  # add_to_cluster.py가 생성
         temp_windows_index = os.path.abspath(os.path.join(training_dir, "runs", "simclr", "windows_index_updated.json"))
         temp_segments = os.path.abspath(os.path.join(training_dir, "runs", "segments_updated.json"))
         temp_reps = os.path.abspath(os.path.join(training_dir, "runs", "segments_representative_updated.json"))
         temp_final = os.path.abspath(os.path.join(training_dir, "runs", "segments_final_updated.json"))
         
+        final_updated = False
+        
         # 파일 존재 확인
         if not os.path.exists(existing_embeddings):
             logger.warning(f"⚠️ 기존 임베딩 파일이 없습니다: {existing_embeddings}")
@@ -95,7 +105,7 @@ def auto_add_to_cluster(recorder_path, seq_id):
             ]
             
             logger.info(f"🔧 실행 명령어: {' '.join(add_cmd)}")
-            result = subprocess.run(add_cmd, capture_output=True, text=True, timeout=300)
+            result = subprocess.run(training_governor.command(add_cmd), capture_output=True, text=True, timeout=300, **training_governor.popen_kwargs())
             
             if result.returncode != 0:
                 logger.error(f"❌ 클러스터 추가 실패: {result.stderr}")
@@ -121,7 +131,7 @@ def auto_add_to_cluster(recorder_path, seq_id):
             ]
             
             logger.info(f"🔧 실행 명령어: {' '.join(cluster_cmd)}")
-            result = subprocess.run(cluster_cmd, capture_output=True, text=True, timeout=300)
+            result = subprocess.run(training_governor.command(cluster_cmd), capture_output=True, text=True, timeout=300, **training_governor.popen_kwargs())
             
             if result.returncode != 0:
                 logger.error(f"❌ 세그먼트 생성 실패: {result.stderr}")
@@ -145,7 +155,7 @@ def auto_add_to_cluster(recorder_path, seq_id):
             ]
             
             logger.info(f"🔧 실행 명령어: {' '.join(reps_cmd)}")
-            result = subprocess.run(reps_cmd, capture_output=True, text=True, timeout=300)
+            result = subprocess.run(training_governor.command(reps_cmd), capture_output=True, text=True, timeout=300, **training_governor.popen_kwargs())
             
             if result.returncode != 0:
                 logger.warning(f"⚠️ 대표 세그먼트 선택 실패 (무시됨): {result.stderr}")
@@ -175,61 +185,40 @@ def auto_add_to_cluster(recorder_path, seq_id):
                         seg_copy['base_index'] = i
                         final_segments.append(seg_copy)
                     
-                    # 임베딩 로드
-                    E = np.load(temp_embeddings if os.path.exists(temp_embeddings) else existing_embeddings)
-                    if E.ndim == 2 and E.shape[0] > 0:
-                        def _clamp(idx, n):
-                            return max(0, min(int(idx), n - 1))
-                        
-                        N = E.shape[0]
-                        ref = []
-                        tgt = []
-                        for seg in final_segments:
-                            s = _clamp(seg.get('start', 0), N)
-                            e = _clamp(seg.get('end', s), N)
-                            ref.append(E[e])
-                            tgt.append(E[s])
-                        ref = np.asarray(ref, dtype=np.float32)
-                        tgt = np.asarray(tgt, dtype=np.float32)
-                        
-                        def _norm_rows(X):
-                            n = np.linalg.norm(X, axis=1, keepdims=True) + 1e-9
-                            return X / n
-                        
-                        R = _norm_rows(ref)
-                        T = _norm_rows(tgt)
-                        sim = R @ T.T
-                        dist = 1.0 - sim
-                        
-                        M = dist.shape[0]
-                        top_k = 5  # top 5로 변경
-                        for i in range(M):
-                            drow = dist[i].copy()
-                            if 0 <= i < len(drow):
-                                drow[i] = np.inf  # 자기 자신 제외
-                            # 거리 순으로 정렬하여 top_k 선택 (final_segments는 이미 noise 제외됨)
-                            order = np.argsort(drow)[:max(0, int(top_k))]
-                            candidates = []
-                            for j in order:
-                                if np.isfinite(drow[j]):
-                                    candidates.append({'segment_index': int(j), 'distance': float(drow[j])})
-                            final_segments[i]['next_candidates'] = candidates
-                        
-                        # segments_final.json 저장
-                        os.makedirs(os.path.dirname(temp_final) or '.', exist_ok=True)
-                        payload = {
-                            'source': reps_path,
-                            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
-                            'selected_indices': list(range(len(final_segments))),
-                            'distance_metric': 'cosine-transition',
-                            'top_k': int(top_k),
-                            'segments': final_segments
-                        }
-                        with open(temp_final, 'w', encoding='utf-8') as f:
-                            json.dump(payload, f, ensure_ascii=False, indent=2)
-                        logger.info(f"✅ segments_final 생성 완료: {len(final_segments)} 세그먼트")
-                    else:
-                        logger.warning("⚠️ 임베딩 파일 형식이 올바르지 않습니다.")
+                    # 세그먼트 요약 표 (select_representatives.py가 대표 세그먼트 옆에 저장, 없으면 임베딩에서 계산)
+                    table = table_for(reps_path, base_segments,
+                                      temp_embeddings if os.path.exists(temp_embeddings) else existing_embeddings)
+                    table = subset_table(table, [seg['base_index'] for seg in final_segments])
+                    dist = 1.0 - table['end_emb'] @ table['start_emb'].T
+                    
+                    M = dist.shape[0]
+                    top_k = 5  # top 5로 변경
+                    for i in range(M):
+                        drow = dist[i].copy()
+                        if 0 <= i < len(drow):
+                            drow[i] = np.inf  # 자기 자신 제외
+                        # 거리 순으로 정렬하여 top_k 선택 (final_segments는 이미 noise 제외됨)
+                        order = np.argsort(drow)[:max(0, int(top_k))]
+                        candidates = []
+                        for j in order:
+                            if np.isfinite(drow[j]):
+                                candidates.append({'segment_index': int(j), 'distance': float(drow[j])})
+                        final_segments[i]['next_candidates'] = candidates
+                    
+                    # segments_final.json 저장 (요약 표도 옆에 저장)
+                    os.makedirs(os.path.dirname(temp_final) or '.', exist_ok=True)
+                    save_table(table_path_for(temp_final), table, {'segments': os.path.basename(existing_final)})
+                    payload = {
+                        'source': reps_path,
+                        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                        'selected_indices': list(range(len(final_segments))),
+                        'distance_metric': 'cosine-transition',
+                        'top_k': int(top_k),
+                        'segments': final_segments
+                    }
+                    with open(temp_final, 'w', encoding='utf-8') as f:
+                        json.dump(payload, f, ensure_ascii=False, indent=2)
+                    logger.info(f"✅ segments_final 생성 완료: {len(final_segments)} 세그먼트")
                 else:
                     logger.warning(f"⚠️ Representative 세그먼트 파일이 없습니다: {reps_path}")
             except Exception as e:
@@ -266,12 +255,18 @@ def auto_add_to_cluster(recorder_path, seq_id):
             
             # 각 파일 백업 및 대체
             backup_and_replace(existing_embeddings, temp_embeddings, "임베딩")
+            if os.path.exists(temp_index):
+                backup_and_replace(existing_index, temp_index, "임베딩 k-NN 인덱스")
             backup_and_replace(existing_windows_index, temp_windows_index, "Windows Index")
+            # 세그먼트 요약 표는 해당 세그먼트 파일보다 먼저 교체
+            for old_path, new_path in ((existing_segments, temp_segments), (existing_reps, temp_reps), (existing_final, temp_final)):
+                if os.path.exists(new_path) and os.path.exists(table_path_for(new_path)):
+                    backup_and_replace(table_path_for(old_path), table_path_for(new_path), "세그먼트 요약 표")
             backup_and_replace(existing_segments, temp_segments, "Segments")
             if os.path.exists(temp_reps):
                 backup_and_replace(existing_reps, temp_reps, "Representative Segments")
             if os.path.exists(temp_final):
-                backup_and_replace(existing_final, temp_final, "Segments Final")
+                final_updated = backup_and_replace(existing_final, temp_final, "Segments Final")
             
             logger.info(f"🎉 자동 클러스터 추가 완료! (seq_id: {seq_id})")
             logger.info(f"📁 업데이트된 파일 (백업: .backup_{timestamp}):")
@@ -283,6 +278,10 @@ def auto_add_to_cluster(recorder_path, seq_id):
             
         finally:
             os.chdir(original_cwd)
+        
+        # 6. 세그먼트 프레임 뱅크 재생성 (작업 디렉토리 복원 후, 백그라운드)
+        if final_updated:
+            segment_bank.schedule_build()
             
     except subprocess.TimeoutExpired:
         logger.error(f"❌ 타임아웃: 클러스터 추가 작업이 너무 오래 걸렸습니다.")
@@ -300,6 +299,8 @@ async def websocket_toggle_recording_handler(request, recorder):
             # 녹화 중지
             seq_id = recorder.stop()
             recording_path = recorder.current_path()
+            dataset_catalog.notify_changed()  # 새 녹화를 목록에 바로 반영
+            recording_summarizer.schedule(recording_path)  # 요약/썸네일은 백그라운드에서 생성
             message = "녹화가 중지되었습니다."
             print(f"📹 WebSocket 녹화 중지됨 (seq_id: {seq_id})")
             
@@ -357,6 +358,7 @@ async def websocket_cancel_recording_handler(request, recorder):
         
         # 녹화 취소 (파일 삭제)
         seq_id = recorder.cancel()
+        dataset_catalog.notify_changed()  # 삭제된 녹화를 목록에서 바로 제거
         message = "녹화가 취소되었습니다 (저장되지 않음)."
         print(f"📹 WebSocket 녹화 취소됨 (seq_id: {seq_id}, 파일 삭제됨)")
         
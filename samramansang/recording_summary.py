@@ -0,0 +1,267 @@
+"""
+녹화 요약 생성기
+녹화가 끝나면 백그라운드 스레드에서 파일을 한 번 훑어 요약 정보와 스켈레톤 몽타주 썸네일을 만든다.
+- <base>.summary.json: 프레임 수, 재생 시간, 평균 신뢰도, 움직임 에너지, 검출 비율
+- <base>.thumb.png: 일정 간격 시점의 스켈레톤을 이어붙인 썸네일
+목록 API는 사이드카만 읽으므로 원본 데이터를 건드리지 않고 녹화를 훑어볼 수 있다.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from dataset_index import dataset_index
+from pose_codec import as_pose_array, normalize_keypoints, sanitize
+from training.window_dataset import recording_chunk_paths
+
+SUMMARY_VERSION = 1
+SUMMARY_BATCH_FRAMES = int(os.getenv("SUMMARY_BATCH_FRAMES", "2000"))
+SUMMARY_THUMB_SAMPLES = int(os.getenv("SUMMARY_THUMB_SAMPLES", "6"))
+SUMMARY_THUMB_SIZE = int(os.getenv("SUMMARY_THUMB_SIZE", "96"))
+# 이 시간 동안 변경이 없는 녹화만 요약 (쓰는 중인 파일 제외)
+SUMMARY_IDLE_SECONDS = float(os.getenv("SUMMARY_IDLE_SECONDS", "10"))
+CONF_THRESHOLD = 0.3
+
+# COCO 17 키포인트 스켈레톤 (renderer/keypoint-renderer.js와 동일)
+SKELETON = [
+    (5, 7), (7, 9), (6, 8), (8, 10), (5, 6), (5, 11), (6, 12),
+    (11, 12), (11, 13), (13, 15), (12, 14), (14, 16),
+    (0, 1), (0, 2), (1, 3), (2, 4),
+]
+
+
+def _base(path: str) -> str:
+    for ext in ('.jsonl', '.parquet'):
+        if path.endswith(ext):
+            return path[:-len(ext)]
+    return path
+
+
+def summary_path(path: str) -> str:
+    return _base(path) + '.summary.json'
+
+
+def thumbnail_path(path: str) -> str:
+    return _base(path) + '.thumb.png'
+
+
+def source_key(path: str) -> Tuple[int, float]:
+    """요약이 최신인지 판단하는 (전체 청크 크기, 최신 mtime)"""
+    size, mtime = 0, 0.0
+    for c in recording_chunk_paths(path):
+        st = os.stat(c)
+        size += st.st_size
+        mtime = max(mtime, st.st_mtime)
+    return size, mtime
+
+
+def load_summary(path: str) -> Optional[Dict[str, Any]]:
+    """원본과 일치하는 요약 사이드카 (없거나 오래됐으면 None)"""
+    try:
+        with open(summary_path(path), 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+        if summary.get('version') != SUMMARY_VERSION:
+            return None
+        if list(summary.get('source', [])) != list(source_key(path)):
+            return None
+        return summary
+    except (OSError, ValueError):
+        return None
+
+
+def _parse_frames(data: bytes):
+    """JSONL 바이트열 -> (정규화 키포인트 (N,17,3), ts_ms (N,), gap (N,)) - 키포인트 없는 프레임은 NaN"""
+    lines = [ln for ln in data.splitlines() if ln.strip()]
+    kpts = np.full((len(lines), 17, 3), np.nan, dtype=np.float32)
+    ts = np.full(len(lines), np.nan, dtype=np.float64)
+    gap = np.zeros(len(lines), dtype=bool)
+    for i, line in enumerate(lines):
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            continue
+        if obj.get('ts') is not None:
+            ts[i] = float(obj['ts'])
+        gap[i] = bool(obj.get('gap_before'))
+        k = obj.get('kpts', obj.get('keypoints'))
+        if not k:
+            continue
+        try:
+            arr = as_pose_array(k)[0]
+        except ValueError:
+            continue
+        w, h = int(obj.get('width') or 0), int(obj.get('height') or 0)
+        if w > 0 and h > 0 and float(np.nanmax(arr[:, :2])) > 1.0:
+            arr = normalize_keypoints(arr[None], w, h, np.float32)[0]
+        kpts[i] = np.clip(sanitize(arr), 0.0, 1.0)
+    return kpts, ts, gap
+
+
+def _draw_tile(norm: Optional[np.ndarray], size: int, aspect: float = 1.0) -> np.ndarray:
+    tile = np.full((size, size, 3), 17, dtype=np.uint8)
+    if norm is None or np.isnan(norm).any():
+        cv2.line(tile, (size // 3, size // 2), (2 * size // 3, size // 2), (60, 60, 60), 1)
+        return tile
+    valid = norm[:, 2] >= CONF_THRESHOLD
+    if not valid.any():
+        return tile
+    # 보이는 키포인트의 경계 상자를 타일에 맞춤 (원본 프레임 종횡비 유지)
+    xy_all = norm[:, :2] * np.array([aspect, 1.0], dtype=np.float32)
+    xy = xy_all[valid]
+    lo, hi = xy.min(axis=0), xy.max(axis=0)
+    scale = (size * 0.85) / max(float((hi - lo).max()), 1e-3)
+    center = (lo + hi) / 2.0
+    pts = ((xy_all - center) * scale + size / 2.0).astype(np.int32)
+    for a, b in SKELETON:
+        if valid[a] and valid[b]:
+            cv2.line(tile, tuple(pts[a]), tuple(pts[b]), (80, 200, 120), 2, cv2.LINE_AA)
+    for j in np.flatnonzero(valid):
+        cv2.circle(tile, tuple(pts[j]), 2, (80, 160, 255), -1, cv2.LINE_AA)
+    return tile
+
+
+def build_summary(path: str) -> Dict[str, Any]:
+    """녹화 전체를 배치로 읽어 통계를 계산하고 요약/썸네일 사이드카를 기록"""
+    key = source_key(path)
+    info = dataset_index.info(path)
+    total = int(info['frame_count'])
+    samples = SUMMARY_THUMB_SAMPLES
+    sample_idx = set(np.linspace(0, max(0, total - 1), samples).astype(int).tolist()) if total else set()
+    sample_kpts: Dict[int, np.ndarray] = {}
+
+    conf_sum, conf_n, detected = 0.0, 0, 0
+    motion_sum, motion_n = 0.0, 0
+    prev_k, prev_ts = None, None
+    for start in range(0, total, SUMMARY_BATCH_FRAMES):
+        data, start, end, _ = dataset_index.read_range(path, start, start + SUMMARY_BATCH_FRAMES)
+        kpts, ts, gap = _parse_frames(data)
+        for i in range(len(kpts)):
+            if start + i in sample_idx:
+                sample_kpts[start + i] = kpts[i]
+        has = ~np.isnan(kpts[:, 0, 0])
+        detected += int(has.sum())
+        if has.any():
+            conf_sum += float(kpts[has, :, 2].sum())
+            conf_n += int(has.sum()) * kpts.shape[1]
+
+        # 움직임 에너지: 연속 프레임 간 신뢰 키포인트의 평균 이동량 (정규화 좌표/초)
+        if prev_k is not None:
+            # 이전 배치의 마지막 프레임과 이어서 계산
+            k_all = np.concatenate([prev_k[None], kpts])
+            t_all = np.concatenate([[prev_ts], ts])
+            g_all = np.concatenate([[False], gap])
+        else:
+            k_all, t_all, g_all = kpts, ts, gap
+        if len(k_all) > 1:
+            a, b = k_all[:-1], k_all[1:]
+            dt = (t_all[1:] - t_all[:-1]) / 1000.0
+            ok = (a[:, :, 2] >= CONF_THRESHOLD) & (b[:, :, 2] >= CONF_THRESHOLD)
+            disp = np.linalg.norm(b[:, :, :2] - a[:, :, :2], axis=2)
+            per_frame = np.where(ok, disp, 0.0).sum(axis=1) / np.maximum(ok.sum(axis=1), 1)
+            valid = ok.any(axis=1) & ~g_all[1:] & np.isfinite(dt) & (dt > 0)
+            if valid.any():
+                motion_sum += float((per_frame[valid] / dt[valid]).sum())
+                motion_n += int(valid.sum())
+        if len(kpts):
+            prev_k, prev_ts = kpts[-1], ts[-1]
+
+    size = SUMMARY_THUMB_SIZE
+    meta = info.get('metadata', {})
+    aspect = float(meta.get('width') or 1) / float(meta.get('height') or 1)
+    ordered = sorted(sample_kpts)
+    montage = np.concatenate([_draw_tile(sample_kpts[i], size, aspect) for i in ordered], axis=1) if ordered \
+        else _draw_tile(None, size)
+    cv2.imwrite(thumbnail_path(path), montage)
+
+    first_ts = (info.get('first_frame') or {}).get('ts')
+    summary = {
+        'version': SUMMARY_VERSION,
+        'source': list(key),
+        'frame_count': total,
+        'duration_s': info.get('duration_s'),
+        'mean_confidence': round(conf_sum / conf_n, 4) if conf_n else None,
+        'motion_energy': round(motion_sum / motion_n, 4) if motion_n else None,
+        'detected_ratio': round(detected / total, 4) if total else None,
+        'thumbnail': os.path.basename(thumbnail_path(path)),
+        'thumbnail_frames': ordered,
+        'first_ts': first_ts,
+        'created_at': time.time(),
+    }
+    tmp = summary_path(path) + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False)
+    os.replace(tmp, summary_path(path))
+    return summary
+
+
+class RecordingSummarizer:
+    """요약 생성 작업 큐 (전용 스레드 하나, 같은 파일 중복 요청은 합침)"""
+
+    def __init__(self):
+        self._queue = deque()
+        self._pending = set()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._failed: Dict[str, Tuple[int, float]] = {}  # 실패한 파일 -> 당시 source_key (바뀌기 전에는 재시도 안 함)
+        self.built = 0
+        self.failed = 0
+
+    def schedule(self, path: str):
+        if not path:
+            return
+        failed_key = self._failed.get(path)
+        if failed_key is not None:
+            try:
+                if source_key(path) == failed_key:
+                    return
+            except OSError:
+                return
+        with self._cond:
+            if path in self._pending:
+                return
+            self._pending.add(path)
+            self._queue.append(path)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="recording-summary", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def schedule_if_idle(self, path: str, modified: float):
+        """일정 시간 변경이 없는(녹화가 끝난) 파일만 예약"""
+        if time.time() - modified >= SUMMARY_IDLE_SECONDS:
+            self.schedule(path)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                path = self._queue.popleft()
+            try:
+                if os.path.exists(path) and load_summary(path) is None:
+                    build_summary(path)
+                    self.built += 1
+                    print(f"🖼️ 녹화 요약 생성: {path}")
+            except Exception as e:
+                self.failed += 1
+                try:
+                    self._failed[path] = source_key(path)
+                except OSError:
+                    pass
+                print(f"⚠️ 녹화 요약 생성 실패 ({path}): {e}")
+            finally:
+                with self._cond:
+                    self._pending.discard(path)
+
+    def get_stats(self):
+        return {'pending': len(self._pending), 'built': self.built, 'failed': self.failed}
+
+
+# 전역 요약 생성기 (녹화 종료 시/카탈로그 스캔 시 예약)
+recording_summarizer = RecordingSummarizer()
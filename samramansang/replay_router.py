@@ -0,0 +1,60 @@
+"""
+Replay 관련 라우터
+리플레이 캡처 소스의 상태 조회 및 루프/탐색/배속 제어
+"""
+
+from aiohttp import web
+
+
+async def replay_status_handler(request, control):
+    """리플레이 상태 조회"""
+    if control is None or control.source is None:
+        return web.json_response({'status': 'ok', 'active': False})
+    return web.json_response({'status': 'ok', 'active': True, **control.status()})
+
+
+async def replay_control_handler(request, control):
+    """리플레이 제어 (seek / rate / loop)"""
+    try:
+        if control is None or control.source is None:
+            return web.json_response({"error": "리플레이 소스가 활성화되어 있지 않습니다."}, status=400)
+
+        # 파라미터를 먼저 모두 검증 (잘못된 값은 400, 일부만 적용되지 않도록)
+        try:
+            data = await request.json()
+            if not isinstance(data, dict):
+                raise TypeError("JSON 객체가 필요합니다")
+            seek = int(data['seek']) if 'seek' in data else None
+            rate = float(data['rate']) if 'rate' in data else None
+        except (KeyError, TypeError, ValueError) as e:
+            return web.json_response({"error": f"잘못된 파라미터: {e}"}, status=400)
+
+        if seek is not None:
+            control.seek(seek)
+        if rate is not None:
+            control.set_rate(rate)
+        if 'loop' in data:
+            control.set_loop(bool(data['loop']))
+
+        return web.json_response({'status': 'ok', 'active': True, **control.status()})
+
+    except Exception as e:
+        print(f"❌ 리플레이 제어 오류: {e}")
+        return web.json_response({"error": str(e)}, status=500)
+
+
+def setup_replay_routes(app, control):
+    """Replay 관련 라우트들을 앱에 등록
+
+    Args:
+        app: aiohttp web.Application 인스턴스
+        control: ReplayControl 인스턴스 (카메라 모드에서는 None)
+    """
+    async def status_handler(request):
+        return await replay_status_handler(request, control)
+
+    async def control_handler(request):
+        return await replay_control_handler(request, control)
+
+    app.router.add_get('/replay/status', status_handler)
+    app.router.add_post('/replay/control', control_handler)
@@ -0,0 +1,257 @@
+"""
+리플레이 캡처 소스
+카메라 없이 실시간 경로(추론 → 후처리 → 브로드캐스트)를 재현하기 위한 모듈
+
+- 비디오 파일 재생: 캡처 스레드 대신 파일 프레임을 SharedState에 공급 (추론은 그대로 수행)
+- 녹화 JSONL 재생: 추론을 건너뛰고 기록된 포즈를 InferRunner와 같은 인터페이스로 공급
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from cpu_tuning import CPU_AFFINITY_CAPTURE, pin_current_thread
+from frame_processor import FrameScaler
+from shared_state import SharedState
+
+
+class ReplayControl:
+    """재생 제어 상태 (루프/탐색/배속) - HTTP 핸들러와 재생 스레드가 공유"""
+
+    def __init__(self, rate: float = 1.0, loop: bool = True, start: int = 0):
+        self._lock = threading.Lock()
+        self.rate = max(0.0, float(rate))  # 1.0 = 원래 속도, 0 = 가능한 한 빠르게
+        self.loop = bool(loop)
+        self.position = 0
+        self.total = 0
+        self.finished = False
+        self.source = None
+        self._seek_to = int(start) if start else None
+
+    def seek(self, frame: int):
+        with self._lock:
+            self._seek_to = max(0, int(frame))
+            self.finished = False
+
+    def take_seek(self):
+        """대기 중인 탐색 요청을 꺼냄 (없으면 None)"""
+        with self._lock:
+            seek_to = self._seek_to
+            self._seek_to = None
+            return seek_to
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self.rate = max(0.0, float(rate))
+
+    def set_loop(self, loop: bool):
+        with self._lock:
+            self.loop = bool(loop)
+            if self.loop:
+                self.finished = False
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                'source': self.source,
+                'rate': self.rate,
+                'loop': self.loop,
+                'position': self.position,
+                'total': self.total,
+                'finished': self.finished,
+            }
+
+
+class _Pacer:
+    """재생 속도에 맞춘 대기 (밀린 경우 누적하지 않고 재동기화)"""
+
+    def __init__(self):
+        self.next_t = time.perf_counter()
+
+    def reset(self):
+        self.next_t = time.perf_counter()
+
+    def wait(self, dt: float, rate: float):
+        if rate <= 0:
+            return
+        self.next_t += dt / rate
+        delay = self.next_t - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        elif delay < -0.5:
+            self.next_t = time.perf_counter()
+
+
+def start_video_replay_thread(state: SharedState, path: str, control: ReplayControl, scaler: FrameScaler = None):
+    """비디오 파일을 원래 속도(또는 배속)로 SharedState에 공급하는 스레드 시작"""
+    scaler = scaler or FrameScaler()
+    control.source = f"video:{path}"
+
+    def _loop():
+        pin_current_thread(CPU_AFFINITY_CAPTURE, 'capture')
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            print(f"❌ 리플레이 비디오를 열 수 없습니다: {path}")
+            return
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        if not np.isfinite(fps) or fps <= 0:
+            fps = 30.0
+        control.total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        print(f"🎞️ 비디오 리플레이 시작: {path} ({control.total} frames, {fps:.1f} fps)")
+        pacer = _Pacer()
+        try:
+            while not state.stop:
+                seek_to = control.take_seek()
+                if seek_to is not None:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, seek_to)
+                    control.position = seek_to
+                    pacer.reset()
+
+                ok, frame = cap.read()
+                if not ok:
+                    if control.loop:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        control.position = 0
+                        pacer.reset()
+                        continue
+                    control.finished = True
+                    time.sleep(0.05)
+                    continue
+
+                infer_frame, display_frame = scaler(frame)
+                state.update_frame(frame, infer_frame, display_frame)
+                control.position += 1
+                pacer.wait(1.0 / fps, control.rate)
+        finally:
+            cap.release()
+
+    th = threading.Thread(target=_loop, daemon=True)
+    th.start()
+    return th
+
+
+class _ReplayKeypoints:
+    def __init__(self, data):
+        self.data = data  # torch.Tensor (1, 17, 3), 픽셀 좌표
+
+
+class ReplayResult:
+    """ultralytics Results 중 후처리/전송 단계가 사용하는 최소 인터페이스"""
+
+    def __init__(self, kpts_px: np.ndarray, width: int, height: int, ts: float = None, seq: int = 0):
+        import torch
+        self.keypoints = _ReplayKeypoints(torch.from_numpy(kpts_px).unsqueeze(0))
+        self.boxes = None
+        self.orig_shape = (int(height), int(width))
+        self.capture_ts = ts
+        self.frame_seq = seq
+
+
+class PoseReplayRunner:
+    """
+    녹화된 JSONL 포즈 세션을 추론 결과처럼 공급 (InferRunner 대체)
+    기록된 ts 간격을 따라 재생하며, ts가 없으면 fps(기본 30) 기준으로 재생한다.
+    """
+
+    def __init__(self, state: SharedState, path: str, control: ReplayControl, default_fps: float = 30.0):
+        from training.window_dataset import read_jsonl
+
+        self.state = state
+        self.path = path
+        self.control = control
+        self.default_fps = float(default_fps)
+        self.results_q = deque(maxlen=8)
+        self.result_id = 0
+        self.thread = None
+        self._frames = read_jsonl(path)
+        if not self._frames:
+            raise RuntimeError(f"리플레이할 포즈 프레임이 없습니다: {path}")
+        control.source = f"jsonl:{path}"
+        control.total = len(self._frames)
+
+    def _frame_dt(self, i: int) -> float:
+        cur = self._frames[i]
+        nxt = self._frames[i + 1] if i + 1 < len(self._frames) else None
+        if nxt is not None and cur.get('ts') is not None and nxt.get('ts') is not None:
+            dt = (float(nxt['ts']) - float(cur['ts'])) / 1000.0
+            if 0.0 < dt < 1.0:
+                return dt
+        fps = cur.get('fps') or self.default_fps
+        return 1.0 / float(fps)
+
+    def _to_result(self, i: int) -> ReplayResult:
+        item = self._frames[i]
+        w = int(item.get('width') or 640)
+        h = int(item.get('height') or 480)
+        k = item.get('kpts') or []
+        k = (list(k) + [[0.0, 0.0, 0.0]] * 17)[:17]
+        kpts = np.asarray(k, dtype=np.float32).reshape(17, -1)[:, :3]
+        kpts[:, 0] *= w
+        kpts[:, 1] *= h
+        return ReplayResult(kpts, w, h, ts=time.time(), seq=i)
+
+    def start(self):
+        def _loop():
+            print(f"🎞️ 포즈 리플레이 시작: {self.path} ({len(self._frames)} frames)")
+            pacer = _Pacer()
+            i = 0
+            while not self.state.stop:
+                seek_to = self.control.take_seek()
+                if seek_to is not None:
+                    i = min(seek_to, len(self._frames) - 1)
+                    pacer.reset()
+
+                if i >= len(self._frames):
+                    if self.control.loop:
+                        i = 0
+                        pacer.reset()
+                        continue
+                    self.control.finished = True
+                    time.sleep(0.05)
+                    continue
+
+                result = self._to_result(i)
+                self.result_id += 1
+                result.result_id = self.result_id
+                self.results_q.append(result)
+                self.control.position = i + 1
+                dt = self._frame_dt(i)
+                i += 1
+                pacer.wait(dt, self.control.rate)
+
+        self.thread = threading.Thread(target=_loop, daemon=True)
+        self.thread.start()
+
+    def get_stats(self):
+        """InferRunner.get_stats()와 같은 형태 (리플레이는 추론 지연 없음)"""
+        return {
+            'device': 'replay',
+            'infer_count': self.control.position,
+            'last_latency_ms': 0.0,
+            'latency_ms_ema': 0.0,
+            'infer_fps': 0.0,
+            'result_age_ms': None,
+        }
+
+    def get_results_since(self, last_id):
+        return [r for r in list(self.results_q) if r.result_id > last_id]
+
+    def get_latest_result(self):
+        try:
+            return self.results_q[-1]
+        except IndexError:
+            return None
+
+
+def parse_capture_source(source: str):
+    """'camera' | 'video:<path>' | 'jsonl:<path>' -> (kind, path)"""
+    source = (source or 'camera').strip()
+    if ':' in source:
+        kind, path = source.split(':', 1)
+        kind = kind.strip().lower()
+        if kind in ('video', 'jsonl'):
+            return kind, os.path.expanduser(path.strip())
+    return 'camera', None
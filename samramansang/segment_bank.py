@@ -0,0 +1,178 @@
+"""
+세그먼트 프레임 뱅크
+segments_final.json이 저장되면 training/build_segment_bank.py가 참조된 모든 프레임을 미리 뽑아 둔다.
+- segment_bank.npy: 이어붙인 float32 (F, 17, 3) 프레임 (정규화 x, y, 신뢰도)
+- segment_bank.json: 세그먼트 -> (offset, length, width, height, scale, anchor, runs)
+서버는 뱅크를 메모리 맵으로 열어 세그먼트 하나를 복사 없이 배열 슬라이스로 응답하고,
+클라이언트는 전체 뱅크를 ETag로 캐시되는 파일 하나로 받는다.
+segments_final.json이 뱅크를 만든 뒤 바뀌었으면 사용하지 않는다 (segment_frames 런타임 조회로 대체).
+"""
+
+import os
+import subprocess
+import sys
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from artifact_cache import artifact_cache
+from segment_frames import SEGMENT_JSONL_PATTERNS, SEGMENT_SOURCES, WINDOWS_INDEX_PATH
+from training_governor import training_governor
+
+BANK_PATH = 'training/runs/segment_bank.npy'
+BANK_TABLE_PATH = 'training/runs/segment_bank.json'
+SEGMENT_BANK_TIMEOUT = float(os.getenv("SEGMENT_BANK_TIMEOUT", "600"))
+BUILD_SCRIPT = 'training/build_segment_bank.py'
+
+
+class SegmentBank:
+    """뱅크 메모리 맵/표 캐시와 백그라운드 생성"""
+
+    def __init__(self, bank_path: str = BANK_PATH, table_path: str = BANK_TABLE_PATH):
+        self.bank_path = bank_path
+        self.table_path = table_path
+        self._lock = threading.Lock()
+        self._key = None
+        self._table: Optional[Dict[str, Any]] = None
+        self._frames: Optional[np.ndarray] = None
+
+        self._build_lock = threading.Lock()
+        self._building = False
+        self._rebuild = False
+        self.builds = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+    def _load(self) -> Tuple[Optional[Dict[str, Any]], Optional[np.ndarray]]:
+        """표/뱅크 파일이 바뀌었을 때만 다시 연다 (없거나 서로 맞지 않으면 None)"""
+        try:
+            key = (os.stat(self.table_path).st_mtime_ns, os.stat(self.bank_path).st_mtime_ns)
+        except OSError:
+            return None, None
+        with self._lock:
+            if key == self._key:
+                return self._table, self._frames
+        try:
+            table = artifact_cache.json(self.table_path)
+            frames = artifact_cache.npy(self.bank_path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 세그먼트 뱅크 읽기 실패: {e}")
+            return None, None
+        if frames.dtype != np.float32 or frames.shape[1:] != (17, 3) or frames.shape[0] != table.get('frames'):
+            # 표와 뱅크 교체 사이에 읽은 경우 - 다음 요청에서 다시 확인
+            return None, None
+        with self._lock:
+            self._key, self._table, self._frames = key, table, frames
+        return table, frames
+
+    def _current(self) -> Tuple[Optional[Dict[str, Any]], Optional[np.ndarray]]:
+        table, frames = self._load()
+        if table is None:
+            return None, None
+        # 세그먼트 파일과 windows_index.json 모두 뱅크를 만들 때와 같아야 최신
+        try:
+            source_mtime = os.stat(SEGMENT_SOURCES['final']).st_mtime_ns
+            windows_mtime = os.stat(WINDOWS_INDEX_PATH).st_mtime_ns
+        except OSError:
+            return None, None
+        if table.get('source_mtime_ns') != source_mtime or table.get('windows_index_mtime_ns') != windows_mtime:
+            return None, None
+        return table, frames
+
+    def current(self) -> Optional[Dict[str, Any]]:
+        """segments_final.json과 일치하는 뱅크 표 (없거나 오래됐으면 None)"""
+        return self._current()[0]
+
+    def segment_view(self, index: int) -> Tuple[Dict[str, Any], memoryview]:
+        """세그먼트 하나의 표 항목과 프레임 바이트 (메모리 맵 슬라이스, 복사 없음)"""
+        table, frames = self._current()
+        if table is None:
+            raise LookupError("세그먼트 뱅크가 없거나 최신이 아닙니다")
+        entries = table.get('segments', [])
+        if index < 0 or index >= len(entries):
+            raise IndexError(f"세그먼트 인덱스 범위 초과: {index}")
+        entry = entries[index]
+        view = frames[entry['offset']:entry['offset'] + entry['length']]
+        return entry, memoryview(view.reshape(-1).view(np.uint8))
+
+    def etag_paths(self):
+        return [self.table_path, self.bank_path, SEGMENT_SOURCES['final'], WINDOWS_INDEX_PATH]
+
+    # ------------------------------------------------------------------
+    # 생성
+    # ------------------------------------------------------------------
+    def schedule_build(self, segments_path: str = SEGMENT_SOURCES['final']):
+        """백그라운드 스레드에서 뱅크 생성 (생성 중이면 끝난 뒤 한 번 더)"""
+        with self._build_lock:
+            if self._building:
+                self._rebuild = True
+                return
+            self._building = True
+        threading.Thread(target=self._build_loop, args=(segments_path,), name="segment-bank", daemon=True).start()
+
+    def ensure_current(self):
+        """segments_final.json은 있는데 뱅크가 없거나 오래됐으면 생성 예약 (서버 시작 시)"""
+        if os.path.exists(SEGMENT_SOURCES['final']) and self.current() is None:
+            self.schedule_build()
+
+    def _build_loop(self, segments_path: str):
+        while True:
+            self.build(segments_path)
+            with self._build_lock:
+                if not self._rebuild:
+                    self._building = False
+                    return
+                self._rebuild = False
+
+    def build(self, segments_path: str = SEGMENT_SOURCES['final']) -> bool:
+        """build_segment_bank.py 실행 (학습 거버너 설정으로 우선순위를 낮춤)"""
+        if not os.path.exists(segments_path) or not os.path.exists(WINDOWS_INDEX_PATH):
+            return False
+        cmd = [
+            sys.executable, '-u', BUILD_SCRIPT,
+            '--segments', segments_path,
+            '--windows_index_json', WINDOWS_INDEX_PATH,
+            '--files_glob', *SEGMENT_JSONL_PATTERNS,
+            '--out', self.bank_path,
+            '--table_out', self.table_path,
+        ]
+        print(f"[SEGMENT_BANK] {' '.join(cmd)}")
+        try:
+            result = subprocess.run(
+                training_governor.command(cmd), capture_output=True, text=True, timeout=SEGMENT_BANK_TIMEOUT,
+                **training_governor.popen_kwargs()
+            )
+        except subprocess.TimeoutExpired:
+            self.failed += 1
+            self.last_error = "timeout"
+            print("⚠️ 세그먼트 뱅크 생성 타임아웃")
+            return False
+        if result.returncode != 0:
+            self.failed += 1
+            self.last_error = (result.stderr or '').strip()[-500:]
+            print(f"⚠️ 세그먼트 뱅크 생성 실패: {self.last_error}")
+            return False
+        self.builds += 1
+        self.last_error = None
+        print(f"🏦 세그먼트 뱅크 생성 완료: {result.stdout.strip()}")
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        table = self.current()
+        return {
+            'available': table is not None,
+            'frames': table.get('frames') if table else None,
+            'segments': len(table.get('segments', [])) if table else None,
+            'building': self._building,
+            'builds': self.builds,
+            'failed': self.failed,
+            'last_error': self.last_error,
+        }
+
+
+# 전역 세그먼트 뱅크 (segments_router에서 조회, 최종 세그먼트 저장 시 생성 예약)
+segment_bank = SegmentBank()
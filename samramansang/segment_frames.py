@@ -0,0 +1,144 @@
+"""
+세그먼트 단위 프레임 조회
+segments(_final).json의 세그먼트 인덱스를 windows_index.json으로 (녹화 파일, 프레임 구간)으로 풀고,
+해당 프레임만 인덱스로 읽어 바이너리로 반환한다. 클라이언트는 전체 JSONL 대신 필요한 세그먼트만 가져온다.
+
+응답 형식: u32(메타 JSON 길이) + 메타 JSON + encode_frame 프레임들 (runs 순서대로 연속)
+  메타: {"format", "runs": [{"segment_index", "file", "start", "count", "fps"}]}
+구간 계산은 segments-utils.js appendSegmentFrames와 같다 (같은 파일에서 겹치는 윈도우는 이어서).
+"""
+
+import json
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from artifact_cache import artifact_cache
+from dataset_catalog import dataset_catalog
+from dataset_index import dataset_index
+from pose_codec import PACK_DTYPES, encode_jsonl_line
+from training.window_dataset import segment_runs
+
+SEGMENT_FRAME_CACHE = int(os.getenv("SEGMENT_FRAME_CACHE", "256"))
+
+WINDOWS_INDEX_PATH = 'training/runs/simclr/windows_index.json'
+SEGMENT_SOURCES = {
+    'final': 'training/runs/segments_final.json',
+    'representative': 'training/runs/segments_representative.json',
+    'segments': 'training/runs/segments.json',
+}
+SEGMENT_JSONL_PATTERNS = [
+    'dataset/raw/*.jsonl',
+    'training/dataset/raw/*.jsonl',
+]
+DEFAULT_FPS = 30.0
+META_LEN = struct.Struct('<I')
+
+
+class SegmentFrameResolver:
+    """세그먼트 -> 프레임 구간 해석과 인코딩 결과 LRU 캐시"""
+
+    def __init__(self, cache_size: int = SEGMENT_FRAME_CACHE):
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self.cache_size = cache_size
+
+    def segments(self, source: str = 'final') -> List[Dict[str, Any]]:
+        data = artifact_cache.json(SEGMENT_SOURCES[source])
+        return data.get('segments', []) if isinstance(data, dict) else data
+
+    def artifact_paths(self, source: str = 'final') -> List[str]:
+        return [SEGMENT_SOURCES[source], WINDOWS_INDEX_PATH]
+
+    @staticmethod
+    def _recordings() -> Dict[str, Dict[str, Any]]:
+        """녹화 파일 basename(확장자 제외) -> 카탈로그 항목 (path, size, modified)"""
+        return {f['name'][:-len('.jsonl')]: f for f in dataset_catalog.files(SEGMENT_JSONL_PATTERNS)}
+
+    def resolve(self, index: int, source: str = 'final', edges: bool = False) -> List[Dict[str, Any]]:
+        """
+        세그먼트 하나 -> [{"segment_index", "file", "start", "count"}] 프레임 구간 목록
+        edges=True면 첫 윈도우의 첫 프레임과 마지막 윈도우의 마지막 프레임만
+        """
+        segs = self.segments(source)
+        if index < 0 or index >= len(segs):
+            raise IndexError(f"세그먼트 인덱스 범위 초과: {index}")
+        windows_index = artifact_cache.json(WINDOWS_INDEX_PATH)
+        windows = windows_index.get('windows', [])
+        T = int(windows_index.get('window', 32))
+        seg = segs[index]
+        ws = int(seg.get('start', 0))
+        we = int(seg.get('end', ws))
+
+        def base_of(wrec):
+            return (wrec.get('file') or '').replace('.jsonl', '')
+
+        if edges:
+            runs = []
+            if 0 <= ws < len(windows):
+                runs.append({'segment_index': index, 'file': base_of(windows[ws]), 'start': int(windows[ws]['start']), 'count': 1})
+            if 0 <= we < len(windows):
+                runs.append({'segment_index': index, 'file': base_of(windows[we]), 'start': int(windows[we]['start']) + T - 1, 'count': 1})
+            return runs
+
+        return [{'segment_index': index, **run} for run in segment_runs(seg, windows, T)]
+
+    def encode(self, indices: List[int], source: str = 'final', edges: bool = False, fmt: str = 'u16') -> bytes:
+        """세그먼트들의 프레임을 응답 바이너리로 (세그먼트별 인코딩 결과는 캐시)"""
+        if fmt not in PACK_DTYPES:
+            raise ValueError(f"지원하지 않는 포맷입니다: {fmt}")
+        key_mtimes = tuple(os.path.getmtime(p) for p in self.artifact_paths(source))
+        recordings = self._recordings()
+        runs_meta: List[Dict[str, Any]] = []
+        bodies: List[bytes] = []
+        for index in indices:
+            runs = self.resolve(index, source, edges)
+            # 세그먼트가 참조하는 녹화 파일의 (크기, 수정 시각)도 키에 포함 (녹화가 바뀌면 다시 인코딩)
+            rec_stamps = tuple(
+                (name, recordings[name]['size'], recordings[name]['modified']) if name in recordings else (name, None, None)
+                for name in sorted({run['file'] for run in runs})
+            )
+            key = (source, index, edges, fmt, key_mtimes, rec_stamps)
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+            if cached is None:
+                cached = self._encode_segment(runs, fmt, recordings)
+                with self._lock:
+                    self._cache[key] = cached
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            meta, body = cached
+            runs_meta.extend(meta)
+            bodies.append(body)
+        meta_bytes = json.dumps({'format': fmt, 'runs': runs_meta}, ensure_ascii=False).encode('utf-8')
+        return META_LEN.pack(len(meta_bytes)) + meta_bytes + b''.join(bodies)
+
+    def _encode_segment(self, runs, fmt, recordings):
+        meta, parts = [], []
+        for run in runs:
+            entry = recordings.get(run['file'])
+            if entry is None:
+                continue  # 녹화 파일 없음 (클라이언트도 해당 구간을 건너뜀)
+            path = entry['path']
+            info = dataset_index.info(path)
+            fps = float((info.get('metadata') or {}).get('fps') or DEFAULT_FPS)
+            data, start, end, _ = dataset_index.read_range(path, run['start'], run['start'] + run['count'])
+            lines = [ln for ln in data.splitlines() if ln.strip()]
+            if not lines:
+                continue
+            for i, line in enumerate(lines):
+                parts.append(encode_jsonl_line(line, start + i, fps, fmt)[1])
+            meta.append(dict(run, start=start, count=len(lines), fps=fps))
+        return meta, b''.join(parts)
+
+    def etag_paths(self, source: str = 'final') -> List[str]:
+        """응답 ETag 계산용 파일 (세그먼트/윈도우 산출물 + 녹화 파일)"""
+        return self.artifact_paths(source) + sorted(f['path'] for f in self._recordings().values())
+
+
+# 전역 리졸버 (segments_router에서 사용)
+segment_frame_resolver = SegmentFrameResolver()
@@ -4,11 +4,27 @@ runs/ 폴더의 세그먼트 파일들 제공 기능
 """
 
 import os
-import glob
+import sys
 import json
+import time
+import asyncio
 from aiohttp import web
 from aiohttp.web import FileResponse
 
+from artifact_cache import artifact_cache
+from http_stream import JsonFileString, file_etag, not_modified, stream_files, stream_json
+from dataset_catalog import dataset_catalog
+from training.segment_table import load_table, save_table, subset_table, table_for, table_path_for
+from training.window_dataset import recording_chunk_paths
+from segment_frames import SEGMENT_JSONL_PATTERNS, SEGMENT_SOURCES, segment_frame_resolver
+from segment_bank import segment_bank
+from job_manager import JobCancelled, job_manager
+from jobs_router import job_accepted_response
+from training_governor import training_governor
+
+# 한 번에 조회할 수 있는 최대 세그먼트 수 (edges=1은 제한 없음)
+MAX_SEGMENTS_PER_REQUEST = 64
+
 
 async def segments_page_handler(request):
     """Segments 페이지 제공"""
@@ -21,39 +37,17 @@ async def auto_files_handler(request):
         # 자동으로 찾을 파일들
         auto_files = {}
         
-        # 1. JSONL 파일들 (dataset/raw에서)
-        jsonl_patterns = [
-            'dataset/raw/*.jsonl',
-            'training/dataset/raw/*.jsonl'
-        ]
-        
-        jsonl_files = []
-        for pattern in jsonl_patterns:
-            files = glob.glob(pattern)
-            for file_path in files:
-                if os.path.exists(file_path):
-                    stat = os.stat(file_path)
-                    jsonl_files.append({
-                        'path': file_path,
-                        'name': os.path.basename(file_path),
-                        'size': stat.st_size,
-                        'modified': stat.st_mtime
-                    })
+        # 1. JSONL 파일들 (dataset/raw에서, 카탈로그 스냅샷)
+        jsonl_files = dataset_catalog.files(SEGMENT_JSONL_PATTERNS)
         
         # 최신 JSONL 파일 선택
         if jsonl_files:
             auto_files['jsonl'] = max(jsonl_files, key=lambda x: x['modified'])
         
         # 2. Windows Index 파일 (training/runs/simclr/windows_index.json)
-        windows_path = 'training/runs/simclr/windows_index.json'
-        if os.path.exists(windows_path):
-            stat = os.stat(windows_path)
-            auto_files['windows'] = {
-                'path': windows_path,
-                'name': 'windows_index.json',
-                'size': stat.st_size,
-                'modified': stat.st_mtime
-            }
+        windows = dataset_catalog.artifact('training/runs/simclr/windows_index.json')
+        if windows:
+            auto_files['windows'] = windows
         
         # 3. Segments 파일들 (training/runs/에서 segments 관련 파일)
         segments_candidates = []
@@ -62,14 +56,9 @@ async def auto_files_handler(request):
             'training/runs/segments_representative.json',
             'training/runs/segments.json'
         ]:
-            if os.path.exists(p):
-                stat = os.stat(p)
-                segments_candidates.append({
-                    'path': p,
-                    'name': os.path.basename(p),
-                    'size': stat.st_size,
-                    'modified': stat.st_mtime
-                })
+            entry = dataset_catalog.artifact(p)
+            if entry:
+                segments_candidates.append(entry)
         # 선호 순서: segments_final.json > 최신 기타
         if segments_candidates:
             preferred = next((x for x in segments_candidates if x['name'] == 'segments_final.json'), None)
@@ -87,44 +76,26 @@ async def auto_files_handler(request):
 
 
 async def auto_load_files_handler(request):
-    """자동으로 모든 필요한 파일들을 로드"""
+    """
+    자동으로 모든 필요한 파일들을 로드
+    ?jsonl=0: 녹화 JSONL 내용은 제외 (프레임은 /segments/frames로 세그먼트 단위 조회)
+    """
     try:
+        include_jsonl = request.query.get('jsonl', '1') != '0'
         # 자동으로 찾을 파일들
         auto_files = {}
         
-        # 1. JSONL 파일들 (dataset/raw에서)
-        jsonl_patterns = [
-            'dataset/raw/*.jsonl',
-            'training/dataset/raw/*.jsonl'
-        ]
-        
-        jsonl_files = []
-        for pattern in jsonl_patterns:
-            files = glob.glob(pattern)
-            for file_path in files:
-                if os.path.exists(file_path):
-                    stat = os.stat(file_path)
-                    jsonl_files.append({
-                        'path': file_path,
-                        'name': os.path.basename(file_path),
-                        'size': stat.st_size,
-                        'modified': stat.st_mtime
-                    })
+        # 1. JSONL 파일들 (dataset/raw에서, 카탈로그 스냅샷)
+        jsonl_files = dataset_catalog.files(SEGMENT_JSONL_PATTERNS)
         
         # 모든 JSONL 파일 처리 (여러 파일 지원)
-        if jsonl_files:
+        if jsonl_files and include_jsonl:
             auto_files['jsonl'] = jsonl_files  # 단일 파일이 아닌 파일 리스트로 변경
         
         # 2. Windows Index 파일 (training/runs/simclr/windows_index.json)
-        windows_path = 'training/runs/simclr/windows_index.json'
-        if os.path.exists(windows_path):
-            stat = os.stat(windows_path)
-            auto_files['windows'] = {
-                'path': windows_path,
-                'name': 'windows_index.json',
-                'size': stat.st_size,
-                'modified': stat.st_mtime
-            }
+        windows = dataset_catalog.artifact('training/runs/simclr/windows_index.json')
+        if windows:
+            auto_files['windows'] = windows
         
         # 3. Segments 파일들 (training/runs/에서 segments 관련 파일)
         # original: 대표 또는 원본 중 최신(단, final 제외)
@@ -133,121 +104,82 @@ async def auto_load_files_handler(request):
             'training/runs/segments_representative.json',
             'training/runs/segments.json'
         ]:
-            if os.path.exists(p):
-                stat = os.stat(p)
-                seg_orig_candidates.append({
-                    'path': p,
-                    'name': os.path.basename(p),
-                    'size': stat.st_size,
-                    'modified': stat.st_mtime
-                })
+            entry = dataset_catalog.artifact(p)
+            if entry:
+                seg_orig_candidates.append(entry)
         if seg_orig_candidates:
             auto_files['segments'] = max(seg_orig_candidates, key=lambda x: x['modified'])
         # final: 별도 키로 제공
-        final_path = 'training/runs/segments_final.json'
-        if os.path.exists(final_path):
-            stat = os.stat(final_path)
-            auto_files['segments_final'] = {
-                'path': final_path,
-                'name': os.path.basename(final_path),
-                'size': stat.st_size,
-                'modified': stat.st_mtime
-            }
+        segments_final = dataset_catalog.artifact('training/runs/segments_final.json')
+        if segments_final:
+            auto_files['segments_final'] = segments_final
         
+        # 파일 내용은 응답을 보내면서 청크 단위로 읽어 스트리밍 (응답 구조는 동일)
         loaded_data = {}
         
-        # JSONL 파일들 로드 (여러 파일 지원)
+        # JSONL 파일들 (여러 파일 지원: 개행으로 연결, 청크로 나뉜 녹화는 모든 청크 포함)
+        jsonl_paths = [c for f in auto_files.get('jsonl', []) for c in recording_chunk_paths(f['path'])]
         if 'jsonl' in auto_files:
             jsonl_files = auto_files['jsonl']
-            if isinstance(jsonl_files, list):
-                # 여러 파일인 경우
-                all_content = []
-                all_info = []
-                for jsonl_file in jsonl_files:
-                    try:
-                        with open(jsonl_file['path'], 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        all_content.append(content)
-                        all_info.append(jsonl_file)
-                    except Exception as e:
-                        print(f"❌ JSONL 파일 로드 오류 ({jsonl_file['path']}): {e}")
-                
-                # 모든 파일의 내용을 합침
-                combined_content = '\n'.join(all_content)
-                loaded_data['jsonl'] = {
-                    'content': combined_content,
-                    'info': all_info,
-                    'multiple_files': True
-                }
-            else:
-                # 단일 파일인 경우 (기존 로직)
-                try:
-                    with open(jsonl_files['path'], 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    loaded_data['jsonl'] = {
-                        'content': content,
-                        'info': jsonl_files,
-                        'multiple_files': False
-                    }
-                except Exception as e:
-                    print(f"❌ JSONL 파일 로드 오류: {e}")
-        
-        # Windows 파일 로드
-        if 'windows' in auto_files:
-            windows_path = auto_files['windows']['path']
-            try:
-                with open(windows_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                loaded_data['windows'] = {
-                    'content': content,
-                    'info': auto_files['windows']
-                }
-            except Exception as e:
-                print(f"❌ Windows 파일 로드 오류: {e}")
+            loaded_data['jsonl'] = {
+                'content': JsonFileString(jsonl_paths),
+                'info': jsonl_files,
+                'multiple_files': True
+            }
         
-        # Segments 파일 로드 (original)
-        if 'segments' in auto_files:
-            segments_path = auto_files['segments']['path']
-            try:
-                with open(segments_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                loaded_data['segments'] = {
-                    'content': content,
-                    'info': auto_files['segments']
+        # Windows / Segments(original, final) 파일
+        for key in ('windows', 'segments', 'segments_final'):
+            if key in auto_files:
+                loaded_data[key] = {
+                    'content': JsonFileString(auto_files[key]['path']),
+                    'info': auto_files[key]
                 }
-            except Exception as e:
-                print(f"❌ Segments 파일 로드 오류: {e}")
-        # Segments 파일 로드 (final)
-        if 'segments_final' in auto_files:
-            segments_final_path = auto_files['segments_final']['path']
-            try:
-                with open(segments_final_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                loaded_data['segments_final'] = {
-                    'content': content,
-                    'info': auto_files['segments_final']
-                }
-            except Exception as e:
-                print(f"❌ Segments Final 파일 로드 오류: {e}")
         
-        return web.json_response({
+        paths = list(jsonl_paths)
+        paths += [auto_files[k]['path'] for k in ('windows', 'segments', 'segments_final') if k in auto_files]
+        return await stream_json(request, {
             'status': 'ok',
             'loaded_files': loaded_data,
             'found': list(loaded_data.keys())
-        })
+        }, etag=file_etag(paths, extra=f'segments-auto-load:{int(include_jsonl)}'))
         
     except Exception as e:
         print(f"❌ 자동 파일 로드 오류: {e}")
         return web.json_response({"error": str(e)}, status=500)
 
 
+def _load_distance_file(path):
+    """거리 파일 -> {'metadata', 'nearest_segments'} (npz 희소 이웃 목록, 이전 JSON 형식도 지원)"""
+    if not path.endswith('.npz'):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data.pop('distance_matrix', None)  # 클라이언트는 이웃 목록만 사용
+        return data
+
+    import numpy as _np
+    with _np.load(path) as z:
+        metadata = json.loads(str(z['metadata']))
+        neighbors = z['neighbors']
+        distances = z['distances']
+    nearest_segments = [
+        [
+            {'segment_index': int(j), 'distance': float(d), 'rank': r + 1}
+            for r, (j, d) in enumerate(zip(neighbors[i], distances[i]))
+        ]
+        for i in range(neighbors.shape[0])
+    ]
+    return {'metadata': metadata, 'nearest_segments': nearest_segments}
+
+
 async def segment_distances_handler(request):
-    """세그먼트 거리 정보 로드"""
+    """세그먼트 거리 정보 로드 (top-k 이웃 목록)"""
     try:
         # 세그먼트 거리 파일 찾기
         distance_files = []
         distance_patterns = [
+            'training/runs/segment_distances.npz',
             'training/runs/segment_distances.json',
+            'segment_distances.npz',
             'segment_distances.json'
         ]
         
@@ -269,9 +201,9 @@ async def segment_distances_handler(request):
         # 가장 최신 파일 선택
         distance_file = max(distance_files, key=lambda x: x['modified'])
         
-        # 파일 내용 로드
-        with open(distance_file['path'], 'r', encoding='utf-8') as f:
-            distance_data = json.load(f)
+        # 파일 내용 로드 (executor, 변환 결과는 파일이 바뀔 때까지 공용 캐시에 유지)
+        loop = asyncio.get_running_loop()
+        distance_data = await loop.run_in_executor(None, artifact_cache.get, distance_file['path'], 'distances', _load_distance_file)
         
         return web.json_response({
             'status': 'ok',
@@ -284,160 +216,302 @@ async def segment_distances_handler(request):
         return web.json_response({"error": str(e)}, status=500)
 
 
+def _run_distance_calculation(job, params):
+    """거리 계산 스크립트 실행 (작업 스레드, 취소 시 서브프로세스 종료)"""
+    cmd = [
+        sys.executable, 'training/calculate_segment_distances.py',
+        '--embeddings', params['embeddings_path'],
+        '--segments', params['segments_path'],
+        '--out', params['output_path'],
+        '--top_k', str(params['top_k']),
+    ]
+    if params.get('dense'):
+        cmd.append('--dense')
+    print(f"[DISTANCE_CALC] {' '.join(cmd)}")
+    job.update(0.05, '거리 계산 스크립트 실행 중')
+    returncode, stdout, stderr = job.run_subprocess(training_governor.command(cmd), **training_governor.popen_kwargs())
+    if returncode != 0:
+        raise RuntimeError(f"거리 계산 실패: {stderr}")
+    return {
+        'message': '세그먼트 거리 계산이 완료되었습니다.',
+        'output_file': params['output_path'],
+        'stdout': stdout
+    }
+
+
 async def calculate_distances_handler(request):
-    """세그먼트 거리 계산 실행"""
+    """세그먼트 거리 계산 작업 등록 (202 + job_id, 진행 상황은 /jobs/{id})"""
     try:
         data = await request.json()
         
         # 기본 파라미터 설정
-        embeddings_path = data.get('embeddings_path', 'training/runs/embeddings.npy')
-        segments_path = data.get('segments_path', 'training/runs/segments.json')
-        output_path = data.get('output_path', 'training/runs/segment_distances.json')
-        top_k = data.get('top_k', 3)
+        params = {
+            'embeddings_path': data.get('embeddings_path', 'training/runs/embeddings.npy'),
+            'segments_path': data.get('segments_path', 'training/runs/segments.json'),
+            'output_path': data.get('output_path', 'training/runs/segment_distances.npz'),
+            'top_k': int(data.get('top_k', 3)),
+            'dense': bool(data.get('dense', False)),
+        }
         
-        # 파일 존재 확인
-        if not os.path.exists(embeddings_path):
+        # 파일 존재 확인 (세그먼트 요약 표가 있으면 임베딩 파일은 필요 없음)
+        if not os.path.exists(params['segments_path']):
             return web.json_response({
-                "error": f"임베딩 파일을 찾을 수 없습니다: {embeddings_path}"
+                "error": f"세그먼트 파일을 찾을 수 없습니다: {params['segments_path']}"
             }, status=400)
         
-        if not os.path.exists(segments_path):
+        if not os.path.exists(table_path_for(params['segments_path'])) and not os.path.exists(params['embeddings_path']):
             return web.json_response({
-                "error": f"세그먼트 파일을 찾을 수 없습니다: {segments_path}"
+                "error": f"임베딩 파일을 찾을 수 없습니다: {params['embeddings_path']}"
             }, status=400)
         
-        # 거리 계산 스크립트 실행
-        import subprocess
-        cmd = [
-            'python', 'training/calculate_segment_distances.py',
-            '--embeddings', embeddings_path,
-            '--segments', segments_path,
-            '--out', output_path,
-            '--top_k', str(top_k)
-        ]
-        
-        print(f"[DISTANCE_CALC] {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        job, created = job_manager.submit('segment_distances', params, lambda job: _run_distance_calculation(job, params))
+        return job_accepted_response(job, created)
         
-        return web.json_response({
-            'status': 'ok',
-            'message': '세그먼트 거리 계산이 완료되었습니다.',
-            'output_file': output_path,
-            'stdout': result.stdout
-        })
-        
-    except subprocess.CalledProcessError as e:
-        return web.json_response({
-            "error": f"거리 계산 실패: {e.stderr}"
-        }, status=500)
     except Exception as e:
         print(f"❌ 거리 계산 오류: {e}")
         return web.json_response({"error": str(e)}, status=500)
 
 
+def _build_final_segments(job, params):
+    """선택된 세그먼트 + 이웃 후보(next_candidates)로 최종 리스트 생성/저장 (작업 스레드)"""
+    import numpy as _np
+
+    job.update(0.05, '세그먼트 파일 읽는 중')
+    base_data = artifact_cache.json(params['base_segments_path'])
+    base_segments = base_data.get('segments', base_data)
+    if not isinstance(base_segments, list):
+        raise ValueError('세그먼트 파일 포맷이 올바르지 않습니다.')
+
+    total = len(base_segments)
+    include_indices = params['include_indices']
+    exclude_indices = params['exclude_indices']
+    if include_indices:
+        selected_idx = sorted(set(int(i) for i in include_indices if 0 <= int(i) < total))
+    else:
+        selected_idx = list(range(total))
+    if exclude_indices:
+        ex = set(int(i) for i in exclude_indices)
+        selected_idx = [i for i in selected_idx if i not in ex]
+
+    final_segments = []
+    for i in selected_idx:
+        seg = dict(base_segments[i])
+        seg['base_index'] = i
+        final_segments.append(seg)
+
+    # 세그먼트 요약 표(시작/끝 임베딩, 정규화됨)에서 선택된 행만 사용 (표가 없을 때만 임베딩에서 계산)
+    job.update(0.2, '세그먼트 요약 표 읽는 중')
+    table = table_for(params['base_segments_path'], base_segments, params['embeddings_path'],
+                      load=lambda p: artifact_cache.get(p, 'segment_table', load_table))
+    table = subset_table(table, selected_idx)
+
+    job.update(0.4, '전이 거리 계산 중')
+    dist = 1.0 - table['end_emb'] @ table['start_emb'].T
+
+    M = dist.shape[0]
+    top_k = max(0, min(int(params['top_k']), M))
+    if M:
+        _np.fill_diagonal(dist, _np.inf)  # 자기 자신 제외
+    if top_k:
+        order = _np.argsort(dist, axis=1)[:, :top_k]
+    else:
+        order = _np.zeros((M, 0), dtype=_np.int64)
+    job.update(0.7, '이웃 후보 정리 중')
+    for i in range(M):
+        drow = dist[i]
+        final_segments[i]['next_candidates'] = [
+            {'segment_index': int(j), 'distance': float(drow[j])}
+            for j in order[i] if _np.isfinite(drow[j])
+        ]
+
+    job.update(0.85, '저장 중')
+    output_path = params['output_path']
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    payload = {
+        'source': params['base_segments_path'],
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'selected_indices': selected_idx,
+        'distance_metric': 'cosine-transition',
+        'top_k': int(params['top_k']),
+        'segments': final_segments
+    }
+    # 요약 표와 JSON을 모두 임시 파일에 쓰고, 취소되지 않았을 때만 함께 교체
+    # (표를 먼저 교체해 segments_final을 읽는 쪽이 같은 세그먼트의 표를 찾도록)
+    table_path = table_path_for(output_path)
+    tmp_table_path = table_path + '.new'
+    save_table(tmp_table_path, table, {'segments': os.path.basename(output_path)})
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    try:
+        job.check_cancelled()
+    except JobCancelled:
+        for p in (tmp_table_path, tmp_path):
+            if os.path.exists(p):
+                os.remove(p)
+        raise
+    os.replace(tmp_table_path, table_path)
+    os.replace(tmp_path, output_path)
+
+    # 세그먼트 프레임 뱅크는 백그라운드에서 다시 생성 (끝나기 전까지는 /segments/frames로 조회)
+    bank_scheduled = os.path.abspath(output_path) == os.path.abspath(SEGMENT_SOURCES['final'])
+    if bank_scheduled:
+        segment_bank.schedule_build()
+
+    return {'saved_path': output_path, 'num_segments': len(final_segments), 'segment_bank_scheduled': bank_scheduled}
+
+
 async def save_final_segments_handler(request):
-    """선택된 세그먼트로 최종 리스트를 생성하고, 이웃 후보(next_candidates)를 포함해 저장"""
+    """최종 세그먼트 저장 작업 등록 (202 + job_id, 결과는 /jobs/{id}의 result)"""
     try:
         data = await request.json()
 
-        base_segments_path = data.get('base_segments_path')
-        embeddings_path = data.get('embeddings_path', 'training/runs/embeddings.npy')
-        output_path = data.get('output_path', 'training/runs/segments_final.json')
-        include_indices = data.get('include_indices') or []
-        exclude_indices = data.get('exclude_indices') or []
-        top_k = int(data.get('top_k', 3))
+        params = {
+            'base_segments_path': data.get('base_segments_path'),
+            'embeddings_path': data.get('embeddings_path', 'training/runs/embeddings.npy'),
+            'output_path': data.get('output_path', 'training/runs/segments_final.json'),
+            'include_indices': sorted(set(int(i) for i in (data.get('include_indices') or []))),
+            'exclude_indices': sorted(set(int(i) for i in (data.get('exclude_indices') or []))),
+            'top_k': int(data.get('top_k', 3)),
+        }
 
         # 기본 세그먼트 경로 추론
-        if not base_segments_path:
+        if not params['base_segments_path']:
             if os.path.exists('training/runs/segments_final.json'):
-                base_segments_path = 'training/runs/segments_final.json'
+                params['base_segments_path'] = 'training/runs/segments_final.json'
             elif os.path.exists('training/runs/segments_representative.json'):
-                base_segments_path = 'training/runs/segments_representative.json'
+                params['base_segments_path'] = 'training/runs/segments_representative.json'
             else:
-                base_segments_path = 'training/runs/segments.json'
-
-        if not os.path.exists(base_segments_path):
-            return web.json_response({'error': f'세그먼트 파일을 찾을 수 없습니다: {base_segments_path}'}, status=400)
-        if not os.path.exists(embeddings_path):
-            return web.json_response({'error': f'임베딩 파일을 찾을 수 없습니다: {embeddings_path}'}, status=400)
-
-        with open(base_segments_path, 'r', encoding='utf-8') as f:
-            base_data = json.load(f)
-        base_segments = base_data.get('segments', base_data)
-        if not isinstance(base_segments, list):
-            return web.json_response({'error': '세그먼트 파일 포맷이 올바르지 않습니다.'}, status=400)
-
-        total = len(base_segments)
-        if include_indices:
-            selected_idx = sorted(set(int(i) for i in include_indices if 0 <= int(i) < total))
-        else:
-            selected_idx = list(range(total))
-        if exclude_indices:
-            ex = set(int(i) for i in exclude_indices)
-            selected_idx = [i for i in selected_idx if i not in ex]
-
-        final_segments = []
-        for i in selected_idx:
-            seg = dict(base_segments[i])
-            seg['base_index'] = i
-            final_segments.append(seg)
-
-        import numpy as _np
-        E = _np.load(embeddings_path)
-        if E.ndim != 2 or E.shape[0] == 0:
-            return web.json_response({'error': '임베딩 파일 형식이 올바르지 않습니다.'}, status=400)
-
-        def _clamp(idx, n):
-            return max(0, min(int(idx), n - 1))
-
-        N = E.shape[0]
-        ref = []
-        tgt = []
-        for seg in final_segments:
-            s = _clamp(seg.get('start', 0), N)
-            e = _clamp(seg.get('end', s), N)
-            ref.append(E[e])
-            tgt.append(E[s])
-        ref = _np.asarray(ref, dtype=_np.float32)
-        tgt = _np.asarray(tgt, dtype=_np.float32)
-
-        def _norm_rows(X):
-            n = _np.linalg.norm(X, axis=1, keepdims=True) + 1e-9
-            return X / n
-
-        R = _norm_rows(ref)
-        T = _norm_rows(tgt)
-        sim = R @ T.T
-        dist = 1.0 - sim
-
-        M = dist.shape[0]
-        for i in range(M):
-            drow = dist[i].copy()
-            if 0 <= i < len(drow):
-                drow[i] = _np.inf
-            order = _np.argsort(drow)[:max(0, int(top_k))]
-            candidates = []
-            for j in order:
-                if _np.isfinite(drow[j]):
-                    candidates.append({'segment_index': int(j), 'distance': float(drow[j])})
-            final_segments[i]['next_candidates'] = candidates
-
-        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
-        payload = {
-            'source': base_segments_path,
-            'created_at': __import__('time').strftime('%Y-%m-%dT%H:%M:%SZ', __import__('time').gmtime()),
-            'selected_indices': selected_idx,
-            'distance_metric': 'cosine-transition',
-            'top_k': int(top_k),
-            'segments': final_segments
-        }
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
+                params['base_segments_path'] = 'training/runs/segments.json'
+
+        if not os.path.exists(params['base_segments_path']):
+            return web.json_response({'error': f"세그먼트 파일을 찾을 수 없습니다: {params['base_segments_path']}"}, status=400)
+        # 요약 표가 있으면 임베딩 파일은 필요 없음
+        if not os.path.exists(table_path_for(params['base_segments_path'])) and not os.path.exists(params['embeddings_path']):
+            return web.json_response({'error': f"세그먼트 요약 표와 임베딩 파일을 찾을 수 없습니다: {table_path_for(params['base_segments_path'])}"}, status=400)
 
-        return web.json_response({'status': 'ok', 'saved_path': output_path, 'num_segments': len(final_segments)})
+        job, created = job_manager.submit('save_final_segments', params, lambda job: _build_final_segments(job, params))
+        return job_accepted_response(job, created)
     except Exception as e:
         print(f"❌ 최종 세그먼트 저장 오류: {e}")
         return web.json_response({"error": str(e)}, status=500)
+
+
+async def segment_frames_handler(request):
+    """
+    세그먼트 프레임 조회 (바이너리, segment_frames 모듈 형식)
+    ?index=3 또는 ?indices=3,5,9 (edges=1이면 indices=all 가능)
+    &edges=1: 세그먼트 경계(첫/마지막) 프레임만, &source=final|representative|segments, &format=u16|f16|f32
+    """
+    try:
+        source = request.query.get('source', 'final')
+        if source not in SEGMENT_SOURCES:
+            return web.json_response({"error": f"알 수 없는 세그먼트 소스입니다: {source}"}, status=400)
+        if not os.path.exists(SEGMENT_SOURCES[source]):
+            return web.json_response({"error": "세그먼트 파일을 찾을 수 없습니다"}, status=404)
+        edges = request.query.get('edges', '0') == '1'
+        fmt = request.query.get('format', 'u16')
+        
+        raw = request.query.get('indices', request.query.get('index'))
+        if raw is None:
+            return web.json_response({"error": "세그먼트 인덱스가 필요합니다"}, status=400)
+        loop = asyncio.get_running_loop()
+        if raw == 'all':
+            if not edges:
+                return web.json_response({"error": "indices=all은 edges=1에서만 지원됩니다"}, status=400)
+            segs = await loop.run_in_executor(None, segment_frame_resolver.segments, source)
+            indices = list(range(len(segs)))
+        else:
+            try:
+                indices = [int(x) for x in raw.split(',') if x.strip()]
+            except ValueError:
+                return web.json_response({"error": "잘못된 세그먼트 인덱스입니다"}, status=400)
+            if not edges and len(indices) > MAX_SEGMENTS_PER_REQUEST:
+                return web.json_response({"error": f"한 번에 최대 {MAX_SEGMENTS_PER_REQUEST}개 세그먼트까지 조회할 수 있습니다"}, status=400)
+        
+        etag = file_etag(segment_frame_resolver.etag_paths(source), extra=f'{source}:{raw}:{int(edges)}:{fmt}')
+        if not_modified(request, etag):
+            return web.Response(status=304, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+        
+        body = await loop.run_in_executor(None, segment_frame_resolver.encode, indices, source, edges, fmt)
+        return web.Response(
+            body=body,
+            content_type='application/octet-stream',
+            headers={'ETag': etag, 'Cache-Control': 'no-cache'}
+        )
+    
+    except IndexError as e:
+        return web.json_response({"error": str(e)}, status=404)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    except Exception as e:
+        print(f"❌ 세그먼트 프레임 조회 오류: {e}")
+        return web.json_response({"error": str(e)}, status=500)
+
+
+async def segment_bank_table_handler(request):
+    """세그먼트 뱅크 표 (segments_final.json과 일치할 때만, 아니면 404)"""
+    try:
+        loop = asyncio.get_running_loop()
+        table = await loop.run_in_executor(None, segment_bank.current)
+        if table is None:
+            return web.json_response({"error": "세그먼트 뱅크가 없거나 최신이 아닙니다"}, status=404)
+        etag = file_etag(segment_bank.etag_paths(), extra='table')
+        if not_modified(request, etag):
+            return web.Response(status=304, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+        return web.json_response(table, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+    except Exception as e:
+        print(f"❌ 세그먼트 뱅크 표 조회 오류: {e}")
+        return web.json_response({"error": str(e)}, status=500)
+
+
+async def segment_bank_handler(request):
+    """
+    세그먼트 뱅크 조회
+    인덱스 없이: 전체 .npy 파일 (ETag로 캐시, 변경 없으면 304)
+    ?index=3: 세그먼트 하나의 float32 (length, 17, 3) 바이트 (메모리 맵 슬라이스를 복사 없이 전송)
+    """
+    try:
+        loop = asyncio.get_running_loop()
+        raw = request.query.get('index')
+        if raw is None:
+            table = await loop.run_in_executor(None, segment_bank.current)
+            if table is None:
+                return web.json_response({"error": "세그먼트 뱅크가 없거나 최신이 아닙니다"}, status=404)
+            return await stream_files(
+                request, [segment_bank.bank_path],
+                headers={'X-Bank-Frames': str(table.get('frames', 0))},
+                etag=file_etag(segment_bank.etag_paths(), extra='bank')
+            )
+
+        try:
+            index = int(raw)
+        except ValueError:
+            return web.json_response({"error": "잘못된 세그먼트 인덱스입니다"}, status=400)
+        etag = file_etag(segment_bank.etag_paths(), extra=f'slice:{index}')
+        if not_modified(request, etag):
+            return web.Response(status=304, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+        entry, body = await loop.run_in_executor(None, segment_bank.segment_view, index)
+        return web.Response(
+            body=body,
+            content_type='application/octet-stream',
+            headers={
+                'ETag': etag,
+                'Cache-Control': 'no-cache',
+                'X-Frame-Count': str(entry['length']),
+                'X-Frame-Width': str(entry.get('width') or 0),
+                'X-Frame-Height': str(entry.get('height') or 0),
+            }
+        )
+
+    except LookupError as e:
+        # IndexError 포함 (범위 초과 / 뱅크 없음)
+        return web.json_response({"error": str(e)}, status=404)
+    except Exception as e:
+        print(f"❌ 세그먼트 뱅크 조회 오류: {e}")
+        return web.json_response({"error": str(e)}, status=500)
+
+
 def setup_segments_routes(app):
     """Segments 관련 라우트들을 앱에 등록"""
     # Segments 페이지 라우트
@@ -446,6 +520,9 @@ def setup_segments_routes(app):
     # 자동 파일 관련 API
     app.router.add_get('/segments/auto-files', auto_files_handler)
     app.router.add_get('/segments/auto-load', auto_load_files_handler)
+    app.router.add_get('/segments/frames', segment_frames_handler)
+    app.router.add_get('/segments/bank', segment_bank_handler)
+    app.router.add_get('/segments/bank/table', segment_bank_table_handler)
     
     # 세그먼트 거리 관련 API
     app.router.add_get('/segments/distances', segment_distances_handler)
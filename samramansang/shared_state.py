@@ -1,18 +1,38 @@
 import threading
+import time
 
 
 class SharedState:
     def __init__(self):
         self.lock = threading.Lock()
         self.latest_frame = None   # 가장 최신 프레임 (BGR np.ndarray)
+        self.latest_infer_frame = None    # 추론용 축소 프레임 (없으면 latest_frame과 동일)
+        self.latest_display_frame = None  # 전송(JPEG 인코딩)용 프레임 (없으면 latest_frame과 동일)
         self.latest_seq = 0        # 증가하는 시퀀스 번호
+        self.latest_ts = None      # 최신 프레임 캡처 시각 (unix 초)
         self.stop = False
 
-    def update_frame(self, frame):
+    def update_frame(self, frame, infer_frame=None, display_frame=None):
         with self.lock:
             self.latest_frame = frame
+            self.latest_infer_frame = infer_frame if infer_frame is not None else frame
+            self.latest_display_frame = display_frame if display_frame is not None else frame
             self.latest_seq += 1
+            self.latest_ts = time.time()
 
     def get_latest(self):
         with self.lock:
             return self.latest_frame, self.latest_seq
+
+    def get_latest_infer(self):
+        with self.lock:
+            return self.latest_infer_frame, self.latest_seq
+
+    def get_latest_infer_stamped(self):
+        """추론용 프레임과 시퀀스 번호, 캡처 시각"""
+        with self.lock:
+            return self.latest_infer_frame, self.latest_seq, self.latest_ts
+
+    def get_latest_display(self):
+        with self.lock:
+            return self.latest_display_frame, self.latest_seq
@@ -16,7 +16,19 @@ const legendItems = document.getElementById('legendItems');
 let points = null; // Float32Array [N,2]
 let labels = null; // Int32Array [N]
 let bbox = null;   // [minx, maxx, miny, maxy]
-let previews = null; // [{w,h,kpts}]
+let pointIds = null; // Uint32Array [N] window id of each loaded point (LOD subset)
+let labelCounts = null; // {label: count} over all windows (before LOD thinning)
+const previewCache = new Map(); // window id -> {w,h,kpts} | Promise
+let hoverToken = 0;
+
+// Tile pyramid (/embeddings/tiles): bbox is the visible range in [0,1] map coordinates
+const TILE_PX = 256;          // target on-screen size of one tile
+const TILE_CACHE_MAX = 512;
+let tileInfo = null;          // {total, max_zoom, tile_grid, label_counts}
+const tileCache = new Map();  // "z/x/y" -> Promise<decoded tile | null>
+let tileToken = 0;
+let tileTimer = null;
+let dragStart = null;         // {x, y, bbox} while panning
 
 function setStatus(msg) { statusDiv.textContent = msg; }
 
@@ -26,8 +38,8 @@ function updateLegend() {
         return;
     }
 
-    // Find unique labels
-    const uniqueLabels = [...new Set(labels)].sort((a, b) => a - b);
+    // Find unique labels (tiled view: all labels of the run, not only the visible ones)
+    const uniqueLabels = (tileInfo && labelCounts ? Object.keys(labelCounts).map(Number) : [...new Set(labels)]).sort((a, b) => a - b);
 
     if (uniqueLabels.length === 0) {
         legend.style.display = 'none';
@@ -48,7 +60,7 @@ function updateLegend() {
         }
         const color = colorPalette[label % colorPalette.length];
         const labelText = `Cluster ${label}`;
-        const count = labels.filter(l => l === label).length;
+        const count = labelCounts && labelCounts[label] !== undefined ? labelCounts[label] : labels.filter(l => l === label).length;
 
         legendHTML += `
             <div style="display:flex; align-items:center; margin-bottom:4px;">
@@ -131,6 +143,7 @@ function draw() {
             ctx.fillStyle = '#60a5fa';
         }
         const [x, y] = toCanvas(points[i][0], points[i][1]);
+        if (x < -size || y < -size || x > canvas.width + size || y > canvas.height + size) continue;
         ctx.beginPath();
         ctx.arc(x, y, size, 0, Math.PI * 2);
         ctx.fill();
@@ -201,6 +214,8 @@ async function loadNpyFromBuffer(buffer) {
         for (let i = 0; i < N; i++) P[i] = [data[2 * i], data[2 * i + 1]];
         points = P;
     }
+    pointIds = null; // full file: point index is the window id
+    tileInfo = null;
     bbox = computeBBox(points);
     setStatus(`Loaded embeddings: ${points.length}`);
     draw();
@@ -214,6 +229,7 @@ async function loadNpy(file) {
 
 async function loadSegFromText(text) {
     const obj = JSON.parse(text);
+    labelCounts = null; // counted from the loaded labels
     if (obj && Array.isArray(obj.labels)) {
         labels = new Int32Array(obj.labels);
         setStatus(`Loaded labels: ${labels.length}`);
@@ -258,45 +274,126 @@ async function loadSeg(file) {
     return await loadSegFromText(text);
 }
 
+function halfToFloat(h) {
+    const s = (h & 0x8000) ? -1 : 1;
+    const e = (h >> 10) & 0x1f;
+    const f = h & 0x3ff;
+    if (e === 0) return s * Math.pow(2, -14) * (f / 1024);
+    if (e === 31) return f ? NaN : s * Infinity;
+    return s * Math.pow(2, e - 15) * (1 + f / 1024);
+}
+
+// Decode /embeddings/points (embedding_map.py): 36-byte header + ids + [0,1] coords + labels + meta JSON
+function decodePointMap(buffer) {
+    const dv = new DataView(buffer);
+    const magic = String.fromCharCode(dv.getUint8(0), dv.getUint8(1), dv.getUint8(2), dv.getUint8(3));
+    if (magic !== 'EMP1') throw new Error('bad point map magic');
+    const fmt = dv.getUint8(4);
+    const flags = dv.getUint8(5);
+    const total = dv.getUint32(8, true);
+    const count = dv.getUint32(12, true);
+    const metaLen = dv.getUint32(16, true);
+    let off = 36;
+    const ids = new Uint32Array(buffer.slice(off, off + count * 4)); off += count * 4;
+    const P = new Array(count);
+    if (fmt === 1) {
+        const h = new Uint16Array(buffer.slice(off, off + count * 4)); off += count * 4;
+        for (let i = 0; i < count; i++) P[i] = [halfToFloat(h[2 * i]), halfToFloat(h[2 * i + 1])];
+    } else {
+        const f = new Float32Array(buffer.slice(off, off + count * 8)); off += count * 8;
+        for (let i = 0; i < count; i++) P[i] = [f[2 * i], f[2 * i + 1]];
+    }
+    let lab = null;
+    if (flags & 1) { lab = new Int32Array(buffer.slice(off, off + count * 4)); off += count * 4; }
+    const meta = metaLen ? JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, off, metaLen))) : {};
+    return { total, ids, points: P, labels: lab, meta };
+}
+
+function visibleTiles() {
+    const [minx, maxx, miny, maxy] = bbox;
+    const span = Math.max(1e-9, maxx - minx);
+    const z = Math.max(0, Math.min(tileInfo.max_zoom, Math.round(Math.log2(canvas.width / (TILE_PX * span)))));
+    const n = 1 << z;
+    const clampTile = v => Math.max(0, Math.min(n - 1, v));
+    // tile y grows downwards (screen order), map y grows upwards
+    const x0 = clampTile(Math.floor(minx * n)), x1 = clampTile(Math.floor(maxx * n));
+    const y0 = clampTile(Math.floor((1 - maxy) * n)), y1 = clampTile(Math.floor((1 - miny) * n));
+    const tiles = [];
+    for (let y = y0; y <= y1; y++) for (let x = x0; x <= x1; x++) tiles.push([z, x, y]);
+    return tiles;
+}
+
+function fetchTile(z, x, y) {
+    const key = `${z}/${x}/${y}`;
+    let entry = tileCache.get(key);
+    if (!entry) {
+        entry = fetch(`/embeddings/tiles/${key}?format=f16`)
+            .then(res => res.ok ? res.arrayBuffer().then(decodePointMap) : null)
+            .catch(() => null);
+        tileCache.set(key, entry);
+        if (tileCache.size > TILE_CACHE_MAX) tileCache.delete(tileCache.keys().next().value);
+    }
+    return entry;
+}
+
+// Replace the drawn points with the tiles covering the current view (cost bounded by screen density)
+async function refreshTiles() {
+    if (!tileInfo) return;
+    const token = ++tileToken;
+    const tiles = (await Promise.all(visibleTiles().map(([z, x, y]) => fetchTile(z, x, y)))).filter(Boolean);
+    if (token !== tileToken) return; // view changed while loading
+    let count = 0;
+    for (const t of tiles) count += t.points.length;
+    const P = new Array(count), L = new Int32Array(count), ids = new Uint32Array(count);
+    let o = 0;
+    for (const t of tiles) {
+        for (let i = 0; i < t.points.length; i++, o++) {
+            P[o] = t.points[i];
+            L[o] = t.labels ? t.labels[i] : -1;
+            ids[o] = t.ids[i];
+        }
+    }
+    points = P; labels = L; pointIds = ids;
+    draw();
+}
+
+function scheduleTiles() {
+    clearTimeout(tileTimer);
+    tileTimer = setTimeout(refreshTiles, 80);
+}
+
+async function loadTiles() {
+    const res = await fetch('/embeddings/tiles');
+    if (!res.ok) return false;
+    tileInfo = await res.json();
+    labelCounts = tileInfo.label_counts || null;
+    bbox = [0, 1, 0, 1];
+    tileCache.clear();
+    previewCache.clear();
+    await refreshTiles();
+    updateLegend();
+    setStatus(`Load complete (${tileInfo.total} points, tiled)`);
+    return true;
+}
+
 async function autoLoadFiles() {
     try {
         setStatus('Loading files...');
-        const response = await fetch('/embeddings/auto-load');
+        if (await loadTiles()) return;
+        tileInfo = null;
+        // LOD: one point per canvas pixel cell and label is visually the same map
+        const response = await fetch(`/embeddings/points?grid=${canvas.width}&format=f16`);
         if (response.ok) {
-            const data = await response.json();
-            if (data.status === 'ok') {
-                const loadedFiles = data.loaded_files;
-                // showFileInfo(loadedFiles);
-
-                // Load embeddings
-                if (loadedFiles.embeddings) {
-                    const hexContent = loadedFiles.embeddings.content;
-                    const buffer = new Uint8Array(hexContent.match(/.{1,2}/g).map(byte => parseInt(byte, 16)));
-                    await loadNpyFromBuffer(buffer.buffer);
-                }
-
-                // Load segments
-                if (loadedFiles.segments) {
-                    await loadSegFromText(loadedFiles.segments.content);
-                }
-
-                // Load preview
-                if (loadedFiles.preview) {
-                    try {
-                        const arr = JSON.parse(loadedFiles.preview.content);
-                        if (Array.isArray(arr)) {
-                            previews = arr;
-                            setStatus(`Loaded previews: ${arr.length}`);
-                        }
-                    } catch (err) {
-                        console.warn('Failed to parse preview file:', err);
-                    }
-                }
-
-                setStatus(`Load complete`);
-            } else {
-                setStatus('Load failed');
-            }
+            const map = decodePointMap(await response.arrayBuffer());
+            points = map.points;
+            pointIds = map.ids;
+            labels = map.labels;
+            labelCounts = map.meta.label_counts || null;
+            bbox = [0, 1, 0, 1]; // coordinates are normalized to the full bbox on the server
+            previewCache.clear();
+            updateLegend();
+            draw();
+            setStatus(`Load complete (${points.length} of ${map.total} points)`);
         } else {
             setStatus('Load request failed');
         }
@@ -306,6 +403,18 @@ async function autoLoadFiles() {
     }
 }
 
+// Previews are fetched per hovered point (cached)
+function fetchPreview(windowId) {
+    let entry = previewCache.get(windowId);
+    if (!entry) {
+        entry = fetch(`/embeddings/preview?id=${windowId}`)
+            .then(res => res.ok ? res.json() : null)
+            .catch(() => null);
+        previewCache.set(windowId, entry);
+    }
+    return entry;
+}
+
 autoLoadBtn.addEventListener('click', autoLoadFiles);
 
 // Hover preview
@@ -325,10 +434,13 @@ function findNearestPoint(mx, my, tol = 6) {
     return best;
 }
 
-function drawPosePreview(idx) {
+async function drawPosePreview(idx) {
+    const token = ++hoverToken;
+    if (!points || idx < 0 || idx >= points.length) return;
+    const p = await fetchPreview(pointIds ? pointIds[idx] : idx);
+    if (token !== hoverToken) return; // a newer hover replaced this one
     poseCtx.clearRect(0, 0, poseCanvas.width, poseCanvas.height);
-    if (!previews || idx < 0 || idx >= previews.length) return;
-    const p = previews[idx];
+    if (!p) return;
     const w = p.w || 820, h = p.h || 616;
     const k = p.kpts || [];
     // scale to canvas
@@ -367,10 +479,48 @@ function drawPosePreview(idx) {
     }
 }
 
+// Zoom around the cursor / drag to pan / double-click to reset
+canvas.addEventListener('wheel', (e) => {
+    if (!points) return;
+    e.preventDefault();
+    const rect = canvas.getBoundingClientRect();
+    const [minx, maxx, miny, maxy] = bbox;
+    const ux = minx + ((e.clientX - rect.left) / canvas.width) * (maxx - minx);
+    const uy = maxy - ((e.clientY - rect.top) / canvas.height) * (maxy - miny);
+    const f = e.deltaY < 0 ? 0.8 : 1.25;
+    if (f < 1 && (maxx - minx) < 1e-4) return;
+    bbox = [ux - (ux - minx) * f, ux + (maxx - ux) * f, uy - (uy - miny) * f, uy + (maxy - uy) * f];
+    draw();
+    scheduleTiles();
+}, { passive: false });
+
+canvas.addEventListener('mousedown', (e) => {
+    if (points) dragStart = { x: e.clientX, y: e.clientY, bbox: bbox.slice() };
+});
+
+window.addEventListener('mouseup', () => {
+    if (dragStart) { dragStart = null; scheduleTiles(); }
+});
+
+canvas.addEventListener('dblclick', () => {
+    if (!points) return;
+    bbox = tileInfo ? [0, 1, 0, 1] : computeBBox(points);
+    draw();
+    scheduleTiles();
+});
+
 canvas.addEventListener('mousemove', (e) => {
     const rect = canvas.getBoundingClientRect();
     const mx = e.clientX - rect.left;
     const my = e.clientY - rect.top;
+    if (dragStart) {
+        const [minx, maxx, miny, maxy] = dragStart.bbox;
+        const dx = (e.clientX - dragStart.x) / canvas.width * (maxx - minx);
+        const dy = (e.clientY - dragStart.y) / canvas.height * (maxy - miny);
+        bbox = [minx - dx, maxx - dx, miny + dy, maxy + dy];
+        draw();
+        return;
+    }
     const idx = findNearestPoint(mx, my, 8);
     if (idx >= 0) {
         const label = labels ? labels[idx] : "-";
@@ -1,5 +1,5 @@
 import Renderer from 'renderer';
-import { schedule, anchorFromK, makeStreamingChain, createBlendFramesScaled, robustScaleRatio } from './util/segments-utils.js';
+import { schedule, anchorFromK, makeStreamingChain, createBlendFramesScaled, robustScaleRatio, createSegmentFrameLoader } from './util/segments-utils.js';
 import { PoseWebSocketClient, updateImageElement } from './util/pose-websocket.js';
 
 // State
@@ -14,7 +14,11 @@ let poseWsClient = null;
 // Segments playback state
 let segments = null;        // parsed JSON of segments_final.json (expects {segments:[...]} or list)
 let windowsIndex = null;    // windows index for accurate frame stitching
-let jsonlMap = {};          // map basename -> frames array
+let jsonlMap = {};          // map basename -> frames array (sparse: filled per segment by frameLoader)
+let frameLoader = null;     // lazy /segments/frames loader
+let liveMatches = null;     // latest server segment_match {matches, ts} (live pose -> segments_final indices)
+const LIVE_MATCH_TTL_MS = 2000;
+const PREFETCH_SEGMENTS = 4;
 let playbackFrames = [];    // synthesized frames from segments (items with {width,height,kpts})
 let playIdx = 0;
 let playing = false;
@@ -295,27 +299,13 @@ function renderComposite() {
 async function fetchSegmentsFinal() {
     // Prefer segments_final.json via auto-load endpoint for consistency
     try {
-        const auto = await fetch('/segments/auto-load');
+        // Recording frames are not shipped here: they are fetched per segment from /segments/frames
+        const auto = await fetch('/segments/auto-load?jsonl=0');
         if (!auto.ok) throw new Error('auto-load failed');
         const data = await auto.json();
         const loaded = data.loaded_files || {};
-        // Build JSONL map if present
-        if (loaded.jsonl && loaded.jsonl.content) {
-            try {
-                const content = loaded.jsonl.content;
-                const lines = content.trim().split('\n');
-                jsonlMap = {};
-                for (const line of lines) {
-                    if (!line.trim()) continue;
-                    try {
-                        const item = JSON.parse(line);
-                        const basename = item.seq_id || 'unknown';
-                        if (!jsonlMap[basename]) jsonlMap[basename] = [];
-                        jsonlMap[basename].push(item);
-                    } catch (e) { /* ignore */ }
-                }
-            } catch (e) { console.warn('JSONL parse failed', e); }
-        }
+        jsonlMap = {};
+        frameLoader = null;
         // Windows index if present
         if (loaded.windows && loaded.windows.content) {
             try { windowsIndex = JSON.parse(loaded.windows.content); }
@@ -324,6 +314,7 @@ async function fetchSegmentsFinal() {
         if (loaded.segments_final) {
             const seg = JSON.parse(loaded.segments_final.content);
             segments = seg.segments || seg;
+            await initFrameLoader('final');
             setStatus(`segments_final loaded (${segments.length} segments)`);
             return true;
         }
@@ -331,6 +322,8 @@ async function fetchSegmentsFinal() {
         if (loaded.segments) {
             const seg = JSON.parse(loaded.segments.content);
             segments = seg.segments || seg;
+            const name = loaded.segments.info?.name || '';
+            await initFrameLoader(name.includes('representative') ? 'representative' : 'segments');
             setStatus(`segments loaded (${segments.length} segments)`);
             return true;
         }
@@ -343,6 +336,21 @@ async function fetchSegmentsFinal() {
     }
 }
 
+async function initFrameLoader(source) {
+    frameLoader = createSegmentFrameLoader(jsonlMap, { source });
+    try {
+        // precomputed bank: every segment in one cached fetch, no per-segment requests afterwards
+        if (await frameLoader.loadBank()) return;
+        // segment edge frames drive ordering/boundary scaling; full frames come on demand
+        await frameLoader.loadEdges();
+        const first = [];
+        for (let i = 0; i < Math.min(PREFETCH_SEGMENTS, segments.length); i++) first.push(i);
+        await frameLoader.ensure(first);
+    } catch (e) {
+        console.warn('Segment frame preload failed', e);
+    }
+}
+
 function buildPlaybackFramesFromSegments() {
     // Initialize streaming buffer and controller
     playbackFrames = [];
@@ -368,6 +376,9 @@ function buildPlaybackFramesFromSegments() {
         canvasH: stageH || 720,
         maxHeightRatio: 0.8, // Same as checkPoseValidForPlayback
         minConfidence: 0.2, // Same as checkPoseValidForPlayback
+        isReady: (i) => !frameLoader || frameLoader.isLoaded(i),
+        onNeed: (indices) => { if (frameLoader) frameLoader.prefetch(indices); },
+        liveCandidates: () => (liveMatches && performance.now() - liveMatches.ts < LIVE_MATCH_TTL_MS) ? liveMatches.matches : null,
     });
     streamCtrl.seed(playbackFrames);
 }
@@ -953,6 +964,8 @@ function initPoseWebSocket() {
             // Case where only frame exists (no pose data)
             if (data.type === 'frame' && !data.kpts) {
                 maybeStartAfterReady();
+            } else if (data.type === 'segment_match') {
+                liveMatches = { matches: data.matches || [], ts: performance.now() };
             } else if (data.type !== 'frame' && data.type !== 'frame_kpts' && data.type !== 'kpts') {
                 console.log('Message received from pose WebSocket:', data);
             }
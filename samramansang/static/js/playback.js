@@ -15,12 +15,27 @@ const stageCard = document.getElementById('stageCard');
 
 const overlay = document.getElementById('overlay');
 
+const summaryDiv = document.getElementById('summary');
+const summaryText = document.getElementById('summaryText');
+const summaryThumb = document.getElementById('summaryThumb');
+const seekBar = document.getElementById('seekBar');
+const positionText = document.getElementById('positionText');
+
 let renderer = null;
-let frames = [];
-let idx = 0;
+const datasetEntries = new Map();  // path -> catalog entry from /playback/dataset-files
+let frameCount = 0;
+let position = 0;
 let playing = false;
-let paused = false;
-let timer = null;
+let seeking = false;
+
+// Server-paced playback session: the server reads the indexed recording and streams
+// binary frames in real time, so the browser only ever holds the current frame.
+const PLAYBACK_WS_URL = `${window.location.protocol === 'https:' ? 'wss' : 'ws'}://${window.location.host}/playback/ws`;
+const PLAYBACK_MAX_FPS = 30;
+const FRAME_HEADER_BYTES = 24;
+let ws = null;
+let wsReady = null;
+let lastFrameSize = { w: 0, h: 0 };
 
 function setStatus(msg) {
     statusDiv.textContent = msg;
@@ -55,11 +70,14 @@ async function loadDatasetFiles() {
             }
 
             // Add file list
+            datasetEntries.clear();
             data.files.forEach(file => {
                 const option = document.createElement('option');
                 option.value = file.path;
-                option.textContent = `${file.name} (${formatFileSize(file.size)})`;
+                const duration = file.duration_s != null ? ` · ${formatDuration(file.duration_s)}` : '';
+                option.textContent = `${file.name} (${formatFileSize(file.size)}${duration})`;
                 datasetSelect.appendChild(option);
+                datasetEntries.set(file.path, file);
             });
 
             setStatus(`Found ${data.count} files in dataset.`);
@@ -72,6 +90,31 @@ async function loadDatasetFiles() {
     }
 }
 
+function formatDuration(seconds) {
+    const s = Math.round(seconds);
+    const m = Math.floor(s / 60);
+    return m > 0 ? `${m}m ${s % 60}s` : `${s}s`;
+}
+
+// Summary from the catalog (recording_summary sidecar): shown without touching the raw file
+function showSummary(entry) {
+    const summary = entry && entry.summary;
+    if (!summary) {
+        summaryDiv.style.display = 'none';
+        return;
+    }
+    const fmt = (v, digits) => (v == null ? '-' : Number(v).toFixed(digits));
+    summaryText.textContent =
+        `Duration: ${summary.duration_s != null ? formatDuration(summary.duration_s) : '-'} | ` +
+        `Frames: ${summary.frame_count} | ` +
+        `Mean confidence: ${fmt(summary.mean_confidence, 2)} | ` +
+        `Motion energy: ${fmt(summary.motion_energy, 3)} | ` +
+        `Detected: ${summary.detected_ratio != null ? Math.round(summary.detected_ratio * 100) + '%' : '-'}`;
+    summaryThumb.src = entry.thumbnail || '';
+    summaryThumb.style.display = entry.thumbnail ? '' : 'none';
+    summaryDiv.style.display = 'block';
+}
+
 function formatFileSize(bytes) {
     if (bytes === 0) return '0 Bytes';
     const k = 1024;
@@ -80,162 +123,182 @@ function formatFileSize(bytes) {
     return parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + ' ' + sizes[i];
 }
 
-async function loadDatasetFile(filePath) {
-    try {
-        setStatus('Loading dataset file...');
-
-        // Query file info first
-        const infoResponse = await fetch(`/playback/dataset-file-info?path=${encodeURIComponent(filePath)}`);
-        const infoData = await infoResponse.json();
-
-        if (infoData.status === 'ok') {
-            showFileInfo(infoData);
+function connectSession() {
+    if (ws && (ws.readyState === WebSocket.OPEN || ws.readyState === WebSocket.CONNECTING)) {
+        return wsReady;
+    }
+    ws = new WebSocket(PLAYBACK_WS_URL);
+    ws.binaryType = 'arraybuffer';
+    wsReady = new Promise((resolve, reject) => {
+        ws.onopen = () => resolve(ws);
+        ws.onerror = (err) => reject(err);
+    });
+    ws.onmessage = (event) => {
+        if (event.data instanceof ArrayBuffer) {
+            renderFrame(decodeFrame(event.data));
+        } else {
+            handleMessage(JSON.parse(event.data));
         }
+    };
+    ws.onclose = () => {
+        ws = null;
+        wsReady = null;
+        if (playing) setStatus('Playback connection closed.');
+        setPlaying(false);
+    };
+    return wsReady;
+}
 
-        // Load file content
-        const response = await fetch(`/playback/dataset-file?path=${encodeURIComponent(filePath)}`);
-
-        if (response.ok) {
-            const content = await response.text();
-            frames = parseJsonl(content);
-
-            if (!frames.length) {
-                setStatus('No valid frames. Please check JSONL format.');
-                enableControls(false);
-                return;
-            }
-
-            const w = parseInt(frames[0].width || 820, 10);
-            const h = parseInt(frames[0].height || 616, 10);
-            stageCard.style.display = '';
+function send(cmd) {
+    if (ws && ws.readyState === WebSocket.OPEN) {
+        ws.send(JSON.stringify(cmd));
+    }
+}
 
-            if (!renderer) {
-                renderer = new Renderer(overlay);
-            }
-            renderer.initialize(w, h);
-            renderer.setRenderOptions({ showKeypoints: true, showSkeleton: true, smoothing: true, interpolation: true });
+function halfToFloat(h) {
+    const s = (h & 0x8000) ? -1 : 1;
+    const e = (h >> 10) & 0x1f;
+    const f = h & 0x03ff;
+    if (e === 0) return s * Math.pow(2, -14) * (f / 1024);
+    if (e === 0x1f) return f ? NaN : s * Infinity;
+    return s * Math.pow(2, e - 15) * (1 + f / 1024);
+}
 
-            idx = 0;
-            enableControls(true);
-            setStatus(`${frames.length} frames loaded · ${w}x${h}`);
-        } else {
-            const errorData = await response.json();
-            setStatus(`File load failed: ${errorData.error || 'Unknown error'}`);
+function decodeFrame(buf) {
+    // Layout matches pose_codec.encode_frame: 'PKF1', fmt, persons, flags, frame_id, width, height, ts_ms
+    const dv = new DataView(buf);
+    const fmt = dv.getUint8(4);
+    const persons = dv.getUint8(5);
+    const frame = {
+        flags: dv.getUint16(6, true),
+        frameId: dv.getUint32(8, true),
+        width: dv.getUint16(12, true),
+        height: dv.getUint16(14, true),
+        ts: dv.getFloat64(16, true),
+        persons: [],
+    };
+    const n = persons * 17 * 3;
+    let values;
+    if (fmt === 0) {
+        values = new Float32Array(buf, FRAME_HEADER_BYTES, n);
+    } else if (fmt === 2) {
+        const q = new Uint16Array(buf, FRAME_HEADER_BYTES, n);
+        values = Float32Array.from(q, v => v / 65535);
+    } else {
+        values = new Float32Array(n);
+        for (let i = 0; i < n; i++) values[i] = halfToFloat(dv.getUint16(FRAME_HEADER_BYTES + i * 2, true));
+    }
+    for (let p = 0; p < persons; p++) {
+        const kpts = [];
+        for (let k = 0; k < 17; k++) {
+            const o = (p * 17 + k) * 3;
+            kpts.push([Math.round(values[o] * frame.width), Math.round(values[o + 1] * frame.height), values[o + 2]]);
         }
-    } catch (error) {
-        console.error('Dataset file load error:', error);
-        setStatus('An error occurred while loading dataset file.');
+        frame.persons.push(kpts);
     }
+    return frame;
 }
 
-function enableControls(loaded) {
-    playBtn.disabled = !loaded;
-    pauseBtn.disabled = true;
-    stopBtn.disabled = true;
+function renderFrame(frame) {
+    if (!renderer) return;
+    if (frame.width && frame.height && (frame.width !== lastFrameSize.w || frame.height !== lastFrameSize.h)) {
+        renderer.initialize(frame.width, frame.height);
+        lastFrameSize = { w: frame.width, h: frame.height };
+    }
+    renderer.render({ kpts: frame.persons[0] || [], W: frame.width, H: frame.height });
+    position = frame.frameId + 1;
+    updatePosition();
 }
 
-function denormalizeKpts(item) {
-    const w = parseInt(item.width || 0, 10);
-    const h = parseInt(item.height || 0, 10);
-    const k = item.kpts || [];
-    if (Array.isArray(k) && k.length > 0 && w > 0 && h > 0) {
-        if (k[0] && typeof k[0][0] === 'number' && k[0][0] <= 1.0 && k[0][1] <= 1.0) {
-            return k.map(p => [Math.round(p[0] * w), Math.round(p[1] * h), p.length > 2 ? Number(p[2]) : 1.0]);
+function handleMessage(msg) {
+    if (msg.type === 'opened') {
+        frameCount = msg.frame_count || 0;
+        position = 0;
+        seekBar.max = Math.max(0, frameCount - 1);
+        const w = parseInt(msg.width || 820, 10);
+        const h = parseInt(msg.height || 616, 10);
+        stageCard.style.display = '';
+        if (!renderer) {
+            renderer = new Renderer(overlay);
         }
-        return k.map(p => [Math.round(p[0]), Math.round(p[1]), p.length > 2 ? Number(p[2]) : 1.0]);
+        renderer.initialize(w, h);
+        renderer.setRenderOptions({ showKeypoints: true, showSkeleton: true, smoothing: true, interpolation: true });
+        lastFrameSize = { w, h };
+        send({ cmd: 'speed', value: Number(speedSelect.value || 1) });
+        send({ cmd: 'loop', value: loopCheck.checked });
+        enableControls(frameCount > 0);
+        updatePosition();
+        setStatus(frameCount ? `${frameCount} frames · ${w}x${h}` : 'No valid frames. Please check JSONL format.');
+    } else if (msg.type === 'state') {
+        position = msg.position;
+        setPlaying(msg.playing);
+        updatePosition();
+    } else if (msg.type === 'ended') {
+        setPlaying(false);
+        setStatus('Playback finished.');
+    } else if (msg.type === 'error') {
+        setStatus(`Playback error: ${msg.error}`);
     }
-    return [];
 }
 
-function scheduleNext(prev, next, speed) {
-    // Prefer fps, fallback to ts delta, else default 1/30s
-    let dt = null;
-    if (next && typeof next.fps === 'number' && next.fps > 0) {
-        dt = 1.0 / next.fps;
-    } else if (prev && next && typeof prev.ts === 'number' && typeof next.ts === 'number') {
-        dt = Math.max(0, (next.ts - prev.ts) / 1000);
-    } else {
-        dt = 1.0 / 30.0;
-    }
-    dt = dt / Math.max(1e-6, speed);
-    return dt;
+function updatePosition() {
+    if (!seeking) seekBar.value = Math.min(position, Math.max(0, frameCount - 1));
+    positionText.textContent = `${Math.min(position, frameCount)} / ${frameCount}`;
 }
 
-async function playLoop() {
-    if (!playing || paused) return;
-    if (idx >= frames.length) {
-        if (loopCheck.checked) {
-            idx = 0;
-        } else {
-            stopPlayback();
+async function loadDatasetFile(filePath) {
+    try {
+        setStatus('Loading dataset file...');
+        send({ cmd: 'pause' });
+
+        // File info (answered from the server-side index)
+        const infoResponse = await fetch(`/playback/dataset-file-info?path=${encodeURIComponent(filePath)}`);
+        const infoData = await infoResponse.json();
+
+        if (infoData.status !== 'ok') {
+            setStatus(`File load failed: ${infoData.error || 'Unknown error'}`);
             return;
         }
-    }
+        showFileInfo(infoData);
 
-    const speed = Number(speedSelect.value || 1);
-    const item = frames[idx];
-    const prev = idx > 0 ? frames[idx - 1] : null;
-    const kpts = denormalizeKpts(item);
-
-    if (renderer) {
-        renderer.render({ kpts, W: item.width, H: item.height });
+        await connectSession();
+        send({ cmd: 'open', path: filePath, fps: PLAYBACK_MAX_FPS, format: 'u16' });
+    } catch (error) {
+        console.error('Dataset file load error:', error);
+        setStatus('An error occurred while loading dataset file.');
     }
+}
+
+function enableControls(loaded) {
+    playBtn.disabled = !loaded;
+    pauseBtn.disabled = true;
+    stopBtn.disabled = !loaded;
+    seekBar.disabled = !loaded;
+}
 
-    const delay = scheduleNext(prev, item, speed);
-    idx += 1;
-    timer = setTimeout(playLoop, Math.max(0, delay * 1000));
+function setPlaying(value) {
+    playing = value;
+    playBtn.disabled = value || !frameCount;
+    pauseBtn.disabled = !value;
 }
 
 function startPlayback() {
-    if (!frames.length) return;
-    playing = true;
-    paused = false;
-    playBtn.disabled = true;
-    pauseBtn.disabled = false;
-    stopBtn.disabled = false;
-    playLoop();
+    if (!frameCount) return;
+    send({ cmd: 'play' });
 }
 
 function pausePlayback() {
-    if (!playing) return;
-    paused = true;
-    if (timer) clearTimeout(timer);
-    playBtn.disabled = false;
-    pauseBtn.disabled = true;
+    send({ cmd: 'pause' });
 }
 
 function stopPlayback() {
-    playing = false;
-    paused = false;
-    if (timer) clearTimeout(timer);
-    idx = 0;
-    playBtn.disabled = false;
-    pauseBtn.disabled = true;
-    stopBtn.disabled = true;
-}
-
-function parseJsonl(text) {
-    const out = [];
-    const lines = text.split(/\r?\n/);
-    for (const line of lines) {
-        const s = line.trim();
-        if (!s) continue;
-        try {
-            const obj = JSON.parse(s);
-            if (obj && (obj.kpts || obj.keypoints)) {
-                if (!obj.kpts && obj.keypoints) obj.kpts = obj.keypoints;
-                out.push(obj);
-            }
-        } catch (e) {
-            // skip invalid lines
-        }
-    }
-    return out;
+    send({ cmd: 'stop' });
 }
 
 // Dataset-related event listeners
 datasetSelect.addEventListener('change', (e) => {
     loadDatasetBtn.disabled = !e.target.value;
+    showSummary(datasetEntries.get(e.target.value));
 });
 
 loadDatasetBtn.addEventListener('click', () => {
@@ -249,6 +312,17 @@ refreshDatasetBtn.addEventListener('click', () => {
     loadDatasetFiles();
 });
 
+speedSelect.addEventListener('change', () => send({ cmd: 'speed', value: Number(speedSelect.value || 1) }));
+loopCheck.addEventListener('change', () => send({ cmd: 'loop', value: loopCheck.checked }));
+seekBar.addEventListener('input', () => {
+    seeking = true;
+    positionText.textContent = `${seekBar.value} / ${frameCount}`;
+});
+seekBar.addEventListener('change', () => {
+    seeking = false;
+    send({ cmd: 'seek', frame: Number(seekBar.value) });
+});
+
 playBtn.addEventListener('click', startPlayback);
 pauseBtn.addEventListener('click', pausePlayback);
 stopBtn.addEventListener('click', stopPlayback);
@@ -1,5 +1,6 @@
 import Renderer from './renderer/renderer.js';
 import { denorm, reorder, schedule, chainSegments } from './util/segments-utils.js';
+import { runJob } from './util/jobs.js';
 
 const autoLoadBtn = document.getElementById('autoLoadBtn');
 const speedSelect = document.getElementById('speedSelect');
@@ -90,30 +91,20 @@ async function calculateDistances() {
         const config = {
             embeddings_path: 'training/runs/embeddings.npy',
             segments_path: segPath,
-            output_path: 'training/runs/segment_distances.json',
+            output_path: 'training/runs/segment_distances.npz',
             top_k: parseInt(topK.value)
         };
 
-        const response = await fetch('/segments/calculate-distances', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify(config)
+        // runs as a server job; poll progress instead of holding the request open
+        const result = await runJob('/segments/calculate-distances', config, {
+            onProgress: (job) => setDistanceStatus(`Calculating distances... ${Math.round(job.progress * 100)}% ${job.message || ''}`)
         });
-
-        const result = await response.json();
-
-        if (response.ok) {
-            setDistanceStatus('Distance calculation complete! Please load distance information.');
-            loadDistancesBtn.disabled = false;
-            console.log('Distance calculation complete:', result);
-        } else {
-            setDistanceStatus(`Distance calculation failed: ${result.error}`);
-        }
+        setDistanceStatus('Distance calculation complete! Please load distance information.');
+        loadDistancesBtn.disabled = false;
+        console.log('Distance calculation complete:', result);
     } catch (error) {
         console.error('Distance calculation error:', error);
-        setDistanceStatus('An error occurred while calculating distances.');
+        setDistanceStatus(`Distance calculation failed: ${error.message}`);
     } finally {
         calculateDistancesBtn.disabled = false;
     }
@@ -766,14 +757,12 @@ async function saveFinalSegments() {
             include_indices: include,
             top_k: parseInt(topK?.value || '3', 10)
         };
-        const res = await fetch('/segments/save-final', {
-            method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(payload)
+        const j = await runJob('/segments/save-final', payload, {
+            onProgress: (job) => setStatus(`Saving final segments... ${Math.round(job.progress * 100)}%`)
         });
-        const j = await res.json();
-        if (!res.ok) { setStatus(`Failed to save final segments: ${j.error || res.status}`); return; }
         setStatus(`Final segments saved (${j.num_segments}): ${j.saved_path}`);
     } catch (e) {
-        console.error(e); setStatus('Error occurred while saving final segments');
+        console.error(e); setStatus(`Failed to save final segments: ${e.message}`);
     }
 }
 
@@ -82,7 +82,25 @@ class TrainingSystem {
                 data.files.forEach(file => {
                     const fileDiv = document.createElement('div');
                     fileDiv.className = 'dataset-file';
-                    fileDiv.textContent = `${file.name} (${(file.size / 1024 / 1024).toFixed(1)} MB)`;
+                    let label = `${file.name} (${(file.size / 1024 / 1024).toFixed(1)} MB)`;
+                    if (file.summary) {
+                        // precomputed recording summary (no raw file access)
+                        const s = file.summary;
+                        if (s.duration_s != null) label += ` · ${Math.round(s.duration_s)}s`;
+                        if (s.mean_confidence != null) label += ` · conf ${s.mean_confidence.toFixed(2)}`;
+                        if (s.motion_energy != null) label += ` · motion ${s.motion_energy.toFixed(3)}`;
+                    }
+                    if (file.embedded) label += ' · embedded';
+                    fileDiv.textContent = label;
+                    if (file.thumbnail) {
+                        const img = document.createElement('img');
+                        img.src = file.thumbnail;
+                        img.alt = file.name;
+                        img.loading = 'lazy';
+                        img.style.display = 'block';
+                        img.style.maxWidth = '100%';
+                        fileDiv.appendChild(img);
+                    }
                     this.datasetFilesDiv.appendChild(fileDiv);
                 });
             }
@@ -0,0 +1,34 @@
+// Polling helpers for server-side async jobs (/jobs/{id})
+
+// Resolve the accepted-job response of a POST: returns the job's result when done,
+// throws with the job error when it failed or was cancelled.
+export async function waitForJob(jobId, { onProgress = null, interval = 500 } = {}){
+    for (;;){
+        const res = await fetch(`/jobs/${jobId}`);
+        const job = await res.json();
+        if (!res.ok) throw new Error(job.error || `job HTTP ${res.status}`);
+        if (onProgress) onProgress(job);
+        if (job.status === 'done') return job.result;
+        if (job.status === 'failed') throw new Error(job.error || 'job failed');
+        if (job.status === 'cancelled') throw new Error('job cancelled');
+        await new Promise(r => setTimeout(r, interval));
+    }
+}
+
+export async function cancelJob(jobId){
+    const res = await fetch(`/jobs/${jobId}/cancel`, { method: 'POST' });
+    return res.json();
+}
+
+// POST a JSON body to an endpoint that answers 202 + job_id, then wait for the job
+export async function runJob(url, body, options = {}){
+    const res = await fetch(url, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body)
+    });
+    const accepted = await res.json();
+    if (!res.ok) throw new Error(accepted.error || `HTTP ${res.status}`);
+    if (options.onAccepted) options.onAccepted(accepted.job_id);
+    return waitForJob(accepted.job_id, options);
+}
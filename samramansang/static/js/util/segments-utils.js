@@ -185,6 +185,7 @@ export function appendSegmentFrames(windowsIndex, jsonlMap, seg, segScale, segOf
         if (prevBase === base && prevEnd >= 0) sfi = Math.max(sfi, prevEnd + 1);
         for (let fi = sfi; fi <= endFrame && fi < arr.length; fi++){
             const item = arr[fi];
+            if (!item) continue; // not loaded (lazy jsonlMap)
             const k = getNormKpts(item);
             const sk = new Array(17);
             const dx = (segOffset && segOffset.length===2) ? Number(segOffset[0]) : 0;
@@ -304,6 +305,11 @@ export function makeStreamingChain(windowsIndex, jsonlMap, segments, options = {
         maxHeightRatio: typeof options.maxHeightRatio === 'number' ? options.maxHeightRatio : 0.8,
         minConfidence: typeof options.minConfidence === 'number' ? options.minConfidence : 0.2,
         checkBoundsSampleRate: typeof options.checkBoundsSampleRate === 'number' ? options.checkBoundsSampleRate : 1, // Check every Nth frame (1 = all frames)
+        // Lazy frame loading: segments whose frames are not in jsonlMap yet are skipped and requested via onNeed
+        isReady: typeof options.isReady === 'function' ? options.isReady : (() => true),
+        onNeed: typeof options.onNeed === 'function' ? options.onNeed : (() => {}),
+        // Live pose matches ([{segment_index, distance}] or null): when fresh, they replace next_candidates
+        liveCandidates: typeof options.liveCandidates === 'function' ? options.liveCandidates : null,
     };
 
     let orderedSegments = [];
@@ -413,13 +419,30 @@ export function makeStreamingChain(windowsIndex, jsonlMap, segments, options = {
         return true;
     }
 
-    function chooseNextSegment(){
-        // If we have embedded next_candidates on the previous segment, prefer them
+    function candidateList(){
+        // Live matches from the server follow the person in front of the camera; otherwise use embedded next_candidates
+        const live = cfg.liveCandidates ? cfg.liveCandidates() : null;
+        if (Array.isArray(live) && live.length>0) return live;
         if (cfg.preferEmbeddedNext && prevSeg && Array.isArray(prevSeg.next_candidates) && prevSeg.next_candidates.length>0){
-            const indices = prevSeg.next_candidates
+            return prevSeg.next_candidates;
+        }
+        return null;
+    }
+
+    function chooseNextSegment(){
+        const candidates = candidateList();
+        if (candidates){
+            const indices = candidates
                 .map(n => ({ idx: Number(n.segment_index), distance: Number(n.distance||0) }))
                 .filter(n => Number.isFinite(n.idx) && n.idx>=0 && n.idx < (segments?.length||0));
-            if (indices.length){
+            const readyIndices = indices.filter(n => cfg.isReady(n.idx));
+            if (indices.length && !readyIndices.length){
+                // candidates not fetched yet: request them and wait for the next ensureBuffer
+                cfg.onNeed(indices.map(n => n.idx));
+                return null;
+            }
+            if (readyIndices.length){
+                const indices = readyIndices;
                 // Filter out segments that would be out of bounds
                 const validIndices = indices.filter(n => {
                     const seg = segments[n.idx];
@@ -448,6 +471,11 @@ export function makeStreamingChain(windowsIndex, jsonlMap, segments, options = {
         }
         // Fallback to ordered list progression
         if (!orderedSegments || !orderedSegments.length) ensureOrder();
+        const current = orderedSegments[nextSegIdx];
+        if (current && !cfg.isReady(segments.indexOf(current))){
+            cfg.onNeed([segments.indexOf(current)]);
+            return null;
+        }
         
         // Try to find a valid segment from the ordered list
         if (cfg.checkBounds && orderedSegments && orderedSegments.length > 0){
@@ -456,7 +484,7 @@ export function makeStreamingChain(windowsIndex, jsonlMap, segments, options = {
             const maxAttempts = orderedSegments.length;
             while (attempts < maxAttempts){
                 const seg = orderedSegments[searchIdx];
-                if (checkSegmentInBounds(seg)){
+                if (cfg.isReady(segments.indexOf(seg)) && checkSegmentInBounds(seg)){
                     // Found valid segment, but don't update nextSegIdx here (it will be updated in appendNext)
                     return seg;
                 }
@@ -473,9 +501,9 @@ export function makeStreamingChain(windowsIndex, jsonlMap, segments, options = {
     }
 
     function appendNext(frames, fallbackW=1280, fallbackH=720){
-        if (!Array.isArray(segments) || segments.length===0) return;
+        if (!Array.isArray(segments) || segments.length===0) return false;
         const seg = chooseNextSegment();
-        if (!seg) return;
+        if (!seg) return false;
         if (!hasWindows()){
             // fallback: approximate segment by repeating endpoints
             const framesPerSeg = 30;
@@ -531,6 +559,13 @@ export function makeStreamingChain(windowsIndex, jsonlMap, segments, options = {
             nextSegIdx++;
             if (orderedSegments && nextSegIdx >= orderedSegments.length) nextSegIdx = 0; // loop
         }
+        // prefetch what may follow this segment
+        if (Array.isArray(seg.next_candidates) && seg.next_candidates.length){
+            cfg.onNeed(seg.next_candidates.map(n => Number(n.segment_index)).filter(i => Number.isFinite(i) && i >= 0));
+        } else if (orderedSegments && orderedSegments[nextSegIdx]){
+            cfg.onNeed([segments.indexOf(orderedSegments[nextSegIdx])]);
+        }
+        return true;
     }
 
     function seed(frames){
@@ -544,7 +579,7 @@ export function makeStreamingChain(windowsIndex, jsonlMap, segments, options = {
             let guard = 0;
             const maxGuard = (orderedSegments?.length||1) * 2;
             while ((frames.length - playIdx) < cfg.bufferTarget && guard < maxGuard){
-                appendNext(frames, fallbackW, fallbackH);
+                if (!appendNext(frames, fallbackW, fallbackH)) break; // next segment still loading
                 guard++;
             }
         }
@@ -566,3 +601,172 @@ export function makeStreamingChain(windowsIndex, jsonlMap, segments, options = {
 }
 
 
+
+// ---------------------------------------------------------------------------
+// Lazy segment frames (/segments/frames)
+// Response: u32 meta length + meta JSON {format, runs:[{segment_index,file,start,count,fps}]}
+// followed by pose_codec.encode_frame messages (24-byte header + packed keypoints) in run order.
+// ---------------------------------------------------------------------------
+
+const FRAME_HEADER_BYTES = 24;
+
+function halfToFloat(h){
+    const s = (h & 0x8000) ? -1 : 1;
+    const e = (h >> 10) & 0x1f;
+    const f = h & 0x03ff;
+    if (e === 0) return s * Math.pow(2, -14) * (f / 1024);
+    if (e === 0x1f) return f ? NaN : s * Infinity;
+    return s * Math.pow(2, e - 15) * (1 + f / 1024);
+}
+
+// Decode one encode_frame message at byte offset -> { frame, next }
+export function decodePoseFrame(dv, offset){
+    const fmt = dv.getUint8(offset + 4);
+    const persons = dv.getUint8(offset + 5);
+    const frame = {
+        flags: dv.getUint16(offset + 6, true),
+        frameId: dv.getUint32(offset + 8, true),
+        width: dv.getUint16(offset + 12, true),
+        height: dv.getUint16(offset + 14, true),
+        ts: dv.getFloat64(offset + 16, true),
+        persons: [],
+    };
+    const n = persons * 17 * 3;
+    const bytesPer = fmt === 0 ? 4 : 2;
+    const base = offset + FRAME_HEADER_BYTES;
+    for (let p = 0; p < persons; p++){
+        const kpts = new Array(17);
+        for (let k = 0; k < 17; k++){
+            const v = [0, 0, 0];
+            for (let c = 0; c < 3; c++){
+                const o = base + ((p * 17 + k) * 3 + c) * bytesPer;
+                if (fmt === 0) v[c] = dv.getFloat32(o, true);
+                else if (fmt === 2) v[c] = dv.getUint16(o, true) / 65535;
+                else v[c] = halfToFloat(dv.getUint16(o, true));
+            }
+            kpts[k] = v;
+        }
+        frame.persons.push(kpts);
+    }
+    return { frame, next: base + n * bytesPer };
+}
+
+export function decodeSegmentFrames(buf){
+    const dv = new DataView(buf);
+    const metaLen = dv.getUint32(0, true);
+    const meta = JSON.parse(new TextDecoder().decode(new Uint8Array(buf, 4, metaLen)));
+    const frames = [];
+    let offset = 4 + metaLen;
+    while (offset + FRAME_HEADER_BYTES <= buf.byteLength){
+        const { frame, next } = decodePoseFrame(dv, offset);
+        frames.push(frame);
+        offset = next;
+    }
+    return { meta, frames };
+}
+
+// Fills a sparse jsonlMap ({ basename: [frames] }) on demand, so the chaining helpers above work unchanged
+// Parse the /segments/bank .npy (float32 (F, 17, 3), C order) -> { frames, data: Float32Array }
+export function decodeSegmentBank(buf){
+    const bytes = new Uint8Array(buf);
+    if (bytes[0] !== 0x93 || String.fromCharCode(...bytes.subarray(1, 6)) !== 'NUMPY') throw new Error('not a .npy file');
+    const dv = new DataView(buf);
+    const major = bytes[6];
+    const headerLen = major >= 2 ? dv.getUint32(8, true) : dv.getUint16(8, true);
+    const dataOffset = (major >= 2 ? 12 : 10) + headerLen;
+    const header = new TextDecoder('latin1').decode(bytes.subarray(dataOffset - headerLen, dataOffset));
+    if (!/'descr':\s*'<f4'/.test(header) || /'fortran_order':\s*True/.test(header)) throw new Error('unexpected bank dtype/order');
+    const shape = (header.match(/'shape':\s*\(([^)]*)\)/) || [])[1] || '';
+    const frames = Number(shape.split(',')[0]) || 0;
+    return { frames, data: new Float32Array(buf, dataOffset, frames * 51) };
+}
+
+export function createSegmentFrameLoader(jsonlMap, options = {}){
+    const source = options.source || 'final';
+    const format = options.format || 'u16';
+    const batch = typeof options.batch === 'number' ? options.batch : 8;
+    const loaded = new Set();
+    const pending = new Map(); // segment index -> Promise
+
+    function store(buf){
+        const { meta, frames } = decodeSegmentFrames(buf);
+        let k = 0;
+        for (const run of meta.runs || []){
+            const arr = jsonlMap[run.file] || (jsonlMap[run.file] = []);
+            for (let i = 0; i < run.count; i++, k++){
+                const f = frames[k];
+                if (!f) break;
+                arr[run.start + i] = { width: f.width, height: f.height, kpts: f.persons[0] || [], fps: run.fps, ts: f.ts, seq_id: run.file };
+            }
+        }
+        return meta;
+    }
+
+    async function request(query){
+        const res = await fetch(`/segments/frames?source=${source}&format=${format}&${query}`);
+        if (!res.ok) throw new Error(`segment frames HTTP ${res.status}`);
+        return store(await res.arrayBuffer());
+    }
+
+    // whole precomputed frame bank (segments_final only): one cacheable fetch fills every segment.
+    // Resolves false when the server has no up-to-date bank; callers fall back to loadEdges()/ensure().
+    async function loadBank(){
+        if (source !== 'final') return false;
+        try {
+            const tableRes = await fetch('/segments/bank/table');
+            if (!tableRes.ok) return false;
+            const table = await tableRes.json();
+            const res = await fetch('/segments/bank');
+            if (!res.ok) return false;
+            const bank = decodeSegmentBank(await res.arrayBuffer());
+            if (bank.frames !== table.frames) return false; // rebuilt between the two requests
+            for (const entry of table.segments || []){
+                for (const run of entry.runs || []){
+                    const arr = jsonlMap[run.file] || (jsonlMap[run.file] = []);
+                    for (let i = 0; i < run.count; i++){
+                        const base = (run.offset + i) * 51;
+                        const kpts = new Array(17);
+                        for (let j = 0; j < 17; j++){
+                            const o = base + j * 3;
+                            kpts[j] = [bank.data[o], bank.data[o + 1], bank.data[o + 2]];
+                        }
+                        arr[run.start + i] = { width: entry.width, height: entry.height, kpts, fps: entry.fps, seq_id: run.file };
+                    }
+                }
+                loaded.add(entry.segment_index);
+            }
+            return true;
+        } catch (err) {
+            console.warn('Segment bank load failed', err);
+            return false;
+        }
+    }
+
+    // first/last frame of every segment: enough for reorder() and boundary scaling
+    function loadEdges(){
+        return request('edges=1&indices=all');
+    }
+
+    function ensure(indices){
+        const todo = indices.filter(i => Number.isFinite(i) && i >= 0 && !loaded.has(i) && !pending.has(i));
+        const waits = indices.filter(i => pending.has(i)).map(i => pending.get(i));
+        for (let b = 0; b < todo.length; b += batch){
+            const chunk = todo.slice(b, b + batch);
+            const p = request(`indices=${chunk.join(',')}`)
+                .then(() => { chunk.forEach(i => loaded.add(i)); })
+                .catch(err => { console.warn('Segment frame fetch failed', chunk, err); })
+                .finally(() => { chunk.forEach(i => pending.delete(i)); });
+            chunk.forEach(i => pending.set(i, p));
+            waits.push(p);
+        }
+        return Promise.all(waits);
+    }
+
+    return {
+        loadBank,
+        loadEdges,
+        ensure,
+        prefetch: (indices) => { ensure(indices); },
+        isLoaded: (i) => loaded.has(i),
+    };
+}
@@ -21,6 +21,7 @@ from torch.utils.data import DataLoader
 
 from window_dataset import PoseWindowDataset
 from models.temporal_encoder import TemporalEncoder
+from knn_index import index_path_for, update_index
 
 
 def parse_args():
@@ -94,6 +95,13 @@ def main():
     os.makedirs(os.path.dirname(args.out_embeddings) or '.', exist_ok=True)
     np.save(args.out_embeddings, combined_embs)
     print(f"Saved combined embeddings to {args.out_embeddings}")
+
+    # Insert the new rows into the existing k-NN index (saved next to the combined embeddings)
+    try:
+        update_index(args.out_embeddings, index_path_for(args.out_embeddings),
+                     base_index_path=index_path_for(args.existing_embeddings))
+    except Exception as e:
+        print(f"[warn] k-NN index update failed: {e}")
     
     # 4. Update windows index
     print("\nUpdating windows index...")
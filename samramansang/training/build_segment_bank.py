@@ -0,0 +1,165 @@
+"""
+Build the segment frame bank: every frame referenced by segments_final.json,
+extracted once into a contiguous float32 (F, 17, 3) .npy (normalized x, y, score),
+plus a small JSON table mapping segment -> (offset, length, width, height, scale, anchor).
+
+Frame ranges come from window_dataset.segment_runs, the window stitching shared
+with the server's /segments/frames and util/segments-utils.js appendSegmentFrames
+(overlapping windows of one recording continue from the previous window's last
+frame), so the server and clients can slice the bank instead of joining
+windows_index.json with raw JSONL at runtime.
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from window_dataset import read_jsonl_range, segment_runs
+
+BANK_VERSION = 1
+L_SHO, R_SHO, L_HIP, R_HIP = 5, 6, 11, 12
+CONF_THR = 0.2
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description='Extract segment frames into a memory-mappable bank')
+    p.add_argument('--segments', type=str, default='runs/segments_final.json')
+    p.add_argument('--windows_index_json', type=str, default='runs/simclr/windows_index.json')
+    p.add_argument('--files_glob', type=str, nargs='+', default=['dataset/raw/*.jsonl'])
+    p.add_argument('--out', type=str, default='runs/segment_bank.npy')
+    p.add_argument('--table_out', type=str, default='runs/segment_bank.json')
+    return p.parse_args()
+
+
+def frame_array(obj: Dict[str, Any]) -> np.ndarray:
+    """One JSONL frame -> (17, 3) float32 in normalized coordinates (zeros when no person)."""
+    out = np.zeros((17, 3), dtype=np.float32)
+    k = obj.get('kpts') or obj.get('keypoints') or []
+    if k and isinstance(k[0], list) and k[0] and isinstance(k[0][0], list):
+        k = k[0]  # multi-person frame: first person
+    for j, p in enumerate(k[:17]):
+        try:
+            out[j, 0] = float(p[0])
+            out[j, 1] = float(p[1])
+            out[j, 2] = float(p[2]) if len(p) > 2 else 1.0
+        except (TypeError, ValueError, IndexError):
+            continue
+    w, h = float(obj.get('width') or 0), float(obj.get('height') or 0)
+    if w > 0 and h > 0 and float(np.abs(out[:, :2]).max()) > 1.1:
+        out[:, 0] /= w
+        out[:, 1] /= h
+    np.nan_to_num(out, copy=False)
+    return out
+
+
+def anchor_of(k: np.ndarray) -> List[float]:
+    """Shoulder/hip center (same as anchorFromK in util/segments-utils.js)."""
+    pts = k[[L_SHO, R_SHO, L_HIP, R_HIP], :2]
+    return [round(float(pts[:, 0].mean()), 6), round(float(pts[:, 1].mean()), 6)]
+
+
+def body_scale(frames: np.ndarray) -> Optional[float]:
+    """Median shoulder width over frames where both shoulders are confident."""
+    ok = (frames[:, L_SHO, 2] >= CONF_THR) & (frames[:, R_SHO, 2] >= CONF_THR)
+    if not ok.any():
+        return None
+    sw = np.linalg.norm(frames[ok, L_SHO, :2] - frames[ok, R_SHO, :2], axis=1)
+    return round(float(np.median(sw)), 6)
+
+
+def main():
+    args = parse_args()
+    # stamp the inputs before reading, so a rewrite during the build leaves the bank stale
+    source_mtime_ns = os.stat(args.segments).st_mtime_ns
+    windows_mtime_ns = os.stat(args.windows_index_json).st_mtime_ns
+    with open(args.windows_index_json, 'r') as f:
+        W = json.load(f)
+    with open(args.segments, 'r') as f:
+        S = json.load(f)
+    segments = S.get('segments', []) if isinstance(S, dict) else S
+    T = int(W.get('window', 32))
+    windows = W.get('windows', [])
+
+    base_to_path: Dict[str, str] = {}
+    for pattern in args.files_glob:
+        for p in glob.glob(pattern):
+            base_to_path.setdefault(os.path.basename(p).replace('.jsonl', ''), p)
+
+    blocks: List[np.ndarray] = []
+    table: List[Dict[str, Any]] = []
+    offset = 0
+    for si, seg in enumerate(segments):
+        seg_frames: List[np.ndarray] = []
+        runs_out: List[Dict[str, Any]] = []
+        width = height = 0
+        fps = None
+        for run in segment_runs(seg, windows, T):
+            path = base_to_path.get(run['file'])
+            if path is None:
+                print(f'[warn] recording not found: {run["file"]}, skipping')
+                continue
+            items = read_jsonl_range(path, run['start'], run['start'] + run['count'])
+            if not items:
+                continue
+            if not width:
+                first = items[0]
+                width, height = int(first.get('width') or 0), int(first.get('height') or 0)
+                fps = first.get('fps')
+            runs_out.append({'file': run['file'], 'start': run['start'], 'count': len(items),
+                             'offset': offset + len(seg_frames)})
+            seg_frames.extend(frame_array(it) for it in items)
+
+        arr = np.stack(seg_frames) if seg_frames else np.zeros((0, 17, 3), dtype=np.float32)
+        table.append({
+            'segment_index': si,
+            'offset': offset,
+            'length': int(arr.shape[0]),
+            'width': width,
+            'height': height,
+            'fps': fps,
+            'scale': body_scale(arr) if len(arr) else None,
+            'anchor': anchor_of(arr[0]) if len(arr) else None,
+            'anchor_end': anchor_of(arr[-1]) if len(arr) else None,
+            'runs': runs_out,
+        })
+        blocks.append(arr)
+        offset += int(arr.shape[0])
+
+    bank = np.concatenate(blocks).astype(np.float32, copy=False) if blocks else np.zeros((0, 17, 3), dtype=np.float32)
+
+    # write to temp files and swap in, so readers never memory-map a half-written bank
+    os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+    tmp_bank = args.out + '.tmp'
+    with open(tmp_bank, 'wb') as f:
+        np.save(f, np.ascontiguousarray(bank))
+    os.replace(tmp_bank, args.out)
+
+    payload = {
+        'version': BANK_VERSION,
+        'bank': os.path.basename(args.out),
+        'dtype': 'float32',
+        'frames': int(bank.shape[0]),
+        'joints': 17,
+        'channels': 3,
+        'window': T,
+        'source': args.segments,
+        'source_mtime_ns': source_mtime_ns,
+        'windows_index_mtime_ns': windows_mtime_ns,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'segments': table,
+    }
+    tmp_table = args.table_out + '.tmp'
+    with open(tmp_table, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_table, args.table_out)
+    print(f'Wrote segment bank: {args.out} frames={bank.shape[0]} segments={len(table)} '
+          f'({bank.nbytes / 1e6:.1f} MB), table={args.table_out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,186 +1,163 @@
 #!/usr/bin/env python3
 """
-세그먼트들 사이의 거리를 계산하고 가장 가까운 3개 세그먼트를 찾는 스크립트
+세그먼트들 사이의 거리를 계산하고 가장 가까운 k개 세그먼트를 찾는 스크립트
+전환점 표현(기준: 마지막 윈도우, 대상: 첫 번째 윈도우)의 코사인 거리를 블록 단위 행렬곱으로 계산하고,
+argpartition으로 행마다 top-k만 남겨 희소 이웃 목록을 npz로 저장한다 (블록당 메모리: block_size x N).
+--dense를 주면 전체 거리 행렬도 함께 저장한다.
+전환점 벡터는 세그먼트 파일 옆의 요약 표(<segments>_table.npz)에서 읽는다 (표가 없을 때만 --embeddings 사용).
 """
 
 import json
+import os
 import numpy as np
 import argparse
-from typing import List, Dict, Tuple
-from scipy.spatial.distance import cdist
-from sklearn.metrics.pairwise import cosine_distances, euclidean_distances
+from typing import List, Dict, Optional, Tuple
+
+from segment_table import table_for
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Calculate distances between segments')
-    parser.add_argument('--embeddings', type=str, required=True, help='Path to embeddings.npy file')
+    parser.add_argument('--embeddings', type=str, default=None, help='Path to embeddings.npy file (only used when the segment table is missing)')
     parser.add_argument('--segments', type=str, required=True, help='Path to segments.json file')
-    parser.add_argument('--out', type=str, default='segment_distances.json', help='Output file path')
+    parser.add_argument('--out', type=str, default='segment_distances.npz', help='Output file path (.npz)')
     # distance_metric 파라미터 제거 (코사인 거리만 사용)
     parser.add_argument('--top_k', type=int, default=3, help='Number of nearest segments to find')
     # segment_representation 파라미터 제거 (transition 방법만 사용)
-    
-    return parser.parse_args()
-
+    parser.add_argument('--block_size', type=int, default=1024, help='Reference rows per distance block')
+    parser.add_argument('--dense', action='store_true', help='Also store the full float32 distance matrix')
 
-def load_embeddings(embeddings_path: str) -> np.ndarray:
-    """임베딩 파일 로드"""
-    embeddings = np.load(embeddings_path)
-    print(f"Loaded embeddings: {embeddings.shape}")
-    return embeddings
+    return parser.parse_args()
 
 
 def load_segments(segments_path: str) -> Dict:
     """세그먼트 파일 로드"""
     with open(segments_path, 'r', encoding='utf-8') as f:
         segments_data = json.load(f)
+    if isinstance(segments_data, list):
+        segments_data = {'segments': segments_data}
     print(f"Loaded segments: {len(segments_data['segments'])} segments")
     return segments_data
 
 
-def get_segment_transition_representation(embeddings: np.ndarray, segment: Dict, is_reference: bool = True) -> np.ndarray:
-    """세그먼트 전환점 표현: 기준 세그먼트는 마지막, 비교 대상은 첫 번째"""
-    start = segment['start']
-    end = segment['end']
-    
-    if is_reference:
-        # 기준 세그먼트: 마지막 윈도우 사용
-        return embeddings[end]
-    else:
-        # 비교 대상 세그먼트: 첫 번째 윈도우 사용
-        return embeddings[start]
-
-
-def calculate_segment_distances(embeddings: np.ndarray, segments: List[Dict]) -> np.ndarray:
-    """세그먼트들 사이의 거리 계산 (전환점 방법 + 코사인 거리만 사용)"""
-    print("Calculating segment distances using transition method (reference: last, target: first) with cosine distance...")
-    return calculate_transition_distances(embeddings, segments)
-
-
-def calculate_transition_distances(embeddings: np.ndarray, segments: List[Dict]) -> np.ndarray:
-    """세그먼트 전환점 거리 계산: 기준 세그먼트의 마지막 vs 비교 대상의 첫 번째 (코사인 거리만 사용)"""
-    n_segments = len(segments)
-    distance_matrix = np.zeros((n_segments, n_segments))
-    
-    for i in range(n_segments):
-        # 기준 세그먼트의 마지막 윈도우 임베딩
-        reference_vector = get_segment_transition_representation(embeddings, segments[i], is_reference=True)
-        
-        for j in range(n_segments):
-            if i == j:
-                distance_matrix[i, j] = 0.0  # 자기 자신과의 거리는 0
-            else:
-                # 비교 대상 세그먼트의 첫 번째 윈도우 임베딩
-                target_vector = get_segment_transition_representation(embeddings, segments[j], is_reference=False)
-                
-                # 코사인 거리 계산 = 1 - 코사인 유사도
-                cos_sim = np.dot(reference_vector, target_vector) / (
-                    np.linalg.norm(reference_vector) * np.linalg.norm(target_vector)
-                )
-                distance = 1 - cos_sim
-                distance_matrix[i, j] = distance
-                
-                # 디버깅: 거리가 매우 큰 경우 로그 출력
-                if distance > 0.8:
-                    print(f"⚠️ 큰 거리 발견: 세그먼트 {i} → {j}, 거리: {distance:.4f}")
-                    print(f"   세그먼트 {i}: 윈도우 {segments[i]['start']}-{segments[i]['end']}, 라벨: {segments[i]['label']}")
-                    print(f"   세그먼트 {j}: 윈도우 {segments[j]['start']}-{segments[j]['end']}, 라벨: {segments[j]['label']}")
-                    print(f"   기준 벡터 크기: {np.linalg.norm(reference_vector):.4f}")
-                    print(f"   대상 벡터 크기: {np.linalg.norm(target_vector):.4f}")
-                    print(f"   코사인 유사도: {cos_sim:.4f}")
-                    print()
-    
-    print(f"Transition distance matrix shape: {distance_matrix.shape}")
-    
-    # 거리 통계 분석
-    distances = distance_matrix[distance_matrix > 0]  # 자기 자신과의 거리(0) 제외
+def get_transition_vectors(segments_path: str, segments: List[Dict], embeddings_path: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """세그먼트 전환점 표현: 기준 세그먼트는 마지막, 비교 대상은 첫 번째 (요약 표의 L2 정규화 벡터, float32)"""
+    table = table_for(segments_path, segments, embeddings_path)
+    print(f"Loaded segment table: {table['end_emb'].shape}")
+    return table['end_emb'], table['start_emb']
+
+
+def calculate_transition_topk(
+    ref: np.ndarray,
+    tgt: np.ndarray,
+    top_k: int,
+    block_size: int = 1024,
+    dense: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, Dict]:
+    """
+    블록 단위 코사인 전환 거리 -> (이웃 인덱스 (n,k) int32, 거리 (n,k) float32, 통계)
+    dense가 주어지면 (n,n) 거리 행렬을 채운다 (대각선은 0)
+    """
+    n = ref.shape[0]
+    k = max(0, min(int(top_k), n - 1))
+    neighbors = np.zeros((n, k), dtype=np.int32)
+    distances = np.zeros((n, k), dtype=np.float32)
+    stats = {'count': 0, 'sum': 0.0, 'sumsq': 0.0, 'min': np.inf, 'max': -np.inf, 'gt_0_8': 0, 'lt_0_2': 0}
+
+    for b0 in range(0, n, max(1, block_size)):
+        b1 = min(n, b0 + block_size)
+        rows = np.arange(b1 - b0)
+        d = 1.0 - ref[b0:b1] @ tgt.T  # (B, n) 코사인 거리 = 1 - 코사인 유사도
+        if dense is not None:
+            dense[b0:b1] = d
+            dense[b0 + rows, b0 + rows] = 0.0  # 자기 자신과의 거리는 0
+
+        # 통계 (자기 자신 제외)
+        off = d.copy()
+        off[rows, b0 + rows] = np.nan
+        valid = off[~np.isnan(off)]
+        if valid.size:
+            stats['count'] += int(valid.size)
+            stats['sum'] += float(valid.sum(dtype=np.float64))
+            stats['sumsq'] += float(np.square(valid, dtype=np.float64).sum())
+            stats['min'] = min(stats['min'], float(valid.min()))
+            stats['max'] = max(stats['max'], float(valid.max()))
+            stats['gt_0_8'] += int((valid > 0.8).sum())
+            stats['lt_0_2'] += int((valid < 0.2).sum())
+
+        if k == 0:
+            continue
+        d[rows, b0 + rows] = np.inf  # 자기 자신 제외
+        part = np.argpartition(d, k - 1, axis=1)[:, :k]
+        part_d = np.take_along_axis(d, part, axis=1)
+        order = np.argsort(part_d, axis=1)
+        neighbors[b0:b1] = np.take_along_axis(part, order, axis=1)
+        distances[b0:b1] = np.take_along_axis(part_d, order, axis=1)
+
+    return neighbors, distances, stats
+
+
+def print_stats(stats: Dict):
+    if not stats['count']:
+        return
+    mean = stats['sum'] / stats['count']
+    std = float(np.sqrt(max(0.0, stats['sumsq'] / stats['count'] - mean * mean)))
     print(f"거리 통계:")
-    print(f"  평균: {np.mean(distances):.4f}")
-    print(f"  표준편차: {np.std(distances):.4f}")
-    print(f"  최소값: {np.min(distances):.4f}")
-    print(f"  최대값: {np.max(distances):.4f}")
-    print(f"  거리 > 0.8인 쌍: {np.sum(distances > 0.8)}개")
-    print(f"  거리 < 0.2인 쌍: {np.sum(distances < 0.2)}개")
-    
-    return distance_matrix
-
-
-def find_nearest_segments(distance_matrix: np.ndarray, top_k: int = 3) -> List[List[Dict]]:
-    """각 세그먼트에 대해 가장 가까운 k개 세그먼트 찾기"""
-    n_segments = distance_matrix.shape[0]
-    nearest_segments = []
-    
-    for i in range(n_segments):
-        # 자기 자신과의 거리는 무한대로 설정 (제외하기 위해)
-        distances = distance_matrix[i].copy()
-        distances[i] = np.inf
-        
-        # 가장 가까운 k개 인덱스 찾기
-        nearest_indices = np.argsort(distances)[:top_k]
-        nearest_distances = distances[nearest_indices]
-        
-        # 결과 저장
-        nearest_info = []
-        for j, (idx, dist) in enumerate(zip(nearest_indices, nearest_distances)):
-            nearest_info.append({
-                'segment_index': int(idx),
-                'distance': float(dist),
-                'rank': j + 1
-            })
-        
-        nearest_segments.append(nearest_info)
-    
-    return nearest_segments
+    print(f"  평균: {mean:.4f}")
+    print(f"  표준편차: {std:.4f}")
+    print(f"  최소값: {stats['min']:.4f}")
+    print(f"  최대값: {stats['max']:.4f}")
+    print(f"  거리 > 0.8인 쌍: {stats['gt_0_8']}개")
+    print(f"  거리 < 0.2인 쌍: {stats['lt_0_2']}개")
 
 
 def main():
     args = parse_args()
-    
+
     print("=== 세그먼트 거리 계산 시작 ===")
     print(f"임베딩 파일: {args.embeddings}")
     print(f"세그먼트 파일: {args.segments}")
     print(f"거리 메트릭: cosine")
     print(f"세그먼트 표현 방법: transition (기준: 마지막, 대상: 첫 번째)")
     print(f"상위 K개: {args.top_k}")
-    
+
     # 데이터 로드
-    embeddings = load_embeddings(args.embeddings)
     segments_data = load_segments(args.segments)
     segments = segments_data['segments']
-    
-    # 거리 계산
-    distance_matrix = calculate_segment_distances(embeddings, segments)
-    
-    # 가장 가까운 세그먼트 찾기
-    nearest_segments = find_nearest_segments(distance_matrix, args.top_k)
-    
-    # 결과 저장
-    result = {
-        'metadata': {
-            'num_segments': len(segments),
-            'distance_metric': 'cosine',
-            'segment_representation': 'transition',
-            'top_k': args.top_k,
-            'embeddings_shape': list(embeddings.shape)
-        },
-        'segments': segments,
-        'nearest_segments': nearest_segments,
-        'distance_matrix': distance_matrix.tolist()  # 전체 거리 행렬도 저장
+    n = len(segments)
+
+    # 거리 계산 (블록 단위, top-k만 유지)
+    ref, tgt = get_transition_vectors(args.segments, segments, args.embeddings)
+    dense = np.zeros((n, n), dtype=np.float32) if args.dense else None
+    neighbors, distances, stats = calculate_transition_topk(ref, tgt, args.top_k, args.block_size, dense)
+    print_stats(stats)
+
+    # 결과 저장 (희소 이웃 목록, 선택적으로 전체 행렬)
+    metadata = {
+        'num_segments': n,
+        'distance_metric': 'cosine',
+        'segment_representation': 'transition',
+        'top_k': int(neighbors.shape[1]),
+        'embedding_dim': int(ref.shape[1]),
+        'segments_path': args.segments,
+        'dense': bool(args.dense),
+    }
+    arrays = {
+        'neighbors': neighbors,
+        'distances': distances,
+        'starts': np.array([int(s['start']) for s in segments], dtype=np.int32),
+        'ends': np.array([int(s['end']) for s in segments], dtype=np.int32),
+        'labels': np.array([int(s.get('label', -1)) for s in segments], dtype=np.int32),
+        'metadata': np.array(json.dumps(metadata, ensure_ascii=False)),
     }
-    
-    with open(args.out, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
-    
+    if dense is not None:
+        arrays['distance_matrix'] = dense
+    os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+    with open(args.out, 'wb') as f:  # 파일 객체로 저장해야 확장자가 바뀌지 않음
+        np.savez_compressed(f, **arrays)
+
     print(f"=== 결과 저장 완료: {args.out} ===")
-    print(f"총 {len(segments)}개 세그먼트의 거리 정보 계산 완료")
-    
-    # 통계 정보 출력
-    distances = distance_matrix[np.triu_indices_from(distance_matrix, k=1)]
-    print(f"거리 통계:")
-    print(f"  평균: {np.mean(distances):.4f}")
-    print(f"  표준편차: {np.std(distances):.4f}")
-    print(f"  최소값: {np.min(distances):.4f}")
-    print(f"  최대값: {np.max(distances):.4f}")
+    print(f"총 {n}개 세그먼트의 거리 정보 계산 완료 (이웃 {neighbors.shape[1]}개씩)")
 
 
 if __name__ == '__main__':
@@ -7,6 +7,8 @@ from typing import List, Tuple
 from sklearn.cluster import KMeans
 from sklearn.decomposition import PCA
 
+from segment_table import build_table, save_table, table_path_for
+
 
 def parse_args():
     p = argparse.ArgumentParser(description="Cluster embeddings and detect change points")
@@ -506,6 +508,12 @@ def main():
         json.dump(payload, f, ensure_ascii=False, indent=2)
     print(f"Saved segments: {args.out}")
 
+    # Per-segment start/end/mean embeddings for downstream stages (they no longer need embeddings.npy)
+    table_path = table_path_for(args.out)
+    save_table(table_path, build_table(E, payload['segments']),
+               {'segments': os.path.basename(args.out), 'num_windows': int(E.shape[0])})
+    print(f"Saved segment table: {table_path}")
+
 
 if __name__ == '__main__':
     main()
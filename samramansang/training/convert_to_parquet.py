@@ -3,6 +3,8 @@ import glob
 import json
 import os
 
+from window_dataset import iter_recording_lines
+
 
 def parse_args():
     p = argparse.ArgumentParser(description='Convert JSONL pose files to a single Parquet')
@@ -12,16 +14,13 @@ def parse_args():
 
 
 def read_jsonl(path):
-    with open(path, 'r') as f:
-        for line in f:
-            s = line.strip()
-            if not s:
-                continue
-            try:
-                obj = json.loads(s)
-                yield obj
-            except Exception:
-                continue
+    # follows chunked recordings (<seq>.parts/*.jsonl) as well
+    for s in iter_recording_lines(path):
+        try:
+            obj = json.loads(s)
+            yield obj
+        except Exception:
+            continue
 
 
 def main():
@@ -36,7 +35,7 @@ def main():
     files.sort()
 
     # collect batches
-    ts, width, height, seq_id, frame_id, fps, kpts = [], [], [], [], [], [], []
+    ts, width, height, seq_id, frame_id, fps, kpts, gap_before = [], [], [], [], [], [], [], []
     for fp in files:
         for obj in read_jsonl(fp):
             ts.append(obj.get('ts'))
@@ -46,6 +45,7 @@ def main():
             frame_id.append(obj.get('frame_id'))
             fps.append(obj.get('fps'))
             kpts.append(obj.get('kpts') or obj.get('keypoints'))
+            gap_before.append(bool(obj.get('gap_before')))
 
     table = pa.table({
         'ts': pa.array(ts),
@@ -55,6 +55,7 @@ def main():
         'frame_id': pa.array(frame_id),
         'fps': pa.array(fps),
         'kpts': pa.array(kpts),
+        'gap_before': pa.array(gap_before),
     })
     os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
     pq.write_table(table, args.out)
@@ -4,6 +4,8 @@ import json
 import os
 from typing import Dict, List, Tuple
 
+from window_dataset import iter_recording_lines, read_jsonl_range, recording_frame_count
+
 
 def parse_args():
     p = argparse.ArgumentParser(description='Export reduced parquet for representative segments')
@@ -29,23 +31,20 @@ def merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
 
 
 def read_jsonl_selected(path: str, keep: List[Tuple[int, int]]):
-    # keep: sorted, merged ranges of line indices (0-based)
-    cur_range_idx = 0
-    pos = 0
-    rs = keep
-    with open(path, 'r') as f:
-        for line in f:
-            if cur_range_idx >= len(rs):
-                break
-            s, e = rs[cur_range_idx]
-            if pos < s:
-                pos += 1
-                continue
-            if pos > e:
-                cur_range_idx += 1
-                continue
+    # keep: sorted, merged ranges of line indices (0-based, inclusive)
+    if recording_frame_count(path) is not None:
+        # indexed recording: seek straight to each range
+        for s, e in keep:
+            yield from read_jsonl_range(path, s, e + 1)
+        return
+    ri = 0
+    for pos, line in enumerate(iter_recording_lines(path)):
+        while ri < len(keep) and pos > keep[ri][1]:
+            ri += 1
+        if ri >= len(keep):
+            break
+        if pos >= keep[ri][0]:
             yield json.loads(line)
-            pos += 1
 
 
 def main():
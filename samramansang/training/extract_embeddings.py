@@ -7,6 +7,7 @@ from torch.utils.data import DataLoader
 
 from window_dataset import PoseWindowDataset
 from models.temporal_encoder import TemporalEncoder
+from knn_index import update_index
 
 
 def parse_args():
@@ -59,6 +60,12 @@ def main():
     np.save(args.out, embs)
     print(f"Saved embeddings: {embs.shape} -> {args.out}")
 
+    # k-NN index next to the embeddings (runs/embeddings_index.npz)
+    try:
+        update_index(args.out, rebuild=True)
+    except Exception as e:
+        print(f"[warn] k-NN index build failed: {e}")
+
     # Build preview JSON aligned to dataset indices: mid-frame per window
     try:
         previews = []
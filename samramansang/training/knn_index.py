@@ -0,0 +1,224 @@
+"""
+IVF (inverted file) k-NN index over window embeddings, saved next to embeddings.npy.
+
+The index file only stores the coarse quantizer: spherical k-means centroids and
+the list assignment of every embedding row (runs/embeddings.npy ->
+runs/embeddings_index.npz). Vectors are read from embeddings.npy itself and
+L2-normalized at attach time, grouped by list, so a query scans only the
+`nprobe` nearest lists instead of the whole matrix.
+
+New windows appended by add_to_cluster.py are inserted by assigning them to
+their nearest centroid; centroids are retrained once the matrix has grown by
+`retrain_ratio` since the last training.
+
+Usage:
+    python knn_index.py --embeddings runs/embeddings.npy
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+INDEX_VERSION = 1
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description='Build or update the IVF k-NN index for window embeddings')
+    p.add_argument('--embeddings', type=str, default='runs/embeddings.npy')
+    p.add_argument('--out', type=str, default=None, help='Index path (default: <embeddings>_index.npz)')
+    p.add_argument('--nlist', type=int, default=0, help='Number of lists (0: ~4*sqrt(N))')
+    p.add_argument('--iters', type=int, default=10)
+    p.add_argument('--rebuild', action='store_true', help='Retrain centroids instead of inserting new rows')
+    return p.parse_args()
+
+
+def index_path_for(embeddings_path: str) -> str:
+    """runs/embeddings.npy -> runs/embeddings_index.npz"""
+    return os.path.splitext(embeddings_path)[0] + '_index.npz'
+
+
+def normalize_rows(X: np.ndarray, eps: float = 1e-9) -> np.ndarray:
+    X = np.asarray(X, dtype=np.float32)
+    return X / (np.linalg.norm(X, axis=1, keepdims=True) + eps)
+
+
+def row_fingerprint(E: np.ndarray, n: int) -> str:
+    """Hash of the first and n-th rows: detects a regenerated matrix with the same shape."""
+    if n <= 0:
+        return ''
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(E[0], dtype=np.float32).tobytes())
+    h.update(np.ascontiguousarray(E[n - 1], dtype=np.float32).tobytes())
+    return h.hexdigest()
+
+
+def train_centroids(Z: np.ndarray, nlist: int, iters: int = 10, sample: int = 20000, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on (a sample of) normalized rows -> (nlist, D) unit centroids."""
+    rng = np.random.default_rng(seed)
+    n = Z.shape[0]
+    X = Z[rng.choice(n, size=sample, replace=False)] if n > sample else Z
+    nlist = max(1, min(nlist, X.shape[0]))
+    C = X[rng.choice(X.shape[0], size=nlist, replace=False)].copy()
+    for _ in range(max(1, iters)):
+        a = np.argmax(X @ C.T, axis=1)
+        sums = np.zeros_like(C)
+        np.add.at(sums, a, X)
+        counts = np.bincount(a, minlength=nlist)
+        empty = counts == 0
+        if empty.any():
+            # Re-seed empty lists with random rows
+            sums[empty] = X[rng.choice(X.shape[0], size=int(empty.sum()))]
+        C = normalize_rows(sums)
+    return C
+
+
+def assign_lists(Z: np.ndarray, centroids: np.ndarray, block_size: int = 8192) -> np.ndarray:
+    """Nearest centroid per normalized row (blocked)."""
+    out = np.empty(Z.shape[0], dtype=np.int32)
+    for b0 in range(0, Z.shape[0], block_size):
+        out[b0:b0 + block_size] = np.argmax(Z[b0:b0 + block_size] @ centroids.T, axis=1)
+    return out
+
+
+class IVFIndex:
+    """Coarse quantizer (centroids + row assignment) and, once attached, list-ordered vectors."""
+
+    def __init__(self, centroids: np.ndarray, assign: np.ndarray, meta: Optional[Dict] = None):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.assign = np.asarray(assign, dtype=np.int32)
+        self.meta = dict(meta or {})
+        self._ids: Optional[np.ndarray] = None      # row ids grouped by list
+        self._vecs: Optional[np.ndarray] = None     # normalized vectors in _ids order
+        self._offsets: Optional[np.ndarray] = None  # list l -> _ids[_offsets[l]:_offsets[l+1]]
+
+    @property
+    def size(self) -> int:
+        return int(self.assign.shape[0])
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @classmethod
+    def build(cls, E: np.ndarray, nlist: int = 0, iters: int = 10) -> 'IVFIndex':
+        Z = normalize_rows(E)
+        n = Z.shape[0]
+        if nlist <= 0:
+            nlist = max(1, int(4 * np.sqrt(n)))
+        C = train_centroids(Z, nlist, iters=iters)
+        meta = {'trained_size': n, 'iters': iters}
+        index = cls(C, assign_lists(Z, C), meta)
+        index._attach_normalized(Z)
+        return index
+
+    def add(self, E_new: np.ndarray):
+        """Insert rows appended to the embeddings matrix (ids continue from size)."""
+        if E_new.shape[0] == 0:
+            return
+        Z = normalize_rows(E_new)
+        self.assign = np.concatenate([self.assign, assign_lists(Z, self.centroids)])
+        self._ids = self._vecs = self._offsets = None
+
+    def attach(self, E: np.ndarray):
+        """Load the (normalized) vectors of the indexed rows grouped by list."""
+        self._attach_normalized(normalize_rows(E[:self.size]))
+
+    def _attach_normalized(self, Z: np.ndarray):
+        order = np.argsort(self.assign, kind='stable').astype(np.int64)
+        counts = np.bincount(self.assign, minlength=self.nlist)
+        self._offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self._ids = order
+        self._vecs = np.ascontiguousarray(Z[order])
+
+    def search(self, q: np.ndarray, k: int = 10, nprobe: int = 8, exclude: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(D,) query -> (row ids, cosine distances) of the k nearest rows in the nprobe nearest lists."""
+        if self._vecs is None:
+            raise RuntimeError('index vectors are not attached')
+        q = np.asarray(q, dtype=np.float32).reshape(-1)
+        q = q / (np.linalg.norm(q) + 1e-9)
+        nprobe = max(1, min(nprobe, self.nlist))
+        csim = self.centroids @ q
+        probe = np.argpartition(-csim, nprobe - 1)[:nprobe]
+        spans = [(self._offsets[l], self._offsets[l + 1]) for l in probe]
+        sel = np.concatenate([np.arange(a, b) for a, b in spans]) if spans else np.zeros(0, dtype=np.int64)
+        ids = self._ids[sel]
+        dist = 1.0 - self._vecs[sel] @ q
+        if exclude is not None:
+            keep = ids != exclude
+            ids, dist = ids[keep], dist[keep]
+        k = min(k, ids.shape[0])
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        top = np.argpartition(dist, k - 1)[:k]
+        top = top[np.argsort(dist[top])]
+        return ids[top], dist[top]
+
+    def save(self, path: str):
+        meta = dict(self.meta, version=INDEX_VERSION, size=self.size, nlist=self.nlist,
+                    dim=int(self.centroids.shape[1]))
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:  # file object keeps the .tmp name (np.savez would append .npz)
+            np.savez(f, centroids=self.centroids, assign=self.assign, metadata=np.array(json.dumps(meta)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'IVFIndex':
+        with np.load(path) as z:
+            meta = json.loads(str(z['metadata']))
+            if meta.get('version') != INDEX_VERSION:
+                raise ValueError(f'unsupported index version: {meta.get("version")}')
+            return cls(z['centroids'], z['assign'], meta)
+
+
+def update_index(embeddings_path: str, index_path: Optional[str] = None, base_index_path: Optional[str] = None,
+                 nlist: int = 0, iters: int = 10, retrain_ratio: float = 2.0, rebuild: bool = False) -> IVFIndex:
+    """
+    Bring the index in line with embeddings_path and save it.
+    base_index_path (default: index_path) is reused when its rows are a prefix of the
+    matrix: only the new tail rows are inserted. Otherwise the centroids are retrained.
+    """
+    index_path = index_path or index_path_for(embeddings_path)
+    base_index_path = base_index_path or index_path
+    E = np.load(embeddings_path, mmap_mode='r')
+    n = E.shape[0]
+
+    index = None
+    if not rebuild and os.path.exists(base_index_path):
+        try:
+            index = IVFIndex.load(base_index_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f'[warn] Ignoring unreadable index {base_index_path}: {e}')
+        if index is not None:
+            m = index.size
+            compatible = (index.centroids.shape[1] == E.shape[1] and m <= n
+                          and index.meta.get('fingerprint') == row_fingerprint(E, m))
+            grown = n > retrain_ratio * max(1, int(index.meta.get('trained_size', m)))
+            if not compatible or grown:
+                index = None
+
+    if index is None:
+        index = IVFIndex.build(E, nlist=nlist, iters=iters)
+        print(f'Built IVF index: {index.size} rows, {index.nlist} lists')
+    else:
+        added = n - index.size
+        index.add(E[index.size:])
+        print(f'Inserted {added} rows into IVF index ({index.size} rows, {index.nlist} lists)')
+
+    index.meta['fingerprint'] = row_fingerprint(E, index.size)
+    index.save(index_path)
+    print(f'Saved index -> {index_path}')
+    return index
+
+
+def main():
+    args = parse_args()
+    update_index(args.embeddings, args.out, nlist=args.nlist, iters=args.iters, rebuild=args.rebuild)
+
+
+if __name__ == '__main__':
+    main()
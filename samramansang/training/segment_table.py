@@ -0,0 +1,140 @@
+"""
+Per-segment embedding summary table, saved next to a segments JSON.
+
+runs/segments.json -> runs/segments_table.npz holds one row per segment, in file order:
+  starts, ends, lengths, labels     int32 (window range as written in the JSON, length in windows)
+  start_emb, end_emb, mean_emb      float32 (M, D), L2-normalized
+cluster_and_segment.py writes it from the window-level matrix it already holds; later stages
+(select_representatives.py, segments_final, calculate_segment_distances.py, live matching) read
+only this table. Stages that keep a subset of segments write the matching subset table next to
+their own output (segments_representative_table.npz, segments_final_table.npz).
+
+Usage (rebuild for an existing segments file):
+    python segment_table.py --segments runs/segments.json --embeddings runs/embeddings.npy
+"""
+
+import argparse
+import json
+import os
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+TABLE_VERSION = 1
+TABLE_ARRAYS = ('starts', 'ends', 'lengths', 'labels', 'start_emb', 'end_emb', 'mean_emb')
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description='Build the per-segment embedding table for a segments JSON')
+    p.add_argument('--segments', type=str, required=True)
+    p.add_argument('--embeddings', type=str, required=True)
+    p.add_argument('--out', type=str, default=None, help='Table path (default: <segments>_table.npz)')
+    return p.parse_args()
+
+
+def table_path_for(segments_path: str) -> str:
+    """runs/segments.json -> runs/segments_table.npz"""
+    return os.path.splitext(segments_path)[0] + '_table.npz'
+
+
+def _normalize_rows(X: np.ndarray, eps: float = 1e-9) -> np.ndarray:
+    X = np.asarray(X, dtype=np.float32)
+    return X / (np.linalg.norm(X, axis=1, keepdims=True) + eps)
+
+
+def build_table(E: np.ndarray, segments: List[Dict]) -> Dict[str, np.ndarray]:
+    """Summarize each segment's windows of E (array or memory map; only the segment rows are read)."""
+    n, dim = E.shape[0], E.shape[1]
+    m = len(segments)
+    starts = np.array([int(s.get('start', 0)) for s in segments], dtype=np.int32)
+    ends = np.array([int(s.get('end', s.get('start', 0))) for s in segments], dtype=np.int32)
+    labels = np.array([int(s.get('label', -1)) for s in segments], dtype=np.int32)
+
+    s_idx = np.clip(starts, 0, n - 1)
+    e_idx = np.clip(np.maximum(ends, starts), 0, n - 1)
+    means = np.zeros((m, dim), dtype=np.float32)
+    for i in range(m):
+        means[i] = np.asarray(E[s_idx[i]:e_idx[i] + 1], dtype=np.float32).mean(axis=0)
+
+    return {
+        'starts': starts,
+        'ends': ends,
+        'lengths': (e_idx - s_idx + 1).astype(np.int32),
+        'labels': labels,
+        'start_emb': _normalize_rows(E[s_idx] if m else np.zeros((0, dim))),
+        'end_emb': _normalize_rows(E[e_idx] if m else np.zeros((0, dim))),
+        'mean_emb': _normalize_rows(means),
+    }
+
+
+def subset_table(table: Dict[str, np.ndarray], rows) -> Dict[str, np.ndarray]:
+    rows = np.asarray(rows, dtype=np.int64)
+    return {name: table[name][rows] for name in TABLE_ARRAYS}
+
+
+def save_table(path: str, table: Dict[str, np.ndarray], meta: Optional[Dict] = None):
+    meta = dict(meta or {}, version=TABLE_VERSION, num_segments=int(table['starts'].shape[0]),
+                dim=int(table['mean_emb'].shape[1]))
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:  # file object keeps the .tmp name (np.savez would append .npz)
+        np.savez(f, metadata=np.array(json.dumps(meta)), **{name: table[name] for name in TABLE_ARRAYS})
+    os.replace(tmp, path)
+
+
+def load_table(path: str) -> Dict[str, np.ndarray]:
+    with np.load(path) as z:
+        meta = json.loads(str(z['metadata']))
+        if meta.get('version') != TABLE_VERSION:
+            raise ValueError(f'unsupported segment table version: {meta.get("version")}')
+        table = {name: z[name] for name in TABLE_ARRAYS}
+    table['meta'] = meta
+    return table
+
+
+def rows_for(table: Dict[str, np.ndarray], segments: List[Dict]) -> np.ndarray:
+    """Table row of each segment, matched by (start, end); -1 where the table has no such segment."""
+    lookup = {}
+    for i, (s, e) in enumerate(zip(table['starts'].tolist(), table['ends'].tolist())):
+        lookup.setdefault((s, e), i)
+    return np.array([lookup.get((int(seg.get('start', 0)), int(seg.get('end', seg.get('start', 0)))), -1)
+                     for seg in segments], dtype=np.int64)
+
+
+def table_for(segments_path: str, segments: List[Dict], embeddings_path: Optional[str] = None,
+              load: Callable[[str], Dict[str, np.ndarray]] = load_table) -> Dict[str, np.ndarray]:
+    """
+    Table rows aligned with `segments` (the parsed contents of segments_path).
+    Reads the table saved next to segments_path; segments missing from it (or a missing
+    table, e.g. runs from before the table existed) fall back to summarizing embeddings_path.
+    """
+    path = table_path_for(segments_path)
+    if os.path.exists(path):
+        try:
+            table = load(path)
+            rows = rows_for(table, segments)
+            if rows.size == 0 or rows.min() >= 0:
+                return subset_table(table, rows)
+            print(f'[warn] {path} does not cover {int((rows < 0).sum())} segments of {segments_path}')
+        except (OSError, ValueError, KeyError) as e:
+            print(f'[warn] Ignoring unreadable segment table {path}: {e}')
+    if not embeddings_path or not os.path.exists(embeddings_path):
+        raise FileNotFoundError(f'segment table not found: {path}')
+    print(f'[warn] Summarizing segments from {embeddings_path} (no usable {path})')
+    return build_table(np.load(embeddings_path, mmap_mode='r'), segments)
+
+
+def main():
+    args = parse_args()
+    with open(args.segments, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    segments = data.get('segments', []) if isinstance(data, dict) else data
+    E = np.load(args.embeddings, mmap_mode='r')
+    out = args.out or table_path_for(args.segments)
+    save_table(out, build_table(E, segments), {'segments': os.path.basename(args.segments),
+                                               'num_windows': int(E.shape[0])})
+    print(f'Saved segment table: {len(segments)} segments -> {out}')
+
+
+if __name__ == '__main__':
+    main()
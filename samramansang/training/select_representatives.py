@@ -5,10 +5,13 @@ from typing import Dict, List, Tuple
 
 import numpy as np
 
+from segment_table import save_table, subset_table, table_for, table_path_for
+from window_dataset import read_jsonl_frame
+
 
 def parse_args():
     p = argparse.ArgumentParser(description="Select representative segments by deduplicating similar motions")
-    p.add_argument("--embeddings", type=str, required=True, help="window-level embeddings (N,D) .npy")
+    p.add_argument("--embeddings", type=str, default=None, help="window-level embeddings (N,D) .npy, only used when the segment table is missing")
     p.add_argument("--segments", type=str, required=True, help="segments.json from clustering")
     p.add_argument("--out", type=str, default="runs/segments_representative.json")
     p.add_argument("--method", type=str, default="per_label_k", choices=["per_label_k", "threshold"])
@@ -21,15 +24,6 @@ def parse_args():
     return p.parse_args()
 
 
-def segment_mean_embedding(E: np.ndarray, seg: Dict) -> np.ndarray:
-    s = int(seg["start"])
-    e = int(seg["end"])
-    e = min(e, E.shape[0] - 1)
-    s = max(0, min(s, e))
-    mean = E[s : e + 1].mean(axis=0)
-    return mean
-
-
 def normalize_rows(X: np.ndarray) -> np.ndarray:
     n = np.linalg.norm(X, axis=1, keepdims=True) + 1e-9
     return X / n
@@ -70,20 +64,6 @@ def threshold_greedy(seg_embs: np.ndarray, labels: np.ndarray, thr: float) -> Li
     return selected
 
 
-def _read_jsonl(path: str):
-    out = []
-    with open(path, 'r') as f:
-        for line in f:
-            s = line.strip()
-            if not s:
-                continue
-            try:
-                out.append(json.loads(s))
-            except Exception:
-                pass
-    return out
-
-
 def _get_kpts(item):
     k = item.get('kpts') or item.get('keypoints') or []
     if isinstance(k, list) and len(k) >= 17 and isinstance(k[0], (list, tuple)):
@@ -167,7 +147,6 @@ def main():
     args = parse_args()
     os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
 
-    E = np.load(args.embeddings)  # (N,D) window-level
     with open(args.segments, 'r') as f:
         S = json.load(f)
     segments = S.get('segments', [])
@@ -179,8 +158,9 @@ def main():
         print("No segments to select representatives from.")
         return
 
-    # compute segment embeddings as mean over windows
-    seg_embs = np.stack([segment_mean_embedding(E, seg) for seg in segments], axis=0)
+    # segment embeddings (mean over windows) from the table written by cluster_and_segment.py
+    table = table_for(args.segments, segments, args.embeddings)
+    seg_embs = table['mean_emb']
 
     # Optional: filter segments by start/end scale change
     valid_mask = np.ones(len(segments), dtype=bool)
@@ -206,10 +186,10 @@ def main():
                 path = base_to_path.get(base)
                 if not path:
                     return None
-                arr = _read_jsonl(path)
-                if frame_idx < 0 or frame_idx >= len(arr):
+                if frame_idx < 0:
                     return None
-                return arr[frame_idx]
+                # O(1) through the recording index when present, a scan otherwise
+                return read_jsonl_frame(path, frame_idx)
 
             for i, seg in enumerate(segments):
                 ws, we = int(seg['start']), int(seg['end'])
@@ -229,6 +209,7 @@ def main():
             # apply mask
             seg_embs = seg_embs[valid_mask]
             labels = labels[valid_mask]
+            table = subset_table(table, np.where(valid_mask)[0])
             segments = [seg for (seg, ok) in zip(segments, valid_mask) if ok]
         except Exception as e:
             print(f"[warn] scale filter skipped: {e}")
@@ -250,6 +231,7 @@ def main():
     with open(args.out, 'w') as f:
         json.dump(payload, f, ensure_ascii=False, indent=2)
     print(f"Saved representative segments: {len(reps)} -> {args.out}")
+    save_table(table_path_for(args.out), subset_table(table, idx), {'segments': os.path.basename(args.out)})
 
 
 if __name__ == '__main__':
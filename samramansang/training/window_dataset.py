@@ -1,6 +1,7 @@
 import os
 import glob
 import json
+import struct
 from typing import List, Tuple, Dict, Any, Optional
 
 import numpy as np
@@ -35,21 +36,160 @@ COCO_LEFT_RIGHT_MAP = {
 }
 
 
+# Recordings written by PoseRecorder may be split into chunks:
+#   seq-<ms>.jsonl                 first chunk (what *.jsonl globs see)
+#   seq-<ms>.parts/000001.jsonl    following chunks, in order
+#   seq-<ms>.idx                   fixed-size records (chunk u32, byte offset u64) per frame_id
+#   seq-<ms>.manifest.json         chunk list / frame count, rewritten on rollover and stop
+INDEX_RECORD = struct.Struct('<IQ')
+
+
+def _recording_base(path: str) -> str:
+    return path[:-len('.jsonl')] if path.endswith('.jsonl') else path
+
+
+def recording_index_path(path: str) -> str:
+    return _recording_base(path) + '.idx'
+
+
+def recording_manifest_path(path: str) -> str:
+    return _recording_base(path) + '.manifest.json'
+
+
+def recording_chunk_paths(path: str) -> List[str]:
+    """All chunk files of a recording in order (just [path] for plain JSONL files)."""
+    parts_dir = _recording_base(path) + '.parts'
+    if not os.path.isdir(parts_dir):
+        return [path]
+    return [path] + sorted(glob.glob(os.path.join(parts_dir, '*.jsonl')))
+
+
+def iter_recording_lines(path: str):
+    """Yield non-empty lines across all chunks of a recording."""
+    for chunk in recording_chunk_paths(path):
+        with open(chunk, 'r', encoding='utf-8') as f:
+            for line in f:
+                s = line.strip()
+                if s:
+                    yield s
+
+
+def recording_frame_count(path: str) -> Optional[int]:
+    """
+    Frame count from the recorder's sidecar index. None (callers scan the file instead)
+    unless the recording has a manifest and the last index record points inside the data,
+    so an index that no longer matches a rewritten file is never trusted.
+    """
+    idx = recording_index_path(path)
+    if not os.path.exists(idx) or not os.path.exists(recording_manifest_path(path)):
+        return None
+    n = os.path.getsize(idx) // INDEX_RECORD.size
+    if n == 0:
+        return 0
+    chunks = recording_chunk_paths(path)
+    with open(idx, 'rb') as f:
+        f.seek((n - 1) * INDEX_RECORD.size)
+        chunk_i, offset = INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))
+    if chunk_i >= len(chunks) or offset >= os.path.getsize(chunks[chunk_i]):
+        return None
+    return n
+
+
+def read_jsonl_range(path: str, start: int, end: int) -> List[Dict[str, Any]]:
+    """
+    Frames [start, end) of a recording. Seeks straight to `start` through the index
+    when there is one; falls back to scanning plain JSONL files.
+    """
+    start = max(0, int(start))
+    end = int(end)
+    if end <= start:
+        return []
+    chunks = recording_chunk_paths(path)
+    count = recording_frame_count(path)
+    out: List[Dict[str, Any]] = []
+    if count is None:
+        for i, s in enumerate(iter_recording_lines(path)):
+            if i >= end:
+                break
+            if i >= start:
+                try:
+                    out.append(json.loads(s))
+                except Exception:
+                    continue
+        return out
+    if start >= count:
+        return out
+    with open(recording_index_path(path), 'rb') as f:
+        f.seek(start * INDEX_RECORD.size)
+        chunk_i, offset = INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))
+    remaining = min(end, count) - start
+    while remaining > 0 and chunk_i < len(chunks):
+        with open(chunks[chunk_i], 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                s = line.strip()
+                if not s:
+                    continue
+                try:
+                    out.append(json.loads(s))
+                except Exception:
+                    pass
+                remaining -= 1
+                if remaining <= 0:
+                    break
+        chunk_i += 1
+        offset = 0
+    return out
+
+
+def read_jsonl_frame(path: str, frame_idx: int) -> Optional[Dict[str, Any]]:
+    """Single frame by position (O(1) with an index)."""
+    items = read_jsonl_range(path, frame_idx, frame_idx + 1)
+    return items[0] if items else None
+
+
+def segment_runs(seg: Dict[str, Any], windows: List[Dict[str, Any]], T: int) -> List[Dict[str, Any]]:
+    """
+    Segment (window range) -> [{"file", "start", "count"}] frame runs, overlaps stitched:
+    consecutive windows of one recording continue from the previous window's last frame
+    (same as appendSegmentFrames in util/segments-utils.js). "file" is the recording
+    basename without .jsonl.
+    """
+    ws = int(seg.get('start', 0))
+    we = int(seg.get('end', ws))
+    runs: List[Dict[str, Any]] = []
+    prev_base, prev_end = None, -1
+    for wi in range(ws, we + 1):
+        if wi < 0 or wi >= len(windows):
+            continue
+        wrec = windows[wi]
+        base = (wrec.get('file') or '').replace('.jsonl', '')
+        start = int(wrec.get('start', 0))
+        end = start + T - 1
+        sfi = start
+        if prev_base == base and prev_end >= 0:
+            sfi = max(sfi, prev_end + 1)
+        if sfi <= end:
+            last = runs[-1] if runs else None
+            if last and last['file'] == base and last['start'] + last['count'] == sfi:
+                last['count'] += end - sfi + 1
+            else:
+                runs.append({'file': base, 'start': sfi, 'count': end - sfi + 1})
+        prev_base, prev_end = base, end
+    return runs
+
+
 def read_jsonl(path: str) -> List[Dict[str, Any]]:
     items: List[Dict[str, Any]] = []
-    with open(path, 'r') as f:
-        for line in f:
-            s = line.strip()
-            if not s:
-                continue
-            try:
-                obj = json.loads(s)
-                if isinstance(obj, dict) and ('kpts' in obj or 'keypoints' in obj):
-                    if 'kpts' not in obj and 'keypoints' in obj:
-                        obj['kpts'] = obj['keypoints']
-                    items.append(obj)
-            except Exception:
-                continue
+    for s in iter_recording_lines(path):
+        try:
+            obj = json.loads(s)
+            if isinstance(obj, dict) and ('kpts' in obj or 'keypoints' in obj):
+                if 'kpts' not in obj and 'keypoints' in obj:
+                    obj['kpts'] = obj['keypoints']
+                items.append(obj)
+        except Exception:
+            continue
     return items
 
 
@@ -63,7 +203,7 @@ def read_parquet(path: str) -> List[Dict[str, Any]]:
     for i in range(n):
         obj: Dict[str, Any] = {}
         # copy known fields if present
-        for key in ('ts','width','height','seq_id','frame_id','fps'):
+        for key in ('ts','width','height','seq_id','frame_id','fps','gap_before'):
             if key in cols:
                 obj[key] = cols[key][i]
         if 'kpts' in cols:
@@ -93,6 +233,22 @@ def to_numpy_window(seq: List[Dict[str, Any]], start: int, T: int) -> np.ndarray
     return arr
 
 
+def gap_cumsum(seq: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Cumulative count of gap markers (frames with 'gap_before', written by the
+    recorder's motion gate after dropped idle frames). A window [s, s+T) crosses
+    a gap iff cum[min(s+T, N)-1] - cum[s] > 0.
+    """
+    return np.cumsum([1 if it.get('gap_before') else 0 for it in seq], dtype=np.int64)
+
+
+def window_crosses_gap(cum: np.ndarray, start: int, T: int) -> bool:
+    if len(cum) == 0:
+        return False
+    end = min(start + T, len(cum)) - 1
+    return bool(cum[end] - cum[start] > 0)
+
+
 def validity_ok(arr: np.ndarray, min_visible_per_frame: int = 10, conf_thr: float = 0.2) -> bool:
     # arr: (T, 17, 3)
     scores = arr[..., 2]
@@ -188,7 +344,10 @@ def make_windows(
         if not seq:
             continue
         N = len(seq)
+        cum = gap_cumsum(seq)
         for s in range(0, max(1, N - T + 1), stride):
+            if window_crosses_gap(cum, s, T):
+                continue
             arr = to_numpy_window(seq, s, T)
             if validity_ok(arr, min_visible_per_frame, conf_thr):
                 out.append(center_and_scale(arr))
@@ -230,7 +389,11 @@ class PoseWindowDataset(Dataset):
                 continue
             self._seqs.append(seq)
             T = self.window_size
+            cum = gap_cumsum(seq)
             for s in range(0, max(1, len(seq) - T + 1), self.stride):
+                # never stitch frames from both sides of a motion-gate gap into one window
+                if window_crosses_gap(cum, s, T):
+                    continue
                 arr = to_numpy_window(seq, s, T)
                 if validity_ok(arr, self.min_visible, self.conf_thr):
                     self._index.append((si, s))
@@ -0,0 +1,267 @@
+"""
+학습 작업 리소스 거버너
+실시간 추론(InferRunner)과 같은 장비에서 학습 파이프라인 서브프로세스를 돌릴 때
+라이브 경로가 우선되도록 스레드 수/우선순위를 제한하고, 추론 지연이 예산을 넘으면
+학습 프로세스 그룹을 듀티 사이클(SIGSTOP/SIGCONT)로 스로틀링한다.
+- 예산은 감시 시작 직전의 추론 지연(기준선)보다 낮아지지 않음 (느린 CPU에서 시작부터 멈추지 않도록)
+- 캡처가 멈춰 있으면(라이브 경로 유휴) 결과 경과 시간은 지연으로 보지 않음
+- 듀티는 최소값(TRAINING_MIN_DUTY) 아래로 내려가지 않아 학습은 항상 조금씩 진행됨
+"""
+
+import os
+import shutil
+import signal
+import threading
+import time
+import logging
+from collections import deque
+
+logger = logging.getLogger('training')
+
+# 서브프로세스 스레드 수 제한에 사용하는 환경 변수들 (torch/OpenMP/BLAS/numba)
+THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMBA_NUM_THREADS',
+)
+
+
+class TrainingGovernor:
+    """라이브 우선 학습 리소스 거버너"""
+
+    def __init__(
+        self,
+        max_threads: int = int(os.getenv("TRAINING_MAX_THREADS", "2")),
+        max_workers: int = int(os.getenv("TRAINING_MAX_WORKERS", "1")),
+        nice: int = int(os.getenv("TRAINING_NICE", "10")),
+        latency_budget_ms: float = float(os.getenv("LIVE_LATENCY_BUDGET_MS", "80")),
+        min_duty: float = float(os.getenv("TRAINING_MIN_DUTY", "0.15")),
+        baseline_headroom: float = 1.25,
+        resume_ratio: float = 0.8,
+        period: float = 1.0,
+        check_interval: float = 0.5,
+    ):
+        self.max_threads = max(1, max_threads)
+        self.max_workers = max(0, max_workers)
+        self.nice = nice
+        self.latency_budget_ms = latency_budget_ms
+        self.min_duty = min(1.0, max(0.05, min_duty))
+        self.baseline_headroom = baseline_headroom  # 기준선 지연의 이 배수까지는 학습 영향으로 보지 않음
+        self.resume_ratio = resume_ratio  # 예산의 이 비율 아래로 내려가야 듀티를 다시 올림 (히스테리시스)
+        self.period = period              # 스로틀링 듀티 사이클 주기 (초)
+        self.check_interval = check_interval
+
+        self.infer = None
+        self._lock = threading.Lock()
+        self._proc = None
+        self._monitor = None
+        self._stop_event = threading.Event()
+        self._paused = False
+        self.duty = 1.0          # 1.0 = 정상 실행, min_duty까지 스로틀링
+        self.mode = 'idle'       # idle | running | throttled
+        self.live_latency_ms = None
+        self.baseline_latency_ms = None  # 감시 시작 직전 추론 지연
+        self._last_capture_seq = None
+        self.paused_seconds = 0.0  # 서버 시작 이후 누적 정지 시간
+        self.decisions = deque(maxlen=50)
+
+    # ------------------------------------------------------------------
+    # 서브프로세스 설정
+    # ------------------------------------------------------------------
+    def attach_infer(self, infer):
+        """라이브 추론 지연을 읽어올 InferRunner (get_stats() 제공) 연결"""
+        self.infer = infer
+
+    def subprocess_env(self, base=None):
+        """스레드 수가 제한된 서브프로세스 환경 변수"""
+        env = dict(base if base is not None else os.environ)
+        for key in THREAD_ENV_VARS:
+            env[key] = str(self.max_threads)
+        env['PYTHONUNBUFFERED'] = '1'
+        return env
+
+    def command(self, cmd):
+        """
+        낮은 우선순위로 실행할 명령 (nice -n 접두사, 자식/DataLoader 워커까지 상속)
+        멀티스레드 서버에서 안전하지 않은 preexec_fn 대신 사용
+        """
+        cmd = list(cmd)
+        if os.name == 'posix' and self.nice > 0 and shutil.which('nice'):
+            return ['nice', '-n', str(self.nice)] + cmd
+        return cmd
+
+    def popen_kwargs(self):
+        """subprocess.Popen/run에 넘길 인자 (스레드 제한 + 별도 프로세스 그룹, 우선순위는 command()로)"""
+        kwargs = {'env': self.subprocess_env()}
+        if os.name == 'posix':
+            kwargs['start_new_session'] = True  # 프로세스 그룹 단위로 DataLoader 워커까지 함께 정지/재개
+        return kwargs
+
+    def cap_workers(self, requested):
+        """DataLoader 워커 수 상한 적용"""
+        requested = int(requested)
+        capped = min(requested, self.max_workers)
+        if capped != requested:
+            self._decide('cap_workers', f"DataLoader workers {requested} -> {capped}")
+        return capped
+
+    # ------------------------------------------------------------------
+    # 감시/스로틀링
+    # ------------------------------------------------------------------
+    def watch(self, proc):
+        """학습 서브프로세스를 감시 대상으로 등록하고 모니터 스레드 시작"""
+        self.release()
+        # 학습이 아직 부하를 주기 전의 추론 지연을 기준선으로 (EMA라 방금 시작한 자식의 영향은 거의 없음)
+        baseline = None
+        st = self._infer_stats()
+        if st and st.get('infer_count'):
+            baseline = float(st.get('latency_ms_ema') or 0.0) or None
+        with self._lock:
+            self._proc = proc
+            self._stop_event = threading.Event()
+            self._paused = False
+            self.duty = 1.0
+            self.mode = 'running'
+            self.baseline_latency_ms = baseline
+            self._last_capture_seq = st.get('capture_seq') if st else None
+        self._decide('watch', f"pid={proc.pid} threads={self.max_threads} nice=+{self.nice} "
+                              f"budget={self.effective_budget_ms():.0f}ms baseline={baseline if baseline is not None else '-'}ms")
+        self._monitor = threading.Thread(target=self._monitor_loop, args=(proc, self._stop_event), daemon=True)
+        self._monitor.start()
+
+    def release(self):
+        """감시 종료 (정지 상태였다면 재개시켜 종료 신호를 처리할 수 있게 함)"""
+        monitor = self._monitor
+        self._stop_event.set()
+        if monitor is not None and monitor is not threading.current_thread():
+            monitor.join(timeout=self.period * 2)
+        with self._lock:
+            proc = self._proc
+            self._proc = None
+            self._monitor = None
+            was_active = self.mode != 'idle'
+            self.mode = 'idle'
+            self.duty = 1.0
+        if proc is not None:
+            self._signal(proc, 'SIGCONT')
+        if was_active:
+            self._decide('release', 'training process released')
+
+    def _signal(self, proc, name):
+        sig = getattr(signal, name, None)
+        if sig is None or proc.poll() is not None:
+            return
+        try:
+            if os.name == 'posix':
+                os.killpg(os.getpgid(proc.pid), sig)
+            else:
+                proc.send_signal(sig)
+            self._paused = (name == 'SIGSTOP')
+        except Exception as e:
+            logger.warning(f"⚠️ 거버너 시그널 전송 실패 ({name}): {e}")
+
+    def _pause(self, proc):
+        if not self._paused:
+            self._signal(proc, 'SIGSTOP')
+
+    def _resume(self, proc):
+        if self._paused:
+            self._signal(proc, 'SIGCONT')
+
+    def _infer_stats(self):
+        if self.infer is None or not hasattr(self.infer, 'get_stats'):
+            return None
+        try:
+            return self.infer.get_stats()
+        except Exception:
+            return None
+
+    def effective_budget_ms(self):
+        """설정 예산과 기준선 지연 x 여유 배수 중 큰 값"""
+        budget = self.latency_budget_ms
+        if self.baseline_latency_ms:
+            budget = max(budget, self.baseline_latency_ms * self.baseline_headroom)
+        return budget
+
+    def _read_live_latency(self):
+        """라이브 추론 지연 (캡처가 진행 중이 아니면 None - 보호할 라이브 경로가 없음)"""
+        st = self._infer_stats()
+        if st is None:
+            return None
+        seq = st.get('capture_seq')
+        advancing = seq is not None and seq != self._last_capture_seq
+        self._last_capture_seq = seq
+        if not advancing:
+            return None
+        lat = float(st.get('latency_ms_ema') or 0.0)
+        age = st.get('result_age_ms')
+        # 캡처는 진행 중인데 추론이 멈춘 경우(결과가 오래됨)도 지연으로 간주
+        if age is not None:
+            lat = max(lat, float(age))
+        return lat
+
+    def _update_duty(self):
+        lat = self._read_live_latency()
+        self.live_latency_ms = round(lat, 1) if lat is not None else None
+        if self.latency_budget_ms <= 0:
+            return
+        budget = self.effective_budget_ms()
+        prev = self.duty
+        if lat is not None and lat > budget:
+            self.duty = max(self.min_duty, round(self.duty - 0.25, 2))
+        elif lat is None or lat < budget * self.resume_ratio:
+            # 라이브 경로가 유휴이거나 여유가 있으면 듀티 회복
+            self.duty = min(1.0, round(self.duty + 0.1, 2))
+        if self.duty != prev:
+            mode = 'running' if self.duty >= 1.0 else 'throttled'
+            with self._lock:
+                self.mode = mode
+            reason = f"live latency {lat:.1f}ms" if lat is not None else "live path idle"
+            self._decide(mode, f"{reason} (budget {budget:.0f}ms) duty {prev:.2f} -> {self.duty:.2f}")
+
+    def _monitor_loop(self, proc, stop_event):
+        while not stop_event.is_set() and proc.poll() is None:
+            self._update_duty()
+            if self.duty >= 1.0:
+                self._resume(proc)
+                stop_event.wait(self.check_interval)
+            else:
+                # 듀티 사이클: duty 비율만큼 실행, 나머지 시간은 정지
+                self._resume(proc)
+                if stop_event.wait(self.period * self.duty):
+                    break
+                self._pause(proc)
+                t0 = time.perf_counter()
+                stop_event.wait(self.period * (1.0 - self.duty))
+                self.paused_seconds += time.perf_counter() - t0
+        self._resume(proc)
+
+    def _decide(self, action, detail):
+        entry = {'timestamp': time.time(), 'action': action, 'detail': detail}
+        self.decisions.append(entry)
+        logger.info(f"🛡️ 거버너: {action} - {detail}")
+
+    def status(self):
+        """/training/status에 포함되는 거버너 상태"""
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'duty': self.duty,
+                'live_latency_ms': self.live_latency_ms,
+                'latency_budget_ms': self.latency_budget_ms,
+                'effective_budget_ms': round(self.effective_budget_ms(), 1),
+                'baseline_latency_ms': self.baseline_latency_ms,
+                'min_duty': self.min_duty,
+                'max_threads': self.max_threads,
+                'max_workers': self.max_workers,
+                'nice': self.nice,
+                'paused_seconds': round(self.paused_seconds, 1),
+                'decisions': list(self.decisions)[-20:],
+            }
+
+
+# 전역 학습 거버너 (training_router / record_router에서 공유)
+training_governor = TrainingGovernor()
@@ -6,13 +6,16 @@ Training Router Module
 import subprocess
 import threading
 import json
+import asyncio
 import os
-import glob
 import time
 import re
 import logging
 from aiohttp import web
 
+from training_governor import training_governor
+from dataset_catalog import dataset_catalog
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -103,12 +106,14 @@ def run_clustering_only_pipeline(config):
         print(f"[CLUSTERING] {' '.join(cluster_cmd)}")
         # Stream logs line-by-line
         process = subprocess.Popen(
-            cluster_cmd,
+            training_governor.command(cluster_cmd),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             universal_newlines=True,
-            bufsize=1
+            bufsize=1,
+            **training_governor.popen_kwargs()
         )
+        training_governor.watch(process)
         for line in iter(process.stdout.readline, ''):
             if not training_status['is_running']:
                 try:
@@ -130,6 +135,7 @@ def run_clustering_only_pipeline(config):
                     if len(training_status['log_entries']) > 200:
                         training_status['log_entries'] = training_status['log_entries'][-200:]
         rc = process.wait()
+        training_governor.release()
         if rc != 0:
             raise subprocess.CalledProcessError(rc, cluster_cmd)
         
@@ -159,12 +165,14 @@ def run_clustering_only_pipeline(config):
         logger.info(f"🔧 대표 샘플 선택 명령어: {' '.join(reps_cmd)}")
         print(f"[REPRESENTATIVES] {' '.join(reps_cmd)}")
         reps_proc = subprocess.Popen(
-            reps_cmd,
+            training_governor.command(reps_cmd),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             universal_newlines=True,
-            bufsize=1
+            bufsize=1,
+            **training_governor.popen_kwargs()
         )
+        training_governor.watch(reps_proc)
         for line in iter(reps_proc.stdout.readline, ''):
             if not training_status['is_running']:
                 try:
@@ -186,6 +194,7 @@ def run_clustering_only_pipeline(config):
                     if len(training_status['log_entries']) > 200:
                         training_status['log_entries'] = training_status['log_entries'][-200:]
         rc = reps_proc.wait()
+        training_governor.release()
         if rc != 0:
             raise subprocess.CalledProcessError(rc, reps_cmd)
         
@@ -282,7 +291,8 @@ def run_training_pipeline(config):
                 '--lr', str(config['lr']),
                 '--weight_decay', str(config.get('weight_decay', 1e-4)),
                 '--temperature', str(config.get('temperature', 0.1)),
-                '--workers', str(config.get('workers', 4)),
+                # 라이브 추론과 CPU를 나눠 쓰므로 워커 수는 거버너 상한 적용
+                '--workers', str(training_governor.cap_workers(config.get('workers', 4))),
                 '--device', 'cuda' if os.system('nvidia-smi > /dev/null 2>&1') == 0 else 'cpu',
                 '--algo', config.get('algorithm', 'hdbscan'),
                 '--k', str(config.get('clusters', 8)),
@@ -322,13 +332,15 @@ def run_training_pipeline(config):
         # 프로세스 실행
         logger.info(f"🔧 전체 파이프라인 명령어: {' '.join(cmd)}")
         process = subprocess.Popen(
-            cmd,
+            training_governor.command(cmd),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             universal_newlines=True,
-            bufsize=1
+            bufsize=1,
+            **training_governor.popen_kwargs()
         )
         logger.info(f"🚀 프로세스 시작: PID={process.pid}")
+        training_governor.watch(process)
         
         # 실시간 출력 처리
         logger.info("📊 실시간 출력 처리 시작")
@@ -441,6 +453,7 @@ def run_training_pipeline(config):
         # 프로세스 완료 대기
         logger.info("⏳ 프로세스 완료 대기 중...")
         return_code = process.wait()
+        training_governor.release()
         logger.info(f"🏁 프로세스 완료: 종료 코드={return_code}")
         
         with training_lock:
@@ -497,6 +510,7 @@ def run_training_pipeline(config):
         print(f"❌ 학습 파이프라인 오류: {e}")
     
     finally:
+        training_governor.release()
         # 원래 디렉토리로 복귀
         logger.info("🔄 원래 디렉토리로 복귀")
         os.chdir('..')
@@ -512,24 +526,27 @@ async def dataset_info_handler(request):
     """데이터셋 정보 조회"""
     try:
         data_glob = request.query.get('data_glob', 'training/dataset/raw/*.jsonl')
-        files = glob.glob(data_glob)
-        
-        total_size = 0
-        file_info = []
-        
-        for file_path in files:
-            if os.path.exists(file_path):
-                size = os.path.getsize(file_path)
-                total_size += size
-                file_info.append({
-                    'name': os.path.basename(file_path),
-                    'size': size,
-                    'path': file_path
-                })
+        # 카탈로그가 감시하는 패턴만 허용 (스냅샷에서 조회, 요청으로 감시 대상을 늘리지 않음)
+        if not dataset_catalog.watches(data_glob):
+            return web.json_response({"error": f"지원하지 않는 data_glob입니다: {data_glob}"}, status=400)
+        file_info = [
+            {
+                'name': f['name'],
+                'size': f['size'],
+                'path': f['path'],
+                'frame_count': f['frame_count'],
+                'duration_s': f['duration_s'],
+                'embedded': f['embedded'],
+                'summary': f['summary'],
+                'thumbnail': f['thumbnail'],
+            }
+            for f in dataset_catalog.files([data_glob])
+        ]
+        total_size = sum(f['size'] for f in file_info)
         
         return web.json_response({
             'status': 'ok',
-            'total_files': len(files),
+            'total_files': len(file_info),
             'total_size': total_size,
             'files': file_info
         })
@@ -659,12 +676,17 @@ async def training_stop_handler(request):
             training_status['state'] = 'stopped'
             training_status['is_complete'] = False
             training_status['current_step'] = '학습 중지됨'
-            
-            print("⏹️ 학습 중지 요청됨")
-            return web.json_response({
-                'status': 'ok',
-                'message': '학습 중지 요청이 처리되었습니다.'
-            })
+        
+        # 거버너가 일시정지한 상태라면 재개시켜야 출력 루프가 중지 요청을 처리할 수 있음
+        # (모니터 스레드 join을 기다리므로 이벤트 루프 밖에서 실행)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, training_governor.release)
+        
+        print("⏹️ 학습 중지 요청됨")
+        return web.json_response({
+            'status': 'ok',
+            'message': '학습 중지 요청이 처리되었습니다.'
+        })
             
     except Exception as e:
         print(f"❌ 학습 중지 오류: {e}")
@@ -696,6 +718,9 @@ async def training_status_handler(request):
             if status_data['best_loss'] == float('inf'):
                 status_data['best_loss'] = None
             
+            # 라이브 우선 리소스 거버너 상태/결정 내역
+            status_data['governor'] = training_governor.status()
+            
             return web.json_response({
                 'status': 'ok',
                 **status_data
@@ -1,4 +1,5 @@
 import json
+import time
 import asyncio
 import logging
 from typing import Dict, Set
@@ -14,6 +15,16 @@ class WebSocketManager:
         self.connections: Set[web.WebSocketResponse] = set()
         self.connection_info: Dict[web.WebSocketResponse, dict] = {}
         self._lock = asyncio.Lock()  # 동시성 제어를 위한 락
+        # 브로드캐스트 통계 (/metrics, 부하 테스트용)
+        self.stats = {
+            'broadcasts': 0,
+            'messages_sent': 0,
+            'send_failures': 0,
+            'last_broadcast_ms': 0.0,
+            'avg_broadcast_ms': 0.0,   # EMA
+            'max_broadcast_ms': 0.0,
+            'last_message_bytes': 0,
+        }
     
     async def register(self, ws: web.WebSocketResponse, remote_addr: str):
         """WebSocket 연결 등록"""
@@ -42,8 +53,10 @@ class WebSocketManager:
             # Set의 복사본을 만들어 반복 (동시 수정 방지)
             connections_copy = list(self.connections)
         
+        t0 = time.perf_counter()
         message_str = json.dumps(message)
         disconnected = []
+        sent = 0
         
         # 락을 해제한 상태에서 메시지 전송 (블로킹 방지)
         for ws in connections_copy:
@@ -60,6 +73,7 @@ class WebSocketManager:
                     disconnected.append(ws)
                 else:
                     await ws.send_str(message_str)
+                    sent += 1
             except Exception as e:
                 logger.warning(f"⚠️ WebSocket 메시지 전송 실패: {e}")
                 disconnected.append(ws)
@@ -67,6 +81,22 @@ class WebSocketManager:
         # 끊어진 연결 정리
         for ws in disconnected:
             await self.unregister(ws)
+        
+        self._record_broadcast((time.perf_counter() - t0) * 1000.0, sent, len(disconnected), len(message_str))
+    
+    def _record_broadcast(self, elapsed_ms: float, sent: int, failures: int, message_bytes: int):
+        st = self.stats
+        st['broadcasts'] += 1
+        st['messages_sent'] += sent
+        st['send_failures'] += failures
+        st['last_broadcast_ms'] = elapsed_ms
+        st['avg_broadcast_ms'] = elapsed_ms if st['broadcasts'] == 1 else 0.9 * st['avg_broadcast_ms'] + 0.1 * elapsed_ms
+        st['max_broadcast_ms'] = max(st['max_broadcast_ms'], elapsed_ms)
+        st['last_message_bytes'] = message_bytes
+    
+    def get_stats(self):
+        """브로드캐스트 통계 반환"""
+        return {'connections': len(self.connections), **self.stats}
     
     def get_connection_count(self):
         """현재 연결 수 반환"""
@@ -0,0 +1,306 @@
+"""
+WebSocket 부하 테스트 도구
+
+리플레이 캡처 소스로 서버(app.py)를 띄운 뒤, 클라이언트 수를 단계적으로 늘려가며
+N개의 aiohttp WebSocket 클라이언트(일부는 의도적으로 느린 리더)를 붙이고
+전달 fps, 지연 백분위수, 서버 CPU/메모리를 JSON으로 출력한다.
+
+사용법:
+    python ws_loadtest.py --source jsonl:training/dataset/raw/seq-1700000000000.jsonl \
+        --clients 1,5,10,25,50 --duration 20 --slow_fraction 0.2 --slow_delay 0.2 \
+        --out loadtest.json
+
+    # 이미 떠 있는 서버를 대상으로 (CPU/메모리는 --server_pid를 줄 때만 측정)
+    python ws_loadtest.py --url http://127.0.0.1:3000 --clients 1,10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+import numpy as np
+
+try:
+    import psutil  # type: ignore
+except Exception:
+    psutil = None
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="WebSocket broadcast load test with simulated clients")
+    p.add_argument("--source", type=str, default=None, help="CAPTURE_SOURCE for the spawned server (e.g. jsonl:<path>, video:<path>)")
+    p.add_argument("--url", type=str, default=None, help="target an already running server instead of spawning one")
+    p.add_argument("--server_pid", type=int, default=None, help="pid of an external server for CPU/memory sampling")
+    p.add_argument("--port", type=int, default=3100)
+    p.add_argument("--replay_rate", type=float, default=1.0)
+    p.add_argument("--clients", type=str, default="1,5,10,25", help="comma separated client counts")
+    p.add_argument("--duration", type=float, default=20.0, help="seconds per client count")
+    p.add_argument("--warmup", type=float, default=2.0, help="seconds ignored at the start of each step")
+    p.add_argument("--read_delay", type=float, default=0.0, help="per-message delay for normal readers (s)")
+    p.add_argument("--slow_fraction", type=float, default=0.0, help="fraction of clients that read slowly")
+    p.add_argument("--slow_delay", type=float, default=0.2, help="per-message delay for slow readers (s)")
+    p.add_argument("--startup_timeout", type=float, default=120.0)
+    p.add_argument("--out", type=str, default=None, help="write JSON result here (stdout otherwise)")
+    return p.parse_args()
+
+
+class ProcSampler:
+    """서버 프로세스 CPU/메모리 샘플러 (psutil 우선, 없으면 /proc)"""
+
+    def __init__(self, pid: Optional[int]):
+        self.pid = pid
+        self._proc = psutil.Process(pid) if (psutil is not None and pid) else None
+        self._last = None
+        self._tck = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+    def _cpu_seconds(self) -> Optional[float]:
+        if self._proc is not None:
+            t = self._proc.cpu_times()
+            return float(t.user + t.system)
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / float(self._tck)
+        except Exception:
+            return None
+
+    def _rss_mb(self) -> Optional[float]:
+        if self._proc is not None:
+            return self._proc.memory_info().rss / (1024 * 1024)
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) / 1024.0
+        except Exception:
+            pass
+        return None
+
+    def start(self):
+        if self.pid:
+            self._last = (time.perf_counter(), self._cpu_seconds())
+
+    def sample(self) -> Dict[str, Optional[float]]:
+        """start() 이후 평균 CPU%와 현재 RSS"""
+        if not self.pid or self._last is None:
+            return {'cpu_percent': None, 'rss_mb': None}
+        t0, c0 = self._last
+        t1, c1 = time.perf_counter(), self._cpu_seconds()
+        cpu = None
+        if c0 is not None and c1 is not None and t1 > t0:
+            cpu = 100.0 * (c1 - c0) / (t1 - t0)
+        rss = self._rss_mb()
+        return {
+            'cpu_percent': round(cpu, 1) if cpu is not None else None,
+            'rss_mb': round(rss, 1) if rss is not None else None,
+        }
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None, 'max': None, 'mean': None}
+    arr = np.asarray(values, dtype=np.float64)
+    return {
+        'p50': round(float(np.percentile(arr, 50)), 2),
+        'p95': round(float(np.percentile(arr, 95)), 2),
+        'p99': round(float(np.percentile(arr, 99)), 2),
+        'max': round(float(arr.max()), 2),
+        'mean': round(float(arr.mean()), 2),
+    }
+
+
+async def run_client(session: aiohttp.ClientSession, ws_url: str, delay: float, stop_at: float, warmup_until: float) -> Dict:
+    """WebSocket 클라이언트 1개: 메시지를 읽으며 전달 수와 지연(ms)을 기록"""
+    received = 0
+    latencies: List[float] = []
+    error = None
+    try:
+        async with session.ws_connect(ws_url, max_msg_size=0) as ws:
+            while True:
+                remaining = stop_at - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    msg = await asyncio.wait_for(ws.receive(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    if msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                        break
+                    continue
+                now = time.time()
+                if now >= warmup_until:
+                    received += 1
+                    try:
+                        data = json.loads(msg.data)
+                        ts = data.get('capture_ts') or data.get('ts')
+                        if ts:
+                            latencies.append((now - float(ts)) * 1000.0)
+                    except Exception:
+                        pass
+                if delay > 0:
+                    await asyncio.sleep(delay)
+    except Exception as e:
+        error = str(e)
+    return {'received': received, 'latencies': latencies, 'error': error}
+
+
+async def fetch_metrics(session: aiohttp.ClientSession, base_url: str) -> Optional[Dict]:
+    try:
+        async with session.get(f"{base_url}/metrics", timeout=aiohttp.ClientTimeout(total=5)) as r:
+            if r.status == 200:
+                return await r.json()
+    except Exception:
+        pass
+    return None
+
+
+async def run_step(base_url: str, n_clients: int, args, sampler: ProcSampler) -> Dict:
+    ws_url = base_url.replace('http', 'ws', 1) + '/ws'
+    n_slow = int(round(n_clients * max(0.0, min(1.0, args.slow_fraction))))
+    start = time.time()
+    warmup_until = start + args.warmup
+    stop_at = warmup_until + args.duration
+
+    async with aiohttp.ClientSession() as session:
+        before = await fetch_metrics(session, base_url)
+        sampler.start()
+        tasks = []
+        for i in range(n_clients):
+            slow = i < n_slow
+            delay = args.slow_delay if slow else args.read_delay
+            tasks.append(asyncio.create_task(run_client(session, ws_url, delay, stop_at, warmup_until)))
+        results = await asyncio.gather(*tasks)
+        proc = sampler.sample()
+        after = await fetch_metrics(session, base_url)
+
+    def summarize(group: List[Dict]) -> Dict:
+        fps = [r['received'] / args.duration for r in group]
+        lat = [v for r in group for v in r['latencies']]
+        return {
+            'clients': len(group),
+            'fps_mean': round(float(np.mean(fps)), 2) if fps else None,
+            'fps_min': round(float(np.min(fps)), 2) if fps else None,
+            'latency_ms': percentiles(lat),
+            'errors': sum(1 for r in group if r['error']),
+        }
+
+    step = {
+        'clients': n_clients,
+        'slow_clients': n_slow,
+        'all': summarize(results),
+        'normal': summarize(results[n_slow:]),
+        'slow': summarize(results[:n_slow]) if n_slow else None,
+        'server': proc,
+    }
+    if after:
+        ws_stats = after.get('websocket', {})
+        step['server'].update({
+            'avg_broadcast_ms': ws_stats.get('avg_broadcast_ms'),
+            'max_broadcast_ms': ws_stats.get('max_broadcast_ms'),
+            'send_fps': after.get('sender', {}).get('send_fps'),
+        })
+        if before:
+            step['server']['broadcasts'] = ws_stats.get('broadcasts', 0) - before.get('websocket', {}).get('broadcasts', 0)
+    return step
+
+
+async def wait_for_server(base_url: str, timeout: float, proc: Optional[subprocess.Popen]):
+    deadline = time.time() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.time() < deadline:
+            if proc is not None and proc.poll() is not None:
+                raise RuntimeError(f"server exited early with code {proc.returncode}")
+            if await fetch_metrics(session, base_url):
+                return
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"server did not become ready within {timeout:.0f}s")
+
+
+def spawn_server(args) -> subprocess.Popen:
+    env = dict(os.environ)
+    env['CAPTURE_SOURCE'] = args.source
+    env['PORT'] = str(args.port)
+    env['REPLAY_RATE'] = str(args.replay_rate)
+    env['REPLAY_LOOP'] = '1'
+    here = os.path.dirname(os.path.abspath(__file__))
+    return subprocess.Popen(
+        [sys.executable, '-u', 'app.py'],
+        cwd=here,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def main_async(args) -> Dict:
+    counts = [int(c) for c in args.clients.split(',') if c.strip()]
+    proc = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+        server_pid = args.server_pid
+    else:
+        if not args.source:
+            raise SystemExit("--source or --url is required")
+        proc = spawn_server(args)
+        base_url = f"http://127.0.0.1:{args.port}"
+        server_pid = proc.pid
+
+    try:
+        await wait_for_server(base_url, args.startup_timeout, proc)
+        sampler = ProcSampler(server_pid)
+        steps = []
+        for n in counts:
+            print(f"[loadtest] {n} clients ...", file=sys.stderr)
+            steps.append(await run_step(base_url, n, args, sampler))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    return {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'host': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+        },
+        'config': {
+            'source': args.source,
+            'url': base_url,
+            'replay_rate': args.replay_rate,
+            'duration': args.duration,
+            'warmup': args.warmup,
+            'read_delay': args.read_delay,
+            'slow_fraction': args.slow_fraction,
+            'slow_delay': args.slow_delay,
+        },
+        'steps': steps,
+    }
+
+
+def main():
+    args = parse_args()
+    result = asyncio.run(main_async(args))
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"Saved load test result: {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()